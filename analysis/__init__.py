@@ -0,0 +1,5 @@
+"""Fed, FRED and Federal Register ingestion: download, chunk, prepare, preprocess, index and store.
+
+Importing the package or any of its modules has no side effects; run commands with
+``python -m analysis <command>``.
+"""
@@ -0,0 +1,19 @@
+import sys
+from .cli import dispatch
+
+COMMANDS = {
+    'download': ('analysis.downloader', "download changed endpoints to processing/*_Data.txt"),
+    'truncate': ('analysis.truncation', "split _Data.txt files into _Truncated chunks"),
+    'append': ('analysis.append', "store the URL and date of each chunk as a DataObject"),
+    'prepare': ('analysis.preparation', "keep the relevant text of each chunk"),
+    'preprocess': ('analysis.preprocessing', "normalize prepared text and add it to the search index"),
+    'pipeline': ('analysis.pipeline', "run every stage in memory"),
+    'schedule': ('analysis.scheduler', "keep the pipeline and the buyalert scan running on their intervals"),
+    'search': ('analysis.searchindex', "index or query the preprocessed documents"),
+    'series': ('analysis.seriesstore', "ingest or query the numeric time series"),
+    'datastore': ('analysis.datastore', "migrate legacy JSON records into data.db"),
+    'fixtures': ('analysis.fixtures', "record endpoint fixtures for the benchmarks"),
+    'benchmark': ('analysis.benchmark', "run the benchmarks"),
+}
+
+sys.exit(dispatch('analysis', COMMANDS))
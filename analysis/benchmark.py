@@ -0,0 +1,672 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PROCESSING_PATH = os.path.join(LOCAL_PATH, 'analysis', 'processing')
+BASELINE_PATH = os.path.join(LOCAL_PATH, 'analysis', 'benchmarks', 'baseline.json')
+
+# A scenario slower than its baseline by more than this factor is reported as a regression.
+REGRESSION_THRESHOLD = 1.25
+
+def legacy_clean_json(cleaned_json):
+    cleaned_json = cleaned_json.replace('\n', '').replace('\r', '').replace('\t', '')
+
+    patterns = [
+        (r'": \* ', r'": null '),
+        (r"'(\w+)'\s*:", r'"\1":'),
+        (r'([{,]\s*)(\w+)(\s*:)', r'\1"\2"\3'),
+        (r'(:\s*)(\w+)(\s*[,\]})])', r'\1"\2"\3'),
+        (r'(\}\s*)(\{)', r'\1, \2'),
+        (r'(\]\s*)(\[)', r'\1, \2'),
+        (r'(,\s*)([\]}])', r'\2'),
+        (r'truee|falsee|nul', lambda m: m.group(0)[0:-1]),
+        (r'(?<!\\)"(.*?)(?<!\\)"', lambda m: '"' + m.group(1).replace('"', '\\"') + '"'),
+    ]
+
+    for pattern, replacement in patterns:
+        cleaned_json = re.sub(pattern, replacement, cleaned_json)
+        try:
+            json.loads(cleaned_json)
+        except json.JSONDecodeError:
+            continue
+        else:
+            break
+
+    return json.loads(cleaned_json)
+
+def synthetic_payload(releases=5000):
+    return json.dumps({
+        'realtime_start': '2024-02-27',
+        'realtime_end': '2024-02-27',
+        'count': releases,
+        'releases': [
+            {
+                'id': i,
+                'realtime_start': '2024-02-27',
+                'realtime_end': '2024-02-27',
+                'name': f'Release {i}',
+                'press_release': i % 2 == 0,
+                'link': f'http://www.example.org/releases/{i}',
+            }
+            for i in range(releases)
+        ],
+    }, indent=4)
+
+def malformed(payload):
+    payload = re.sub(r'"(\w+)":', r'\1:', payload)
+    return re.sub(r'(\n\s*)([\]}])', r',\1\2', payload)
+
+def note_synthetic(source):
+    print(f"SYNTHETIC DATA: {source}; these numbers are not measured on real API responses.")
+
+def load_payloads(paths):
+    payloads = []
+    for path in paths:
+        with open(path, 'r') as file:
+            payloads.append((os.path.basename(path), file.read()))
+    if not payloads:
+        note_synthetic("no payload files given or found, timing a generated FRED payload")
+        payloads.append(('synthetic', synthetic_payload()))
+    return payloads
+
+def timed(func, payload, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(payload)
+    return (time.perf_counter() - start) / repeat
+
+def bench_clean_json(paths, repeat=5):
+    from .downloader import clean_json
+    from .jsonrepair import strip_control_characters
+
+    payloads = load_payloads(paths or glob.glob(os.path.join(PROCESSING_PATH, '*_Data.txt')))
+    ok = True
+    speedups = {}
+    print(f"{'payload':40} {'variant':10} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}")
+    for name, payload in payloads:
+        # The legacy cleaner quotes bare numbers and booleans, so both variants are checked against the valid parse.
+        expected = json.loads(strip_control_characters(payload))
+        for variant, text in (('valid', payload), ('malformed', malformed(payload))):
+            if clean_json(strip_control_characters(text)) != expected:
+                ok = False
+                print(f"{name:40} {variant:10} parses differently from the valid payload")
+                continue
+            legacy = timed(legacy_clean_json, text, repeat)
+            new = timed(lambda t: clean_json(strip_control_characters(t)), text, repeat)
+            print(f"{name:40} {variant:10} {legacy * 1000:10.2f} {new * 1000:10.2f} {legacy / new:7.1f}x")
+            speedups.setdefault(variant, []).append(legacy / new)
+    # Only valid payloads take the json.loads fast path; malformed ones go through repair_json's
+    # tokenizer, so the two are summarized apart rather than as one speedup.
+    paths_taken = {'valid': 'json.loads fast path', 'malformed': 'repair_json tokenizer'}
+    for variant, values in speedups.items():
+        low, high = min(values), max(values)
+        measured = f"{low:.1f}x" if f"{low:.1f}" == f"{high:.1f}" else f"{low:.1f}x to {high:.1f}x"
+        print(f"{variant} payloads ({paths_taken[variant]}): {measured} the legacy cleaner's speed")
+    return ok
+
+def legacy_preprocess_text(text):
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    from nltk.tokenize import word_tokenize
+
+    text = text.lower()
+    text = re.sub(r'http[s]?://\S+', '', text)
+    text = text.translate(str.maketrans('', '', string.punctuation))
+    words = word_tokenize(text)
+    filtered_words = [word for word in words if word not in stopwords.words('english')]
+    lemmatizer = WordNetLemmatizer()
+    lemmatized_words = [lemmatizer.lemmatize(word) for word in filtered_words]
+    return ' '.join(lemmatized_words)
+
+def bench_preprocessing(paths, workers=None):
+    from concurrent.futures import ProcessPoolExecutor
+    from .preprocessing import get_preprocessor, is_valid_data, preprocess_text
+
+    texts = []
+    for path in paths or glob.glob(os.path.join(PROCESSING_PATH, '*_Prepared.txt')):
+        with open(path, 'r', encoding='utf-8') as file:
+            text = file.read()
+        if is_valid_data(text):
+            texts.append(text)
+    if not texts:
+        print("No _Prepared.txt files to benchmark.")
+        return
+    total_bytes = sum(len(text) for text in texts)
+
+    start = time.perf_counter()
+    legacy = [legacy_preprocess_text(text) for text in texts]
+    legacy_time = time.perf_counter() - start
+
+    get_preprocessor()
+    start = time.perf_counter()
+    cached = [preprocess_text(text) for text in texts]
+    cached_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pooled = list(executor.map(preprocess_text, texts, chunksize=16))
+    pooled_time = time.perf_counter() - start
+
+    if not legacy == cached == pooled:
+        print("Preprocessed output differs from the legacy loop.")
+    print(f"{len(texts)} files, {total_bytes / 1e6:.2f} MB")
+    for name, elapsed in (('legacy loop', legacy_time), ('cached', cached_time), ('cached + pool', pooled_time)):
+        print(f"{name:15} {elapsed:8.2f} s {len(texts) / elapsed:10.1f} files/s {total_bytes / 1e6 / elapsed:8.2f} MB/s")
+
+class LegacyDataObject:
+    def __init__(self, base_name, url=None, headline=None, summary=None, date=None, copyright=None):
+        self.base_name = base_name
+        self.url = url
+        self.headline = headline
+        self.summary = summary
+        self.date = date
+        self.copyright = copyright
+
+    def to_json(self):
+        return json.dumps(self.__dict__, indent=4)
+
+def legacy_update_copyright(data_objects, copyright_texts):
+    for obj in data_objects:
+        for key, text in copyright_texts.items():
+            if key in obj.base_name:
+                obj.copyright = text
+                break
+
+def measured(func):
+    # Timed without tracemalloc, which slows down allocation-heavy code, then rerun for peak memory.
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def bench_data_objects(paths, count=100000):
+    from .append import COPYRIGHT_TEXTS
+    from .module import DataObject, DataObjectBatch
+
+    sources = list(COPYRIGHT_TEXTS)
+    note_synthetic(f"{count} generated records")
+    rows = [(f"{sources[i % len(sources)]}_{i}", f"https://example.org/{i}", None, None, 'February 27, 2024', None) for i in range(count)]
+
+    legacy, legacy_build, legacy_memory = measured(lambda: [LegacyDataObject(*row) for row in rows])
+    slotted, slotted_build, slotted_memory = measured(lambda: [DataObject(*row) for row in rows])
+    batch, batch_build, batch_memory = measured(lambda: DataObjectBatch(slotted))
+
+    _, legacy_copyright, _ = measured(lambda: legacy_update_copyright(legacy, COPYRIGHT_TEXTS))
+    _, batch_copyright, _ = measured(lambda: batch.assign_by_source('copyright', COPYRIGHT_TEXTS))
+    if [obj.copyright for obj in legacy] != batch.copyright:
+        print("Copyright assignment differs from the legacy loop.")
+
+    _, legacy_dump, _ = measured(lambda: [obj.to_json() for obj in legacy])
+    _, slotted_dump, _ = measured(lambda: [obj.to_json() for obj in slotted])
+    _, batch_dump, _ = measured(batch.to_json)
+
+    print(f"{count} records")
+    print(f"{'':12} {'build s':>8} {'peak MB':>8} {'copyright s':>12} {'to_json s':>10}")
+    print(f"{'legacy':12} {legacy_build:8.3f} {legacy_memory / 1e6:8.1f} {legacy_copyright:12.3f} {legacy_dump:10.3f}")
+    print(f"{'slots':12} {slotted_build:8.3f} {slotted_memory / 1e6:8.1f} {'':>12} {slotted_dump:10.3f}")
+    print(f"{'batch':12} {batch_build:8.3f} {batch_memory / 1e6:8.1f} {batch_copyright:12.3f} {batch_dump:10.3f}")
+
+def legacy_extract_url(content):
+    url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+    match = url_pattern.search(content)
+    return match.group(0) if match else None
+
+def legacy_extract_date(content):
+    date_patterns = [
+        (r'\b(\d{1,2})[-/](\d{1,2})[-/](\d{4})\b', "%m-%d-%Y"),
+        (r'\b(\d{4})[-/](\d{1,2})[-/](\d{1,2})\b', "%Y-%m-%d"),
+        (r'\b(\w+) (\d{1,2}), (\d{4})\b', "%B %d, %Y"),
+        (r'\b(\d{1,2}) (\w+), (\d{4})\b', "%d %B, %Y")
+    ]
+    for pattern, date_format in date_patterns:
+        match = re.search(pattern, content)
+        if match:
+            return datetime.datetime.strptime(match.group(), date_format).strftime('%B %d, %Y')
+    return None
+
+def truncated_corpus(count=5000, seed=0):
+    """Chunks shaped like *_Truncated.txt: a JSON list of one-key objects, at most ~511 bytes."""
+    rng = random.Random(seed)
+    shapes = [
+        lambda i, day: {'refRates_0_effectiveDate': f'2024-02-{day:02d}', 'refRates_0_percentRate': 5.31, 'refRates_0_type': 'EFFR'},
+        lambda i, day: {'releases_0_link': f'https://www.census.gov/releases/{i}', 'releases_0_name': f'Release {i}', 'releases_0_realtime_start': f'2024-02-{day:02d}'},
+        lambda i, day: {'results_0_html_url': f'https://www.federalregister.gov/documents/2024/02/{day:02d}/{i}', 'results_0_filed_at': f'February {day}, 2024 8:45 AM'},
+        lambda i, day: {'ambs_auctions_0_operationDate': f'02/{day:02d}/2024', 'ambs_auctions_0_note': 'No operation scheduled'},
+        lambda i, day: {'pd_0_asofdate': f'{day} February, 2024', 'pd_0_value': rng.randint(1, 10**6)},
+    ]
+    return [json.dumps([{key: value} for key, value in shapes[i % len(shapes)](i, rng.randint(1, 28)).items()], indent=4) for i in range(count)]
+
+def bench_extractors(paths, repeat=3):
+    from .extractors import extract
+
+    corpus = []
+    for path in paths or glob.glob(os.path.join(PROCESSING_PATH, '*_Truncated.txt')):
+        with open(path, 'r') as f:
+            corpus.append(f.read())
+    if not corpus:
+        note_synthetic("no _Truncated.txt files given or found, timing generated chunks")
+        corpus = truncated_corpus()
+
+    def legacy(texts):
+        results = []
+        for text in texts:
+            try:
+                results.append((legacy_extract_url(text), legacy_extract_date(text)))
+            except ValueError:
+                results.append(None)
+        return results
+
+    legacy_results = legacy(corpus)
+    new_results = [extract(text) for text in corpus]
+    failures = sum(result is None for result in legacy_results)
+    mismatches = sum(old is not None and old != new for old, new in zip(legacy_results, new_results))
+
+    legacy_time = min(timed(legacy, corpus, 1) for _ in range(repeat))
+    new_time = min(timed(lambda texts: [extract(text) for text in texts], corpus, 1) for _ in range(repeat))
+    print(f"{len(corpus)} chunks; legacy raised on {failures}, {mismatches} results differ where it did not")
+    print(f"legacy {legacy_time * 1000:8.2f} ms  single scan {new_time * 1000:8.2f} ms  {legacy_time / new_time:5.1f}x")
+
+def legacy_process_text(text):
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\'(),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text).strip()
+    sentences = [sentence.strip() + '.' for sentence in text.split('.') if sentence.strip() and len(sentence.strip()) > 1]
+    if not sentences:
+        return ''
+    if len(sentences) > 1 and re.search(r'http[s]?://', sentences[1]):
+        return sentences[0]
+    return sentences[0] if len(sentences) == 1 else ' '.join(sentences)
+
+def legacy_prepare_items(data):
+    relevant_texts = []
+    for item in data:
+        textual_values = [value for value in item.values() if isinstance(value, str)]
+        for text in textual_values:
+            processed_text = legacy_process_text(text)
+            if len(processed_text) > 50:
+                relevant_texts.append(processed_text)
+                continue
+
+            numerical_values = [text for text in textual_values if re.match(r'^[\d\.\-\/]+$', text)]
+            if len(numerical_values) >= 3:
+                relevant_texts.extend(numerical_values)
+    return relevant_texts
+
+def fred_chunk_sets(scale=100):
+    """FRED-shaped chunk sets: the truncated chunks of a scaled FRED payload, plus its raw multi-key records."""
+    from .fixtures import endpoint_data, synthetic_endpoints
+    from . import truncation
+
+    if synthetic_endpoints(['FRED_Data.txt']):
+        note_synthetic("no _Truncated.txt files or recorded FRED fixture, timing chunks of a generated FRED payload")
+    data = endpoint_data('FRED_Data.txt', scale)
+    chunks = [json.loads(file_content) for file_content, _ in truncation.chunk_json(data)]
+    records = [{key: str(value) if key == 'id' else value for key, value in release.items()} for release in data['releases']]
+    return chunks + [records[i:i + 50] for i in range(0, len(records), 50)]
+
+def bench_preparation(paths, repeat=3, scale=100):
+    from .preparation import prepare_items
+
+    chunk_sets = []
+    for path in paths or glob.glob(os.path.join(PROCESSING_PATH, '*_Truncated.txt')):
+        with open(path, 'r') as f:
+            chunk_sets.append(json.load(f))
+    chunk_sets = chunk_sets or fred_chunk_sets(scale)
+
+    legacy_results = [legacy_prepare_items(items) for items in chunk_sets]
+    new_results = [prepare_items(items) for items in chunk_sets]
+    mismatches = sum(list(dict.fromkeys(old)) != new for old, new in zip(legacy_results, new_results))
+    duplicates = sum(len(old) - len(new) for old, new in zip(legacy_results, new_results))
+
+    legacy_time = min(timed(lambda sets: [legacy_prepare_items(items) for items in sets], chunk_sets, 1) for _ in range(repeat))
+    new_time = min(timed(lambda sets: [prepare_items(items) for items in sets], chunk_sets, 1) for _ in range(repeat))
+    print(f"{len(chunk_sets)} chunk sets, {sum(map(len, chunk_sets))} items; {mismatches} differ beyond the {duplicates} duplicates dropped")
+    print(f"legacy {legacy_time * 1000:8.2f} ms  batch {new_time * 1000:8.2f} ms  {legacy_time / new_time:5.1f}x")
+    return mismatches == 0
+
+STREAMED_FIXTURES = ('FRED_Data.txt', 'Public_Inspection_Data.txt')
+
+def buffered_ingest(body):
+    """What download_json, clean_json and chunk_json hold for a payload: (digest, has_content, chunk digests, observations)."""
+    from .downloader import clean_json, create_hash, is_empty
+    from .jsonrepair import strip_control_characters
+    from .seriesstore import iter_observations
+    from .truncation import chunk_json, file_hash
+
+    cleaned_json = strip_control_characters(body.decode())
+    json_data = clean_json(cleaned_json)
+    chunks = [file_hash(file_content) for file_content, _ in chunk_json(json_data)]
+    return create_hash(cleaned_json), not is_empty(json_data), chunks, sorted(iter_observations(json_data))
+
+def streamed_ingest(body, chunk_size):
+    """buffered_ingest through iter_text, spill_leaves and the spill's sorted items."""
+    from .downloader import iter_text
+    from .streaming import spill_leaves
+    from .truncation import file_hash, iter_chunk_items
+
+    response = SimpleNamespace(encoding='utf-8', iter_content=lambda size: (body[i:i + size] for i in range(0, len(body), size)))
+    leaf_spill, digest, has_content = spill_leaves(iter_text(response, chunk_size))
+    try:
+        chunks = [file_hash(file_content) for file_content, _ in iter_chunk_items(leaf_spill.items())]
+        return digest, has_content, chunks, sorted(leaf_spill.observations)
+    finally:
+        leaf_spill.close()
+
+def bench_streaming(paths, scale=50, chunk_size=64 * 1024):
+    """Peak Python memory of the buffered and streaming ingest paths, which must agree on digest, chunks and series."""
+    from .fixtures import endpoint_data, synthetic_endpoints
+
+    synthetic = [] if paths else synthetic_endpoints(STREAMED_FIXTURES)
+    if synthetic:
+        note_synthetic(f"no recorded fixture for {', '.join(synthetic)}, generated payloads stand in")
+    bodies = [(name, text.encode()) for name, text in load_payloads(paths)] if paths else [
+        (name, json.dumps(endpoint_data(name, scale), indent=4).encode()) for name in STREAMED_FIXTURES]
+    ok = True
+    print("peak MB counts Python allocations only; the spill's SQLite pages stay under streaming.SPILL_CACHE_KIB")
+    print(f"{'payload':32} {'MB':>7} {'buffered s':>10} {'peak MB':>8} {'stream s':>9} {'peak MB':>8}")
+    for name, body in bodies:
+        buffered, buffered_time, buffered_peak = measured(lambda: buffered_ingest(body))
+        streamed, streamed_time, streamed_peak = measured(lambda: streamed_ingest(body, chunk_size))
+        print(f"{name:32} {len(body) / 1e6:7.1f} {buffered_time:10.2f} {buffered_peak / 1e6:8.1f} {streamed_time:9.2f} {streamed_peak / 1e6:8.1f}")
+        for label, old, new in zip(('digest', 'emptiness', 'chunks', 'observations'), buffered, streamed):
+            if old != new:
+                ok = False
+                print(f"{name:32} {label} differ")
+    return ok
+
+@contextmanager
+def processing_path(directory):
+    """Point every stage's PROCESSING_PATH at directory so suite runs never touch analysis/processing."""
+    from . import append
+    from . import downloader
+    from . import preparation
+    from . import preprocessing
+    from . import truncation
+
+    modules = (append, downloader, preparation, preprocessing, truncation)
+    saved = [module.PROCESSING_PATH for module in modules]
+    for module in modules:
+        module.PROCESSING_PATH = directory
+    try:
+        yield directory
+    finally:
+        for module, path in zip(modules, saved):
+            module.PROCESSING_PATH = path
+
+def _write_data_files(payloads, directory):
+    from .downloader import clean_json, save_data
+    from .jsonrepair import strip_control_characters
+
+    os.makedirs(directory, exist_ok=True)
+    for file_name, text in payloads:
+        save_data(clean_json(strip_control_characters(text)), file_name)
+    return sorted(glob.glob(os.path.join(directory, '*_Data.txt')))
+
+def suite_scenarios(payloads, workdir):
+    """(name, setup, run, items, bytes) per stage; setup runs untimed before every repetition."""
+    from .datastore import DataStore
+    from .downloader import clean_json
+    from .hashstore import HashStore
+    from .jsonrepair import strip_control_characters
+    from . import append
+    from . import preparation
+    from . import preprocessing
+    from . import truncation
+
+    texts = [text for _, text in payloads] + [malformed(text) for _, text in payloads]
+    scenarios = [('clean_json', lambda: texts, lambda texts: [clean_json(strip_control_characters(text)) for text in texts],
+                  len(texts), sum(map(len, texts)))]
+
+    # Build the later stages' inputs once, by running the earlier stages into workdir.
+    stage_dir = os.path.join(workdir, 'stages')
+    with processing_path(stage_dir):
+        data_files = _write_data_files(payloads, stage_dir)
+        data_bytes = sum(os.path.getsize(path) for path in data_files)
+        chunk_store = HashStore(os.path.join(workdir, 'stage_hashes.db'))
+        for path in data_files:
+            truncation.process_file(path, os.path.basename(path), chunk_store)
+        chunk_store.close()
+        truncated = sorted(glob.glob(os.path.join(stage_dir, '*_Truncated.txt')))
+        truncated_bytes = sum(os.path.getsize(path) for path in truncated)
+        for path in truncated:
+            preparation.process_json_file(path)
+        prepared = []
+        for path in sorted(glob.glob(os.path.join(stage_dir, '*_Prepared.txt'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                prepared.append(f.read())
+
+    run_count = [0]
+
+    parsed = [clean_json(strip_control_characters(text)) for _, text in payloads]
+
+    def chunking(documents):
+        for json_data in documents:
+            for file_content, _ in truncation.chunk_json(json_data):
+                truncation.file_hash(file_content)
+
+    def process_file_setup():
+        run_count[0] += 1
+        directory = os.path.join(workdir, f'process_file_{run_count[0]}')
+        with processing_path(directory):
+            paths = _write_data_files(payloads, directory)
+        return directory, paths, HashStore(os.path.join(directory, 'hashes.db'))
+
+    def process_file(state):
+        directory, paths, store = state
+        with processing_path(directory):
+            for path in paths:
+                truncation.process_file(path, os.path.basename(path), store)
+        store.close()
+        shutil.rmtree(directory)
+
+    def preparation_run(paths):
+        with processing_path(os.path.join(workdir, 'prepared')):
+            os.makedirs(preparation.PROCESSING_PATH, exist_ok=True)
+            for path in paths:
+                preparation.process_json_file(path)
+
+    def append_setup():
+        run_count[0] += 1
+        return DataStore(os.path.join(workdir, f'data_{run_count[0]}.db'))
+
+    def append_run(store):
+        with processing_path(stage_dir):
+            append.process_truncated_files(store)
+        store.close()
+
+    scenarios += [
+        ('chunking', lambda: parsed, chunking, len(data_files), data_bytes),
+        ('process_file', process_file_setup, process_file, len(data_files), data_bytes),
+        ('preparation', lambda: truncated, preparation_run, len(truncated), truncated_bytes),
+        ('append', append_setup, append_run, len(truncated), truncated_bytes),
+    ]
+    try:
+        preprocessing.get_preprocessor()
+    except LookupError as e:
+        print(f"Skipping preprocess_text: {e}")
+    else:
+        valid = [text for text in prepared if preprocessing.is_valid_data(text)]
+        scenarios.append(('preprocess_text', lambda: valid, lambda texts: [preprocessing.preprocess_text(text) for text in texts],
+                          len(valid), sum(map(len, valid))))
+    return scenarios
+
+def run_scenario(setup, run, repeat):
+    best = None
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f).get('results', {})
+
+def save_baseline(results, path=BASELINE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {'python': platform.python_version(), 'machine': platform.platform(), 'saved': time.time(), 'results': results}
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(baseline, f, indent=4)
+    os.replace(f"{path}.tmp", path)
+
+def bench_suite(args):
+    """Offline suite over endpoint fixtures at several payload scales, compared against a stored baseline."""
+    from .downloader import URLS
+    from .fixtures import FIXTURES_PATH, endpoint_payloads, synthetic_endpoints
+
+    parser = argparse.ArgumentParser(prog='python -m analysis benchmark suite')
+    parser.add_argument('--scales', default='1,10', help="comma-separated payload multipliers, e.g. 1,10,100")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', help="comma-separated scenario names")
+    parser.add_argument('--save-baseline', action='store_true', help=f"store these results in {BASELINE_PATH}")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    options = parser.parse_args(args)
+    only = set(options.only.split(',')) if options.only else None
+
+    # Results on generated payloads are only compared with a baseline taken on the same mix of data.
+    synthetic = len(synthetic_endpoints([file_name for _, file_name in URLS]))
+    if synthetic:
+        note_synthetic(f"{synthetic} of {len(URLS)} endpoints have no recorded fixture in {FIXTURES_PATH} and are generated")
+        print("Record real payloads with: python -m analysis fixtures record")
+
+    baseline = load_baseline()
+    results = {}
+    regressions = []
+    print(f"{'scenario':16} {'scale':>5} {'items':>7} {'MB':>7} {'seconds':>9} {'MB/s':>8} {'items/s':>9} {'peak MB':>8} {'baseline':>9} {'ratio':>6}")
+    for scale in (int(value) for value in options.scales.split(',')):
+        payloads = endpoint_payloads(scale)
+        workdir = tempfile.mkdtemp(prefix='benchmark_')
+        try:
+            for name, setup, run, items, size in suite_scenarios(payloads, workdir):
+                if only and name not in only:
+                    continue
+                seconds, peak = run_scenario(setup, run, options.repeat)
+                key = f"{name}@{scale}x"
+                results[key] = {'seconds': seconds, 'peak_bytes': peak, 'items': items, 'bytes': size, 'synthetic': synthetic}
+                previous = baseline.get(key)
+                if previous and previous.get('synthetic', synthetic) != synthetic:
+                    previous = None
+                ratio = seconds / previous['seconds'] if previous else None
+                flag = ''
+                if ratio and ratio > options.threshold:
+                    regressions.append(key)
+                    flag = '  REGRESSION'
+                print(f"{name:16} {scale:>4}x {items:7d} {size / 1e6:7.2f} {seconds:9.4f} {size / 1e6 / seconds:8.2f} {items / seconds:9.1f} "
+                      f"{peak / 1e6:8.1f} {previous['seconds'] if previous else float('nan'):9.4f} {ratio or float('nan'):6.2f}{flag}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if options.save_baseline:
+        save_baseline({**baseline, **results})
+        print(f"Saved baseline to {BASELINE_PATH}")
+    if regressions:
+        print(f"{len(regressions)} scenarios slower than {options.threshold}x baseline: {', '.join(regressions)}")
+    return not regressions
+
+# Modules small jobs start from, and the dependencies they should only load once work needs them.
+IMPORT_TARGETS = ('analysis', 'analysis.downloader', 'analysis.truncation', 'analysis.preparation', 'analysis.preprocessing',
+                  'analysis.searchindex', 'analysis.pipeline', 'analysis.scheduler', 'quickplay.journal', 'quickplay.buyalert')
+HEAVY_DEPENDENCIES = ('nltk', 'pandas', 'numpy', 'requests', 'yfinance')
+STARTUP_COMMANDS = (('analysis', 'pipeline'), ('analysis', 'schedule'), ('analysis', 'search'), ('quickplay', 'buyalert'))
+
+def import_time(module, repeat=3):
+    """(cumulative seconds reported by -X importtime, heavy dependencies loaded) for a cold import of module."""
+    best, loaded = None, None
+    code = f"import sys, {module}; print(' '.join(name for name in {HEAVY_DEPENDENCIES!r} if name in sys.modules))"
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=LOCAL_PATH, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        for line in result.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == module:
+                seconds = int(parts[1]) / 1e6
+                best = seconds if best is None else min(best, seconds)
+        loaded = result.stdout.strip()
+    return best, loaded
+
+def startup_time(package, command, repeat=3):
+    """Best wall-clock seconds for `python -m package command --help`, interpreter start included."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', package, command, '--help'], cwd=LOCAL_PATH, capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_imports(modules):
+    """Cold-start cost of the package modules and commands, measured in fresh interpreters."""
+    ok = True
+    print(f"{'module':28} {'import ms':>10}  heavy dependencies loaded")
+    for module in modules or IMPORT_TARGETS + HEAVY_DEPENDENCIES:
+        seconds, loaded = import_time(module)
+        if seconds is None:
+            ok = False
+            print(f"{module:28} {'failed':>10}  {loaded}")
+        else:
+            print(f"{module:28} {seconds * 1000:10.1f}  {loaded or '-'}")
+    if not modules:
+        interpreter = min(timed(lambda _: subprocess.run([sys.executable, '-c', 'pass'], check=True), None, 1) for _ in range(3))
+        print(f"\n{'command --help':28} {'wall ms':>10}  (bare interpreter {interpreter * 1000:.1f} ms)")
+        for package, command in STARTUP_COMMANDS:
+            print(f"{package + ' ' + command:28} {startup_time(package, command) * 1000:10.1f}")
+    return ok
+
+BENCHMARKS = {
+    'clean_json': bench_clean_json,
+    'preprocessing': bench_preprocessing,
+    'data_objects': bench_data_objects,
+    'extractors': bench_extractors,
+    'preparation': bench_preparation,
+    'streaming': bench_streaming,
+    'suite': bench_suite,
+    'imports': bench_imports,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmarks; with no name, run them all.",
+                                     epilog="suite takes its own options, e.g. suite --scales 1,10; see suite --help")
+    parser.add_argument('name', nargs='?', choices=list(BENCHMARKS), help="the benchmark to run")
+    parser.add_argument('paths', nargs='*', help="payload or processing files to benchmark instead of the defaults")
+    argv = sys.argv[1:]
+    if argv[:1] == ['suite']:
+        # The suite parses its own options, --help included.
+        names, paths = ['suite'], argv[1:]
+    else:
+        args = parser.parse_args(argv)
+        names, paths = [args.name] if args.name else list(BENCHMARKS), args.paths
+    passed = True
+    for name in names:
+        print(f"== {name}")
+        passed = BENCHMARKS[name](paths) is not False and passed
+    sys.exit(0 if passed else 1)
+
+if __name__ == '__main__':
+    main()
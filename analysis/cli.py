@@ -0,0 +1,24 @@
+import importlib
+import sys
+
+def dispatch(package, commands, argv=None):
+    """Run one command's main() with the remaining arguments, importing only that command's module.
+
+    commands maps a command name to (module, help); the module's main() parses sys.argv itself.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    prog = f'python -m {package}'
+    if not argv or argv[0] in ('-h', '--help'):
+        width = max(map(len, commands))
+        print(f"usage: {prog} <command> [options]\n\ncommands:")
+        for name, (_, help) in commands.items():
+            print(f"  {name:{width}}  {help}")
+        return 0 if argv else 2
+    name, *rest = argv
+    if name not in commands:
+        print(f"{prog}: unknown command '{name}'; see {prog} --help", file=sys.stderr)
+        return 2
+    module = importlib.import_module(commands[name][0])
+    sys.argv = [f'{prog} {name}', *rest]
+    module.main()
+    return 0
@@ -0,0 +1,154 @@
+import datetime
+import glob
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from .module import FIELDS, DataObject, DataObjectBatch, split_base_name
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+DATA_PATH = os.path.join(LOCAL_PATH, 'analysis', 'data')
+DATA_DB_PATH = os.path.join(DATA_PATH, 'data.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS data_objects (
+    base_name TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    chunk INTEGER,
+    url TEXT,
+    headline TEXT,
+    summary TEXT,
+    date TEXT,
+    date_key TEXT,
+    copyright TEXT
+);
+CREATE INDEX IF NOT EXISTS data_objects_source ON data_objects (source, chunk);
+CREATE INDEX IF NOT EXISTS data_objects_date ON data_objects (date_key);
+"""
+
+UPSERT = """
+INSERT INTO data_objects (base_name, source, chunk, url, headline, summary, date, date_key, copyright)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (base_name) DO UPDATE SET
+    url = COALESCE(excluded.url, url),
+    headline = COALESCE(excluded.headline, headline),
+    summary = COALESCE(excluded.summary, summary),
+    date = COALESCE(excluded.date, date),
+    date_key = COALESCE(excluded.date_key, date_key),
+    copyright = COALESCE(excluded.copyright, copyright)
+"""
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def date_key(date):
+    # Dates are stored the way append.extract_date formats them, e.g. "February 27, 2024".
+    if not date:
+        return None
+    try:
+        return datetime.datetime.strptime(date, '%B %d, %Y').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+def _row(data_obj):
+    source, chunk = split_base_name(data_obj.base_name)
+    return (data_obj.base_name, source, chunk, data_obj.url, data_obj.headline, data_obj.summary,
+            data_obj.date, date_key(data_obj.date), data_obj.copyright)
+
+class DataStore:
+    """All DataObject records in one table, keyed by base_name and indexed by source and date."""
+
+    def __init__(self, path=DATA_DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def upsert_many(self, data_objects):
+        """Insert or update records; None fields keep whatever is already stored."""
+        with self.transaction():
+            self._conn.executemany(UPSERT, (_row(data_obj) for data_obj in data_objects))
+
+    def get(self, base_name):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(FIELDS)} FROM data_objects WHERE base_name = ?", (base_name,)).fetchone()
+        return DataObject(*row) if row else None
+
+    def query(self, source=None, date_from=None, date_to=None, base_name=None):
+        """Filter by source prefix (e.g. 'FRED'), ISO date range and/or base_name."""
+        clauses, params = [], []
+        if source is not None:
+            clauses.append('source = ?')
+            params.append(source)
+        if date_from is not None:
+            clauses.append('date_key >= ?')
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append('date_key <= ?')
+            params.append(date_to)
+        if base_name is not None:
+            clauses.append('base_name = ?')
+            params.append(base_name)
+        sql = f"SELECT {', '.join(FIELDS)} FROM data_objects"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY source, chunk', params).fetchall()
+        return [DataObject(*row) for row in rows]
+
+    def load_all(self):
+        return self.query()
+
+    def load_batch(self, **filters):
+        return DataObjectBatch(self.query(**filters))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM data_objects').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def get_data_store(path=DATA_DB_PATH):
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = DataStore(path)
+        return _stores[path]
+
+def migrate_json_files(store=None, data_path=DATA_PATH, remove=False):
+    """One-shot import of the per-chunk <base_name>.json files written by earlier versions of append.py."""
+    store = store if store is not None else get_data_store()
+    file_paths = glob.glob(os.path.join(data_path, '*.json'))
+    data_objects = []
+    for file_path in file_paths:
+        with open(file_path, 'r') as f:
+            data_objects.append(DataObject.from_dict(json.load(f)))
+    store.upsert_many(data_objects)
+    if remove:
+        for file_path in file_paths:
+            os.remove(file_path)
+    return len(data_objects)
+
+def main():
+    count = migrate_json_files(remove='--remove' in sys.argv[1:])
+    print(f"Migrated {count} records into {DATA_DB_PATH}")
+
+if __name__ == '__main__':
+    main()
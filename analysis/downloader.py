@@ -1,23 +1,50 @@
+import argparse
+import codecs
 import json
-import requests
 import logging
 import os
-import re
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from .hashstore import DOWNLOADER, get_store
+from .jsonrepair import repair_json, strip_control_characters
+from .streaming import spill_leaves
+from . import metrics
+from .logsetup import configure_logging
 
 LOCAL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 PROCESSING_PATH = os.path.join(LOCAL_PATH, 'analysis', 'processing')
 HASH_PATH = os.path.join(LOCAL_PATH, 'analysis', 'hashes')
 LOG_PATH = os.path.join(LOCAL_PATH, 'analysis', 'logs')
 
-if not os.path.exists(PROCESSING_PATH):
-    os.makedirs(PROCESSING_PATH)
-if not os.path.exists(HASH_PATH):
-    os.makedirs(HASH_PATH)
-if not os.path.exists(LOG_PATH):
-    os.makedirs(LOG_PATH)
+TIMEOUT = (5, 30)
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+STREAM_CHUNK_SIZE = 64 * 1024
 
-logging.basicConfig(filename=os.path.join(LOG_PATH, 'downloader.log'), level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+URLS = [
+    ("https://markets.newyorkfed.org/api/ambs/all/announcements/summary/latest.json", "AMBS_Announcements_Data.txt"),
+    ("https://markets.newyorkfed.org/api/ambs/all/results/summary/latest.json", "AMBS_Results_Data.txt"),
+    ("https://markets.newyorkfed.org/api/fxs/all/latest.json", "FX_Swaps_Announcements_Data.txt"),
+    ("https://markets.newyorkfed.org/api/ambs/all/results/summary/latest.json", "FX_Swaps_Results_Data.txt"),
+    ("https://markets.newyorkfed.org/api/marketshare/qtrly/latest.json", "Market_Share_Quarterly_Data.txt"),
+    ("https://markets.newyorkfed.org/api/marketshare/ytd/latest.json", "Market_Share_Yearly_Data.txt"),
+    ("https://markets.newyorkfed.org/api/rates/all/latest.json", "Rates_Data.txt"),
+    ("https://markets.newyorkfed.org/api/rp/all/all/results/latest.json", "Repo_Results_Data.txt"),
+    ("https://markets.newyorkfed.org/api/rp/all/all/announcements/latest.json", "Repo_Announcements_Data.txt"),
+    ("https://markets.newyorkfed.org/api/seclending/all/results/summary/latest.json", "Securities_Lending_Data.txt"),
+    ("https://markets.newyorkfed.org/api/tsy/all/announcements/summary/latest.json", "Treasury_Securities_Announcements_Data.txt"),
+    ("https://markets.newyorkfed.org/api/tsy/all/results/summary/latest.json", "Treasury_Securities_Results_Data.txt"),
+    ("https://markets.newyorkfed.org/api/tsy/all/operations/summary/latest.json", "Treasury_Securities_Operations_Data.txt"),
+    ("https://www.federalregister.gov/api/v1/public-inspection-documents/current.json", "Public_Inspection_Data.txt"),
+    ("https://api.stlouisfed.org/fred/releases?api_key=6f19389f3e13501941e023c61848ab90&file_type=json", "FRED_Data.txt"),
+]
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
 
 def is_empty(data):
     if isinstance(data, dict):
@@ -27,100 +54,208 @@ def is_empty(data):
     return not data
 
 def save_data(json_data, base_file_name):
+    os.makedirs(PROCESSING_PATH, exist_ok=True)
     file_path = os.path.join(PROCESSING_PATH, base_file_name)
     with open(file_path, 'w') as file:
         json.dump(json_data, file, indent=4)
     logging.info(f"Data saved to {file_path}")
 
-def download_json(api_url, base_file_name):
-    response = requests.get(api_url)
+def create_session(pool_size=MAX_WORKERS):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=RETRIES, backoff_factor=BACKOFF_FACTOR, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(['GET']))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def host_limit(api_url):
+    host = urlsplit(api_url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+        return _host_limits[host]
+
+def conditional_headers(api_url, validators):
+    headers = {}
+    if validators and validators.get('url') == api_url:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+def request_json(api_url, base_file_name, session=None, validators=None, stream=False):
+    """The 200 response for api_url, or None if it is unchanged or failed, plus the new validators."""
+    if session is None:
+        import requests as session
+    response = session.get(api_url, headers=conditional_headers(api_url, validators), timeout=TIMEOUT, stream=stream)
+    if response.status_code == 304:
+        response.close()
+        metrics.count('downloader.not_modified')
+        logging.info(f"{base_file_name} not modified since last download.")
+        return None, validators
     if response.status_code != 200:
+        response.close()
+        metrics.count('downloader.failed')
         logging.error(f"Failed to download data from {api_url}")
-    return response.text
-
-def clean_json(cleaned_json, recursion_depth=0, max_recursion_depth=10):
-    cleaned_json = cleaned_json.replace('\n', '').replace('\r', '').replace('\t', '')
-
-    patterns = [
-        (r'": \* ', r'": null '),
-        (r"'(\w+)'\s*:", r'"\1":'),
-        (r'([{,]\s*)(\w+)(\s*:)', r'\1"\2"\3'),
-        (r'(:\s*)(\w+)(\s*[,\]})])', r'\1"\2"\3'),
-        (r'(\}\s*)(\{)', r'\1, \2'),
-        (r'(\]\s*)(\[)', r'\1, \2'),
-        (r'(,\s*)([\]}])', r'\2'),
-        (r'truee|falsee|nul', lambda m: m.group(0)[0:-1]),
-        (r'(?<!\\)"(.*?)(?<!\\)"', lambda m: '"' + m.group(1).replace('"', '\\"') + '"'), 
-    ]
-
-    for pattern, replacement in patterns:
-        cleaned_json = re.sub(pattern, replacement, cleaned_json)
-        try:
-            json.loads(cleaned_json)
-        except json.JSONDecodeError:
-            continue
-        else:
-            break
+        return None, validators
+    new_validators = {
+        'url': api_url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    return response, new_validators
 
-    return cleaned_json
+def download_json(api_url, base_file_name, session=None, validators=None):
+    with host_limit(api_url), metrics.timer('download'):
+        response, new_validators = request_json(api_url, base_file_name, session, validators)
+    if response is None:
+        return None, new_validators
+    metrics.count('downloader.bytes_fetched', len(response.content))
+    return response.text, new_validators
+
+def iter_text(response, chunk_size=STREAM_CHUNK_SIZE):
+    """Decode a streamed response body chunk by chunk, with the encoding response.text would use."""
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size):
+        metrics.count('downloader.bytes_fetched', len(chunk))
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+@metrics.timed('clean')
+def clean_json(json_text):
+    try:
+        return json.loads(json_text)
+    except json.JSONDecodeError:
+        metrics.count('downloader.repaired')
+        return repair_json(json_text)
 
 def create_hash(data):
     return hashlib.sha256(data.encode()).hexdigest()
 
-def save_hash(data, file_name):
-    sha256_hash = create_hash(data)
-    hash_file_path = os.path.join(HASH_PATH, 'downloader.txt')
-    
-    existing_hashes = load_hashes()
+def fetch_payload(api_url, file_name, session=None, validators=None):
+    """((json_data, digest, has_content) or None, validators) for one endpoint, read whole."""
+    json_text, new_validators = download_json(api_url, file_name, session, validators)
+    if json_text is None:
+        return None, new_validators
+    cleaned_json = strip_control_characters(json_text)
+    del json_text
+    json_data = clean_json(cleaned_json)
+    return (json_data, create_hash(cleaned_json), not is_empty(json_data)), new_validators
 
-    if file_name not in existing_hashes or existing_hashes[file_name] != sha256_hash:
-        with open(hash_file_path, 'a') as hash_file:
-            hash_file.write(f"{file_name}='{sha256_hash}'\n")
+def stream_payload(api_url, file_name, session=None, validators=None):
+    """fetch_payload with the body parsed as it arrives into a LeafSpill instead of read whole."""
+    with host_limit(api_url), metrics.timer('stream'):
+        response, new_validators = request_json(api_url, file_name, session, validators, stream=True)
+        if response is None:
+            return None, new_validators
+        with response:
+            return spill_leaves(iter_text(response)), new_validators
+
+def save_hash(data, file_name, sha256_hash=None):
+    sha256_hash = sha256_hash or create_hash(data)
+    store = get_store()
+    if store.latest(DOWNLOADER, file_name) != sha256_hash:
+        store.add(DOWNLOADER, file_name, sha256_hash)
 
 def load_hashes():
-    hashes = {}
-    hash_file_path = os.path.join(HASH_PATH, 'downloader.txt')
-    if os.path.exists(hash_file_path):
-        with open(hash_file_path) as hash_file:
-            for line in hash_file:
-                name, hash_value = line.split('=')
-                hashes[name.strip()] = hash_value.strip().strip("'")
-    return hashes
+    return get_store().latest_all(DOWNLOADER)
 
-def main():
+def load_validators():
+    validators_file_path = os.path.join(HASH_PATH, 'validators.json')
+    if os.path.exists(validators_file_path):
+        with open(validators_file_path) as validators_file:
+            return json.load(validators_file)
+    return {}
+
+def save_validators(validators):
+    validators_file_path = os.path.join(HASH_PATH, 'validators.json')
+    temp_path = validators_file_path + '.tmp'
+    with open(temp_path, 'w') as validators_file:
+        json.dump(validators, validators_file, indent=4)
+    os.replace(temp_path, validators_file_path)
+
+def _iter_changed(urls, fetch):
     existing_hashes = load_hashes()
+    validators = load_validators()
+
+    with create_session() as session, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(fetch, api_url, file_name, session, validators.get(file_name)): (api_url, file_name)
+            for api_url, file_name in urls
+        }
+        for future in as_completed(futures):
+            api_url, file_name = futures[future]
+            payload = None
+            try:
+                payload, file_validators = future.result()
+                if payload is None:
+                    continue
+                data, new_hash, has_content = payload
+                if has_content and (file_name not in existing_hashes or existing_hashes[file_name] != new_hash):
+                    metrics.count('downloader.updated')
+                    yield file_name, data, new_hash
+                    save_hash(None, file_name, new_hash)
+                    existing_hashes[file_name] = new_hash
+                else:
+                    metrics.count('downloader.unchanged')
+                # Saved as each payload is handled, so a consumer that fails on a later one keeps these.
+                validators[file_name] = file_validators
+                save_validators(validators)
+            except Exception as e:
+                metrics.count('downloader.failed')
+                logging.error(f"Error processing {api_url}: {e}")
+            finally:
+                if payload is not None and hasattr(payload[0], 'close'):
+                    payload[0].close()
+
+def iter_updates(urls=URLS, with_digest=False):
+    """Download every endpoint and yield (file_name, json_data) for each non-empty payload whose hash changed.
+
+    With with_digest=True the payload's new hash is yielded as a third item. The hash and
+    validators for a payload are recorded once the consumer asks for the next one.
+    """
+    for file_name, json_data, new_hash in _iter_changed(urls, fetch_payload):
+        yield (file_name, json_data, new_hash) if with_digest else (file_name, json_data)
+
+def iter_stream_updates(urls=URLS):
+    """iter_updates(urls, with_digest=True) for large payloads, yielding (file_name, leaf_spill, digest).
+
+    Each body is decoded, hashed and parsed chunk by chunk as it arrives, and its leaves go to a
+    LeafSpill on disk, so neither the text nor the parsed payload is held whole. The spill is
+    closed once the consumer asks for the next payload.
+    """
+    return _iter_changed(urls, stream_payload)
+
+def save_stream(file_name, leaf_spill, digest):
+    """Write a streamed payload's new _Truncated chunks and series observations; save_data writes _Data.txt instead."""
+    from .seriesstore import get_series_store
+    from .truncation import process_items
+
+    get_series_store().append_observations(file_name, leaf_spill.observations, digest)
+    process_items(file_name.replace('_Data.txt', ''), leaf_spill.items())
+    logging.info(f"Chunked {leaf_spill.count} values of {file_name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the API payloads that changed since the last run.")
+    parser.add_argument('--stream', action='store_true',
+                        help="parse payloads as they arrive and write their _Truncated chunks and series directly instead of _Data.txt files")
+    args = parser.parse_args()
+    configure_logging(os.path.join(LOG_PATH, 'downloader.log'), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     new_data_processed = False
-    urls = [
-        ("https://markets.newyorkfed.org/api/ambs/all/announcements/summary/latest.json", "AMBS_Announcements_Data.txt"),
-        ("https://markets.newyorkfed.org/api/ambs/all/results/summary/latest.json", "AMBS_Results_Data.txt"),
-        ("https://markets.newyorkfed.org/api/fxs/all/latest.json", "FX_Swaps_Announcements_Data.txt"),
-        ("https://markets.newyorkfed.org/api/ambs/all/results/summary/latest.json", "FX_Swaps_Results_Data.txt"),
-        ("https://markets.newyorkfed.org/api/marketshare/qtrly/latest.json", "Market_Share_Quarterly_Data.txt"),
-        ("https://markets.newyorkfed.org/api/marketshare/ytd/latest.json", "Market_Share_Yearly_Data.txt"),
-        ("https://markets.newyorkfed.org/api/rates/all/latest.json", "Rates_Data.txt"),
-        ("https://markets.newyorkfed.org/api/rp/all/all/results/latest.json", "Repo_Results_Data.txt"),
-        ("https://markets.newyorkfed.org/api/rp/all/all/announcements/latest.json", "Repo_Announcements_Data.txt"),
-        ("https://markets.newyorkfed.org/api/seclending/all/results/summary/latest.json", "Securities_Lending_Data.txt"),
-        ("https://markets.newyorkfed.org/api/tsy/all/announcements/summary/latest.json", "Treasury_Securities_Announcements_Data.txt"),
-        ("https://markets.newyorkfed.org/api/tsy/all/results/summary/latest.json", "Treasury_Securities_Results_Data.txt"),
-        ("https://markets.newyorkfed.org/api/tsy/all/operations/summary/latest.json", "Treasury_Securities_Operations_Data.txt"),
-        ("https://www.federalregister.gov/api/v1/public-inspection-documents/current.json", "Public_Inspection_Data.txt"),
-        ("https://api.stlouisfed.org/fred/releases?api_key=6f19389f3e13501941e023c61848ab90&file_type=json", "FRED_Data.txt"),
-    ]
-
-    for api_url, file_name in urls:
-        try:
-            json_text = download_json(api_url, file_name)
-            cleaned_json = clean_json(json_text)
-            json_data = json.loads(cleaned_json)
-            new_hash = create_hash(cleaned_json)
-            if not is_empty(json_data) and (file_name not in existing_hashes or existing_hashes[file_name] != new_hash):
+    with metrics.run('downloader'):
+        if args.stream:
+            for file_name, leaf_spill, digest in iter_stream_updates():
+                save_stream(file_name, leaf_spill, digest)
+                new_data_processed = True
+        else:
+            for file_name, json_data in iter_updates():
                 save_data(json_data, file_name)
-                save_hash(cleaned_json, file_name)
-                existing_hashes[file_name] = new_hash
                 new_data_processed = True
-        except Exception as e:
-            logging.error(f"Error processing {api_url}: {e}")
 
     if not new_data_processed:
         logging.info("No new data to process.")
@@ -0,0 +1,95 @@
+import datetime
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# Same character set as the original URL regex, folded into one class ('%' already falls in '$-_').
+URL_PATTERN = r'http[s]?://[a-zA-Z0-9$-_@.&+!*\\(),]+'
+
+# m-d-Y and Y-m-d share one numeric alternative and are told apart by which side has four digits.
+DATE_PATTERN = (
+    r'\b(?:(\d{1,4})[-/](\d{1,2})[-/](\d{1,4})'
+    r'|([A-Za-z]+) (\d{1,2}), (\d{4})'
+    r'|(\d{1,2}) ([A-Za-z]+), (\d{4}))\b'
+)
+
+URL_RE = re.compile(URL_PATTERN)
+DATE_RE = re.compile(DATE_PATTERN)
+SCAN_RE = re.compile(f'({URL_PATTERN})|{DATE_PATTERN}')
+
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December')
+MONTHS = {name.lower(): number for number, name in enumerate(MONTH_NAMES, 1)}
+
+@lru_cache(maxsize=4096)
+def format_date(year, month, day):
+    """Return the date as "February 27, 2024", or None if it is not a real calendar date."""
+    try:
+        datetime.date(year, month, day)
+    except ValueError:
+        return None
+    return f"{MONTH_NAMES[month - 1]} {day:02d}, {year}"
+
+def _month(name):
+    return MONTHS.get(name.lower(), 0)
+
+def _date_candidate(first, second, third, month_name, month_day, month_year, day, day_month_name, day_year):
+    # Priorities follow the order append.extract_date used to try its patterns: m-d-Y, Y-m-d, "B d, Y", "d B, Y".
+    if first is not None:
+        if len(third) == 4 and len(first) <= 2:
+            return 0, format_date(int(third), int(first), int(second))
+        if len(first) == 4 and len(third) <= 2:
+            return 1, format_date(int(first), int(second), int(third))
+        return 0, None
+    if month_name is not None:
+        return 2, format_date(int(month_year), _month(month_name), int(month_day))
+    return 3, format_date(int(day_year), _month(day_month_name), int(day))
+
+def scan(content):
+    """Find the first URL and every valid date in one pass.
+
+    Dates come back as (priority, date) pairs in text order, where priority follows the
+    order of the date patterns. Dates inside a URL are still picked up.
+    """
+    url = None
+    dates = []
+    for match in SCAN_RE.finditer(content):
+        groups = match.groups()
+        if groups[0] is not None:
+            if url is None:
+                url = groups[0]
+            for date_match in DATE_RE.finditer(groups[0]):
+                priority, date = _date_candidate(*date_match.groups())
+                if date:
+                    dates.append((priority, date))
+            continue
+        priority, date = _date_candidate(*groups[1:])
+        if date:
+            dates.append((priority, date))
+    return url, dates
+
+def best_date(dates):
+    return min(dates, key=lambda candidate: candidate[0])[1] if dates else None
+
+def extract(content):
+    url, dates = scan(content)
+    return url, best_date(dates)
+
+def extract_url(content):
+    match = URL_RE.search(content)
+    return match.group(0) if match else None
+
+def extract_date(content):
+    return extract(content)[1]
+
+def extract_file(file_path):
+    with open(file_path, 'r') as f:
+        return extract(f.read())
+
+def extract_files(file_paths, workers=None):
+    """Extract (url, date) for each file, in order; workers > 1 spreads the files over a process pool."""
+    file_paths = list(file_paths)
+    if workers and workers > 1 and len(file_paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(extract_file, file_paths, chunksize=max(1, len(file_paths) // (workers * 4))))
+    return [extract_file(file_path) for file_path in file_paths]
@@ -0,0 +1,177 @@
+import json
+import os
+import random
+import sys
+import zlib
+from .downloader import URLS, create_session, download_json
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+FIXTURES_PATH = os.path.join(LOCAL_PATH, 'analysis', 'benchmarks', 'fixtures')
+
+WORDS = ('federal', 'reserve', 'operation', 'treasury', 'securities', 'agency', 'mortgage', 'backed', 'repo',
+         'reverse', 'auction', 'results', 'announcement', 'schedule', 'market', 'liquidity', 'rate', 'funding',
+         'notice', 'rule', 'proposed', 'comment', 'period', 'department', 'commission', 'release', 'economic',
+         'data', 'quarterly', 'survey', 'committee', 'meeting', 'public', 'inspection', 'document', 'filing')
+
+def _sentence(rng, words=14):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+def _date(rng, fmt='iso'):
+    month, day = rng.randint(1, 12), rng.randint(1, 28)
+    if fmt == 'us':
+        return f'{month:02d}/{day:02d}/2024'
+    return f'2024-{month:02d}-{day:02d}'
+
+def _ambs(rng, count):
+    return {'ambs': {'auctions': [{
+        'operationId': f'AMBS {i:06d}', 'auctionStatus': 'Results', 'operationDate': _date(rng),
+        'settlementDate': _date(rng), 'operationType': 'Sale', 'operationDirection': 'S', 'method': 'Multiple Price',
+        'releaseTime': '11:30', 'closeTime': '11:50', 'classType': 'Coupon Swap', 'note': _sentence(rng),
+        'totalSubmitted': rng.randint(10**6, 10**9), 'totalAccepted': rng.randint(10**6, 10**9),
+        'details': [{'securityDescription': f'UMBS 30yr {rng.choice((2, 3, 4, 5))}.0', 'amtSubmitted': rng.randint(10**6, 10**8),
+                     'amtAccepted': rng.randint(10**6, 10**8)} for _ in range(3)],
+    } for i in range(count)]}}
+
+def _fx_swaps(rng, count):
+    return {'fxSwaps': {'operations': [{
+        'operationType': 'Central Bank Liquidity Swap', 'counterparty': rng.choice(('European Central Bank', 'Bank of Japan', 'Swiss National Bank')),
+        'currency': rng.choice(('EUR', 'JPY', 'CHF')), 'tradeDate': _date(rng), 'settlementDate': _date(rng),
+        'maturityDate': _date(rng), 'termInDays': rng.choice((7, 84)), 'amount': round(rng.uniform(1, 500), 3),
+        'interestRate': round(rng.uniform(4, 6), 2), 'isSmallValue': rng.random() < 0.5, 'lastUpdated': _date(rng),
+    } for _ in range(count)]}}
+
+def _market_share(rng, count):
+    return {'pd': {'marketshare': {'releaseDate': _date(rng), 'title': _sentence(rng, 8), 'interDealerBrokers': [{
+        'securityType': rng.choice(('Treasury', 'Agency', 'MBS', 'Corporate')), 'security': _sentence(rng, 4),
+        'percentFirstQuintRange': f'{rng.randint(1, 20)}-{rng.randint(21, 40)}', 'percentSecondQuintRange': f'{rng.randint(1, 20)}-{rng.randint(21, 40)}',
+        'dailyAvgVolInMillions': round(rng.uniform(1, 10**5), 1),
+    } for _ in range(count)]}}}
+
+def _rates(rng, count):
+    return {'refRates': [{
+        'effectiveDate': _date(rng), 'type': rng.choice(('EFFR', 'OBFR', 'SOFR', 'BGCR', 'TGCR')),
+        'percentRate': round(rng.uniform(4, 6), 2), 'percentPercentile1': round(rng.uniform(4, 6), 2),
+        'percentPercentile25': round(rng.uniform(4, 6), 2), 'percentPercentile75': round(rng.uniform(4, 6), 2),
+        'percentPercentile99': round(rng.uniform(4, 6), 2), 'volumeInBillions': rng.randint(50, 2000),
+        'revisionIndicator': '', 'footnoteId': None,
+    } for _ in range(count)]}
+
+def _repo(rng, count):
+    return {'repo': {'operations': [{
+        'operationId': f'RP {i:06d}', 'operationDate': _date(rng), 'operationType': rng.choice(('Repo', 'Reverse Repo')),
+        'note': _sentence(rng), 'totalAmtSubmitted': rng.randint(0, 10**11), 'totalAmtAccepted': rng.randint(0, 10**11),
+        'details': [{'securityType': rng.choice(('Treasury', 'Agency', 'Mortgage-Backed')), 'amtSubmitted': rng.randint(0, 10**10),
+                     'amtAccepted': rng.randint(0, 10**10), 'minimumBidRate': round(rng.uniform(4, 6), 2)} for _ in range(3)],
+    } for i in range(count)]}}
+
+def _seclending(rng, count):
+    return {'seclending': {'operations': [{
+        'operationId': f'SL {i:06d}', 'operationDate': _date(rng), 'settlementDate': _date(rng), 'maturityDate': _date(rng),
+        'releaseTime': '12:00', 'closeTime': '12:15', 'note': _sentence(rng),
+        'totalParAmtSubmitted': rng.randint(0, 10**10), 'totalParAmtAccepted': rng.randint(0, 10**10),
+    } for i in range(count)]}}
+
+def _treasury(rng, count):
+    return {'treasury': {'auctions': [{
+        'operationId': f'TSY {i:06d}', 'operationDate': _date(rng, 'us'), 'operationType': 'Outright Coupon Purchase',
+        'operationDirection': rng.choice(('P', 'S')), 'method': 'Multiple Price', 'releaseTime': '10:10', 'closeTime': '10:30',
+        'auctionStatus': 'Results', 'note': _sentence(rng), 'maturityRangeStart': _date(rng), 'maturityRangeEnd': _date(rng),
+        'totalParAmtSubmitted': rng.randint(0, 10**10), 'totalParAmtAccepted': rng.randint(0, 10**10),
+    } for i in range(count)]}}
+
+def _public_inspection(rng, count):
+    return {'count': count, 'results': [{
+        'filing_type': rng.choice(('regular', 'special')),
+        'agencies': [{'name': f'{rng.choice(WORDS).title()} Department', 'id': rng.randint(1, 600), 'slug': rng.choice(WORDS)}],
+        'document_number': f'2024-{i:05d}', 'title': _sentence(rng, 12),
+        'html_url': f'https://www.federalregister.gov/documents/2024/02/{rng.randint(1, 28):02d}/2024-{i:05d}',
+        'pdf_url': f'https://public-inspection.federalregister.gov/2024-{i:05d}.pdf',
+        'filed_at': f'February {rng.randint(1, 28)}, 2024 8:45 AM', 'publication_date': _date(rng),
+        'toc_subject': _sentence(rng, 6), 'toc_doc': _sentence(rng, 10), 'type': rng.choice(('Notice', 'Rule', 'Proposed Rule')),
+        'num_pages': rng.randint(1, 80),
+    } for i in range(count)]}
+
+def _fred(rng, count):
+    return {'realtime_start': '2024-02-27', 'realtime_end': '2024-02-27', 'order_by': 'release_id', 'sort_order': 'asc',
+            'count': count, 'offset': 0, 'limit': 1000, 'releases': [{
+                'id': i, 'realtime_start': '2024-02-27', 'realtime_end': '2024-02-27', 'name': _sentence(rng, 5),
+                'press_release': rng.random() < 0.5, 'link': f'http://www.example.org/releases/{i}',
+                **({'notes': _sentence(rng, 30)} if rng.random() < 0.6 else {}),
+            } for i in range(count)]}
+
+# Record counts at scale 1 are roughly what each endpoint returns on a normal day.
+SYNTHETIC = {
+    'AMBS_Announcements_Data.txt': (_ambs, 10),
+    'AMBS_Results_Data.txt': (_ambs, 10),
+    'FX_Swaps_Announcements_Data.txt': (_fx_swaps, 20),
+    'FX_Swaps_Results_Data.txt': (_fx_swaps, 20),
+    'Market_Share_Quarterly_Data.txt': (_market_share, 30),
+    'Market_Share_Yearly_Data.txt': (_market_share, 30),
+    'Rates_Data.txt': (_rates, 5),
+    'Repo_Results_Data.txt': (_repo, 10),
+    'Repo_Announcements_Data.txt': (_repo, 10),
+    'Securities_Lending_Data.txt': (_seclending, 10),
+    'Treasury_Securities_Announcements_Data.txt': (_treasury, 10),
+    'Treasury_Securities_Results_Data.txt': (_treasury, 10),
+    'Treasury_Securities_Operations_Data.txt': (_treasury, 10),
+    'Public_Inspection_Data.txt': (_public_inspection, 200),
+    'FRED_Data.txt': (_fred, 300),
+}
+
+def _longest_list(data):
+    best = data if isinstance(data, list) else None
+    children = data.values() if isinstance(data, dict) else data if isinstance(data, list) else ()
+    for child in children:
+        candidate = _longest_list(child)
+        if candidate is not None and (best is None or len(candidate) > len(best)):
+            best = candidate
+    return best
+
+def scale_payload(data, scale):
+    """Repeat the largest record list in data scale times, in place."""
+    records = _longest_list(data)
+    if records and scale > 1:
+        records[:] = records * scale
+    return data
+
+def endpoint_data(file_name, scale=1, directory=FIXTURES_PATH):
+    """The recorded fixture for an endpoint if there is one, otherwise a deterministic synthetic payload."""
+    path = os.path.join(directory, file_name)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return scale_payload(json.load(f), scale)
+    builder, count = SYNTHETIC[file_name]
+    return builder(random.Random(zlib.crc32(file_name.encode())), count * scale)
+
+def synthetic_endpoints(file_names, directory=FIXTURES_PATH):
+    """The file names among file_names that have no recorded fixture, so endpoint_data generates them."""
+    return [file_name for file_name in file_names if not os.path.exists(os.path.join(directory, file_name))]
+
+def endpoint_payloads(scale=1, urls=URLS, directory=FIXTURES_PATH):
+    """[(file_name, json_text)] for every endpoint, formatted like the raw API responses."""
+    return [(file_name, json.dumps(endpoint_data(file_name, scale, directory), indent=4)) for _, file_name in urls]
+
+def record_fixtures(urls=URLS, directory=FIXTURES_PATH):
+    """Save each endpoint's current response as a fixture; needs network access."""
+    os.makedirs(directory, exist_ok=True)
+    recorded = []
+    with create_session() as session:
+        for api_url, file_name in urls:
+            text, _ = download_json(api_url, file_name, session)
+            if text is None:
+                continue
+            with open(os.path.join(directory, file_name), 'w') as f:
+                f.write(text)
+            recorded.append(file_name)
+    return recorded
+
+def main():
+    if sys.argv[1:] == ['record']:
+        recorded = record_fixtures()
+        print(f"Recorded {len(recorded)} of {len(URLS)} fixtures in {FIXTURES_PATH}")
+    else:
+        print("Usage: python -m analysis fixtures record")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+HASH_PATH = os.path.join(LOCAL_PATH, 'analysis', 'hashes')
+HASH_DB_PATH = os.path.join(HASH_PATH, 'hashes.db')
+
+DOWNLOADER = 'downloader'
+TRUNCATION = 'truncation'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    UNIQUE (namespace, name, digest)
+);
+CREATE INDEX IF NOT EXISTS hashes_digest ON hashes (namespace, digest);
+CREATE INDEX IF NOT EXISTS hashes_name ON hashes (namespace, name, id);
+"""
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+class HashStore:
+    """Digests keyed by namespace and name, e.g. ('truncation', 'FRED_12_Truncated')."""
+
+    def __init__(self, path=HASH_DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        is_new = not os.path.exists(path)
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        if is_new:
+            import_legacy_hashes(self, os.path.dirname(path))
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute('BEGIN IMMEDIATE')
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute('ROLLBACK')
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute('COMMIT')
+
+    def contains(self, namespace, digest):
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM hashes WHERE namespace = ? AND digest = ? LIMIT 1', (namespace, digest)).fetchone()
+        return row is not None
+
+    def latest(self, namespace, name):
+        with self._lock:
+            row = self._conn.execute('SELECT digest FROM hashes WHERE namespace = ? AND name = ? ORDER BY id DESC LIMIT 1', (namespace, name)).fetchone()
+        return row[0] if row else None
+
+    def latest_all(self, namespace):
+        with self._lock:
+            rows = self._conn.execute('SELECT name, digest FROM hashes WHERE id IN (SELECT MAX(id) FROM hashes WHERE namespace = ? GROUP BY name)', (namespace,)).fetchall()
+        return dict(rows)
+
+    def add(self, namespace, name, digest):
+        self.add_many(namespace, [(name, digest)])
+
+    def add_many(self, namespace, entries):
+        now = time.time()
+        with self.transaction():
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO hashes (namespace, name, digest, seen_at) VALUES (?, ?, ?, ?)',
+                ((namespace, name, digest, now) for name, digest in entries),
+            )
+
+    def prune(self, namespace, max_age_days):
+        # The latest digest for each name is always kept so change detection survives pruning.
+        cutoff = time.time() - max_age_days * 86400
+        with self.transaction():
+            cursor = self._conn.execute(
+                'DELETE FROM hashes WHERE namespace = ? AND seen_at < ? AND id NOT IN (SELECT MAX(id) FROM hashes WHERE namespace = ? GROUP BY name)',
+                (namespace, cutoff, namespace),
+            )
+        return cursor.rowcount
+
+    def compact(self):
+        with self._lock:
+            self._conn.execute('VACUUM')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def get_store(path=HASH_DB_PATH):
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = HashStore(path)
+        return _stores[path]
+
+def import_legacy_hashes(store, hash_path=HASH_PATH):
+    downloader_path = os.path.join(hash_path, 'downloader.txt')
+    if os.path.exists(downloader_path):
+        with open(downloader_path) as hash_file:
+            entries = []
+            for line in hash_file:
+                if '=' in line:
+                    name, hash_value = line.split('=', 1)
+                    entries.append((name.strip(), hash_value.strip().strip("'")))
+        store.add_many(DOWNLOADER, entries)
+
+    truncation_path = os.path.join(hash_path, 'truncation.txt')
+    if os.path.exists(truncation_path):
+        with open(truncation_path) as hash_file:
+            # The old file kept bare digests, so the chunk name is unknown.
+            store.add_many(TRUNCATION, (('', line.strip()) for line in hash_file if line.strip()))
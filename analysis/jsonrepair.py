@@ -0,0 +1,242 @@
+import json
+import re
+from json.decoder import scanstring
+from json.scanner import NUMBER_RE
+
+# Separators are skipped, which absorbs missing commas in lists and trailing commas; _check_separators
+# rejects the runs that would drop data.
+_TOKEN_RE = re.compile(r'''([\s:,]*)(?:([{\[])|([}\]])|"((?:[^"\\]|\\.)*)"(?=\s*(?:[,:}\]]|$))|(["'])|([^\s{}\[\]:,"']+))''')
+_AFTER_STRING_RE = re.compile(r'\s*(?:[,:}\]]|$)')
+
+BARE_VALUES = {
+    'true': True,
+    'truee': True,
+    'false': False,
+    'falsee': False,
+    'null': None,
+    'nul': None,
+    '*': None,
+    'NaN': float('nan'),
+    'Infinity': float('inf'),
+    '-Infinity': float('-inf'),
+}
+
+_MISSING = object()
+
+def _read_string(text, pos, quote):
+    # A quote only closes the string when a separator follows it; otherwise it is
+    # an unescaped quote inside the value and becomes part of the text.
+    if quote == "'":
+        end = text.find("'", pos)
+        if end == -1:
+            raise json.JSONDecodeError("Unterminated string", text, pos - 1)
+        return text[pos:end], end + 1
+
+    parts = []
+    while True:
+        value, end = scanstring(text, pos, False)
+        parts.append(value)
+        if _AFTER_STRING_RE.match(text, end):
+            break
+        parts.append('"')
+        pos = end
+    return ''.join(parts), end
+
+def _bare_value(word):
+    if word in BARE_VALUES:
+        return BARE_VALUES[word]
+    match = NUMBER_RE.fullmatch(word)
+    if match:
+        integer, frac, exp = match.groups()
+        if frac or exp:
+            return float(word)
+        return int(integer)
+    return word
+
+def _check_separators(separators, frame, has_entries, closing, text, pos):
+    """Raise where skipping separators would drop data: a colon outside a dict entry, or a dict
+    entry following the previous one without a comma."""
+    expecting_key = frame is not None and frame[2] and frame[1] is _MISSING
+    if ':' in separators and (frame is None or not frame[2] or expecting_key):
+        raise json.JSONDecodeError("Unexpected ':'", text, pos)
+    if expecting_key and has_entries and closing is None and ',' not in separators:
+        raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+
+def strip_control_characters(text):
+    return text.replace('\n', '').replace('\r', '').replace('\t', '')
+
+def repair_json(text):
+    text = strip_control_characters(text)
+    match_token = _TOKEN_RE.match
+    stack = []
+    frame = None
+    root = _MISSING
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        match = match_token(text, pos)
+        if match is None:
+            break
+        start = match.start(match.lastindex)
+        pos = match.end()
+        separators, opening, closing, string, quote, word = match.groups()
+        if separators or (frame is not None and frame[2]):
+            _check_separators(separators, frame, frame is not None and frame[2] and bool(frame[0]), closing, text, start)
+
+        if opening is not None:
+            if frame is not None and frame[2] and frame[1] is _MISSING:
+                raise json.JSONDecodeError("Expecting property name", text, start)
+            frame = [{}, _MISSING, True] if opening == '{' else [[], None, False]
+            stack.append(frame)
+            continue
+        if closing is not None:
+            if frame is None or (closing == '}') != frame[2]:
+                raise json.JSONDecodeError(f"Unexpected '{closing}'", text, start)
+            if frame[2] and frame[1] is not _MISSING:
+                raise json.JSONDecodeError("Expecting value", text, start)
+            value = stack.pop()[0]
+            parent = stack[-1] if stack else None
+        else:
+            if string is not None:
+                value = scanstring(text, start, False)[0] if '\\' in string else string
+            elif quote is not None:
+                value, pos = _read_string(text, pos, quote)
+            else:
+                value = word
+            if frame is not None and frame[2] and frame[1] is _MISSING:
+                frame[1] = value
+                continue
+            if word is not None:
+                value = _bare_value(word)
+            parent = frame
+
+        if parent is None:
+            if root is not _MISSING:
+                raise json.JSONDecodeError("Extra data", text, start)
+            root = value
+        elif parent[2]:
+            parent[0][parent[1]] = value
+            parent[1] = _MISSING
+        else:
+            parent[0].append(value)
+        frame = parent
+
+    if stack or root is _MISSING:
+        raise json.JSONDecodeError("Unexpected end of data", text, length)
+    return root
+
+def _read_more(chunks, remainder):
+    """(text, safe, final): remainder plus at least as much new text again, so a long token is
+    re-read a logarithmic number of times, and the end of its last non-whitespace character.
+    A token ending at or after safe may continue in the next chunk.
+    """
+    parts = [remainder]
+    size = 0
+    final = True
+    for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= len(remainder):
+            final = False
+            break
+    text = ''.join(parts)
+    safe = len(text)
+    while safe and text[safe - 1].isspace():
+        safe -= 1
+    return text, safe, final
+
+def iter_leaves(chunks):
+    """Yield (path, value) for every scalar in JSON text that arrives in chunks, in document order.
+
+    path holds the dict keys and list indexes leading to the value, so '_'.join(map(str, path))
+    is its flatten_json key. The text is read with repair_json's rules (which agree with
+    json.loads on valid JSON) and should already have had strip_control_characters applied.
+    Only the current token and the open containers' paths are held in memory.
+    """
+    chunks = iter(chunks)
+    match_token = _TOKEN_RE.match
+    stack = []
+    frame = None
+    done = False
+    text, safe, pos, final = '', 0, 0, False
+
+    while True:
+        match = match_token(text, pos)
+        if not final and (match is None or match.end() >= safe):
+            text, safe, final = _read_more(chunks, text[pos:])
+            pos = 0
+            continue
+        if match is None:
+            break
+        start = match.start(match.lastindex)
+        separators, opening, closing, string, quote, word = match.groups()
+
+        if quote is not None:
+            try:
+                value, end = _read_string(text, match.end(), quote)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                end = len(text)
+            if not final and end >= safe:
+                text, safe, final = _read_more(chunks, text[pos:])
+                pos = 0
+                continue
+            pos = end
+        else:
+            pos = match.end()
+        if separators or (frame is not None and frame[2]):
+            _check_separators(separators, frame, frame is not None and frame[2] and frame[3], closing, text, start)
+
+        if opening is not None:
+            if done:
+                raise json.JSONDecodeError("Extra data", text, start)
+            if frame is None:
+                path = ()
+            elif frame[2]:
+                if frame[1] is _MISSING:
+                    raise json.JSONDecodeError("Expecting property name", text, start)
+                path = frame[0] + (frame[1],)
+                frame[1] = _MISSING
+                frame[3] = True
+            else:
+                path = frame[0] + (frame[1],)
+                frame[1] += 1
+            frame = [path, _MISSING, True, False] if opening == '{' else [path, 0, False]
+            stack.append(frame)
+            continue
+        if closing is not None:
+            if frame is None or (closing == '}') != frame[2]:
+                raise json.JSONDecodeError(f"Unexpected '{closing}'", text, start)
+            if frame[2] and frame[1] is not _MISSING:
+                raise json.JSONDecodeError("Expecting value", text, start)
+            stack.pop()
+            frame = stack[-1] if stack else None
+            done = frame is None
+            continue
+
+        if string is not None:
+            value = scanstring(text, start, False)[0] if '\\' in string else string
+        elif quote is None:
+            value = word
+        if frame is not None and frame[2] and frame[1] is _MISSING:
+            frame[1] = value
+            continue
+        if word is not None:
+            value = _bare_value(word)
+        if frame is None:
+            if done:
+                raise json.JSONDecodeError("Extra data", text, start)
+            done = True
+            yield (), value
+        elif frame[2]:
+            yield frame[0] + (frame[1],), value
+            frame[1] = _MISSING
+            frame[3] = True
+        else:
+            yield frame[0] + (frame[1],), value
+            frame[1] += 1
+
+    if stack or not done:
+        raise json.JSONDecodeError("Unexpected end of data", text, len(text))
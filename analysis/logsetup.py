@@ -0,0 +1,9 @@
+import logging
+import os
+
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+def configure_logging(path, level=logging.INFO, format=FORMAT, filemode='a'):
+    """Send this process's log records to path; scripts call it from main() so importing them has no side effects."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    logging.basicConfig(filename=path, level=level, format=format, filemode=filemode)
@@ -0,0 +1,134 @@
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+METRICS_PATH = os.path.join(LOCAL_PATH, 'analysis', 'logs', 'metrics')
+
+# Comma-separated hooks to turn on for a run: 'cpu' (cProfile) and/or 'memory' (tracemalloc).
+PROFILE = os.environ.get('ANALYSIS_PROFILE', '')
+
+class Metrics:
+    """Counters, gauges and per-stage timers for one run; safe to update from worker threads."""
+
+    def __init__(self, name='run'):
+        self.name = name
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            calls, total, longest = self.timers.get(stage, (0, 0.0, 0.0))
+            self.timers[stage] = (calls + 1, total + seconds, max(longest, seconds))
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self):
+        with self._lock:
+            return {
+                'run': self.name,
+                'started': self.started,
+                'seconds': time.time() - self.started,
+                'counters': dict(sorted(self.counters.items())),
+                'gauges': dict(sorted(self.gauges.items())),
+                'timers': {stage: {'calls': calls, 'seconds': total, 'max_seconds': longest}
+                           for stage, (calls, total, longest) in sorted(self.timers.items())},
+            }
+
+    def prometheus(self, prefix='corporate_america'):
+        summary = self.summary()
+        run = summary['run']
+        lines = [f'{prefix}_run_seconds{{run="{run}"}} {summary["seconds"]:.6f}']
+        for name, value in summary['counters'].items():
+            lines.append(f'{prefix}_{_metric_name(name)}_total{{run="{run}"}} {value}')
+        for name, value in summary['gauges'].items():
+            lines.append(f'{prefix}_{_metric_name(name)}{{run="{run}"}} {value}')
+        for stage, timer in summary['timers'].items():
+            labels = f'run="{run}",stage="{stage}"'
+            lines.append(f'{prefix}_stage_calls_total{{{labels}}} {timer["calls"]}')
+            lines.append(f'{prefix}_stage_seconds_total{{{labels}}} {timer["seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_max{{{labels}}} {timer["max_seconds"]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory=METRICS_PATH):
+        """Write <name>.json and <name>.prom (Prometheus text format) into directory."""
+        os.makedirs(directory, exist_ok=True)
+        for extension, content in (('json', json.dumps(self.summary(), indent=4)), ('prom', self.prometheus())):
+            path = os.path.join(directory, f"{self.name}.{extension}")
+            with open(f"{path}.tmp", 'w') as f:
+                f.write(content)
+            os.replace(f"{path}.tmp", path)
+
+def _metric_name(name):
+    return ''.join(c if c.isalnum() else '_' for c in name)
+
+METRICS = Metrics()
+
+def count(name, value=1):
+    METRICS.count(name, value)
+
+def gauge(name, value):
+    METRICS.gauge(name, value)
+
+def timer(stage):
+    return METRICS.timer(stage)
+
+def timed(stage):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def run(name, directory=METRICS_PATH, profile=PROFILE):
+    """Collect metrics for a whole script run, then log a one-line summary and write the run files.
+
+    profile may name the 'cpu' and/or 'memory' hooks; the cProfile stats go to <name>.prof.
+    """
+    global METRICS
+    METRICS = Metrics(name)
+    profiler = cProfile.Profile() if 'cpu' in profile else None
+    if 'memory' in profile:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield METRICS
+    finally:
+        if profiler:
+            profiler.disable()
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, f"{name}.prof"))
+        if 'memory' in profile:
+            METRICS.gauge('peak_memory_bytes', tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        summary = METRICS.summary()
+        counters = ', '.join(f"{key}={value}" for key, value in summary['counters'].items())
+        logging.info(f"{name} finished in {summary['seconds']:.2f}s; {counters or 'no counters'}")
+        METRICS.write(directory)
@@ -1,16 +1,102 @@
 import json
+from dataclasses import dataclass
 
+FIELDS = ('base_name', 'url', 'headline', 'summary', 'date', 'copyright')
+
+_UNRESOLVED = object()
+
+def split_base_name(base_name):
+    source, _, chunk = base_name.rpartition('_')
+    if source and chunk.isdigit():
+        return source, int(chunk)
+    return base_name, None
+
+@dataclass(slots=True)
 class DataObject:
-    def __init__(self, base_name, url=None, headline=None, summary=None, date=None, copyright=None):
-        self.base_name = base_name
-        self.url = url
-        self.headline = headline
-        self.summary = summary
-        self.date = date
-        self.copyright = copyright
+    base_name: str
+    url: str = None
+    headline: str = None
+    summary: str = None
+    date: str = None
+    copyright: str = None
 
     def __str__(self):
         return f"DataObject({self.base_name}, URL={self.url}, Headline={self.headline}, Summary={self.summary}, Date={self.date}, Copyright={self.copyright})"
 
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), indent=indent, separators=None if indent else (',', ':'))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in FIELDS if field in data})
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+class DataObjectBatch:
+    """DataObject fields stored column-wise, one list per field."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, data_objects=()):
+        for field in FIELDS:
+            setattr(self, field, [])
+        self.extend(data_objects)
+
+    def append(self, data_obj):
+        for field in FIELDS:
+            getattr(self, field).append(getattr(data_obj, field))
+
+    def extend(self, data_objects):
+        for data_obj in data_objects:
+            self.append(data_obj)
+
+    def __len__(self):
+        return len(self.base_name)
+
+    def __getitem__(self, index):
+        return DataObject(*(getattr(self, field)[index] for field in FIELDS))
+
+    def __iter__(self):
+        for row in zip(*(getattr(self, field) for field in FIELDS)):
+            yield DataObject(*row)
+
+    def sources(self):
+        return [split_base_name(base_name)[0] for base_name in self.base_name]
+
+    def assign_by_source(self, field, texts):
+        """Set field from texts, a {source prefix: value} map, resolving each distinct source once."""
+        column = getattr(self, field)
+        resolved = {}
+        for index, base_name in enumerate(self.base_name):
+            source, _, chunk = base_name.rpartition('_')
+            if not chunk.isdigit():
+                source = base_name
+            text = resolved.get(source, _UNRESOLVED)
+            if text is _UNRESOLVED:
+                text = texts.get(source)
+                if text is None:
+                    text = next((value for key, value in texts.items() if key in source), None)
+                resolved[source] = text
+            if text is not None:
+                column[index] = text
+
     def to_json(self):
-        return json.dumps(self.__dict__, indent=4)
\ No newline at end of file
+        return json.dumps({field: getattr(self, field) for field in FIELDS}, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text):
+        """Read the columnar layout, or the legacy one-object / list-of-objects layout."""
+        data = json.loads(text)
+        if isinstance(data, dict) and isinstance(data.get('base_name'), list):
+            batch = cls()
+            for field in FIELDS:
+                getattr(batch, field).extend(data.get(field) or [None] * len(data['base_name']))
+            return batch
+        if isinstance(data, dict):
+            data = [data]
+        return cls(DataObject.from_dict(item) for item in data)
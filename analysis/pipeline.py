@@ -0,0 +1,125 @@
+import argparse
+import logging
+import os
+from .downloader import URLS, iter_stream_updates, iter_updates, save_data
+from .streaming import LeafSpill
+from .truncation import new_chunks, new_item_chunks, write_chunk
+from .preparation import prepare_items, write_prepared
+from .extractors import extract
+from .append import save_data_objects, update_data_objects_with_copyright
+from .preprocessing import preprocess_document, save_preprocessed
+from .module import DataObject, DataObjectBatch
+from .hashstore import get_store
+from .searchindex import get_search_index
+from . import metrics
+from .logsetup import configure_logging
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+LOG_PATH = os.path.join(LOCAL_PATH, 'analysis', 'logs')
+
+def series_stage(updates, series_store):
+    """Append each changed payload's numeric observations to the series store, passing the payload on."""
+    for file_name, payload, digest in updates:
+        with metrics.timer('series'):
+            if isinstance(payload, LeafSpill):
+                appended = series_store.append_observations(file_name, payload.observations, digest)
+            else:
+                appended = series_store.append_payload(file_name, payload, digest)
+        metrics.count('pipeline.observations', appended)
+        yield file_name, payload
+
+def chunk_stage(updates, store, spill=False):
+    for file_name, payload in updates:
+        base_filename = file_name.replace('_Data.txt', '')
+        if isinstance(payload, LeafSpill):
+            chunks = new_item_chunks(base_filename, payload.items(), store)
+        else:
+            if spill:
+                save_data(payload, file_name)
+            chunks = new_chunks(base_filename, payload, store)
+        for hash_entry, file_content, chunk_items in chunks:
+            if spill:
+                write_chunk(hash_entry, file_content)
+            yield hash_entry.replace('_Truncated', ''), file_content, chunk_items
+
+def append_stage(chunks, data_objects):
+    for base_name, file_content, chunk_items in chunks:
+        with metrics.timer('extract'):
+            url, date = extract(file_content)
+        data_objects.append(DataObject(base_name=base_name, url=url, date=date))
+        yield base_name, chunk_items
+
+def prepare_stage(chunks, spill=False):
+    for base_name, chunk_items in chunks:
+        with metrics.timer('prepare'):
+            relevant_texts = prepare_items([{key: value} for key, value in chunk_items])
+        if not relevant_texts:
+            continue
+        if spill:
+            write_prepared(base_name, relevant_texts)
+        yield base_name, ''.join(text + '\n' for text in relevant_texts)
+
+def preprocess_stage(documents):
+    for base_name, text in documents:
+        with metrics.timer('preprocess'):
+            preprocessed_text = preprocess_document(text)
+        if preprocessed_text:
+            save_preprocessed(base_name, preprocessed_text)
+            yield base_name, preprocessed_text
+
+def process_payload(file_name, payload, store, spill=False):
+    """Run one payload through chunk -> extract/append -> prepare -> preprocess and save its records.
+
+    The payload's chunk digests are recorded in the same hash-store transaction as its records are
+    saved, and the downloader records the payload's hash only after this returns, so a payload
+    that fails part way is processed again on the next run instead of being skipped as seen.
+    """
+    data_objects = DataObjectBatch()
+    with store.transaction():
+        chunks = chunk_stage([(file_name, payload)], store, spill)
+        documents = prepare_stage(append_stage(chunks, data_objects), spill)
+        preprocessed = list(preprocess_stage(documents))
+        update_data_objects_with_copyright(data_objects)
+        save_data_objects(data_objects)
+        with metrics.timer('index'):
+            get_search_index().add_many(preprocessed)
+    return data_objects, preprocessed
+
+def run(urls=URLS, spill=False, stream=False):
+    """Run download -> clean -> chunk -> extract/append -> prepare -> preprocess in memory.
+
+    Each payload is parsed once and passed between stages as Python objects. With spill=True
+    the intermediate _Data/_Truncated/_Prepared files are also written in the usual layout.
+    Preprocessed documents are added to the search index, and the numeric observations of each
+    changed payload to the series store.
+
+    With stream=True payloads are parsed as they download and reach the stages as a LeafSpill,
+    so a large payload is never held whole; spill then writes no _Data.txt files.
+    """
+    # NumPy is only needed once there are payloads to store, not to import the pipeline.
+    from .seriesstore import get_series_store
+
+    store = get_store()
+    data_objects = DataObjectBatch()
+    preprocessed_count = 0
+    updates = iter_stream_updates(urls) if stream else iter_updates(urls, with_digest=True)
+    for file_name, payload in series_stage(updates, get_series_store()):
+        payload_objects, preprocessed = process_payload(file_name, payload, store, spill)
+        data_objects.extend(payload_objects)
+        preprocessed_count += len(preprocessed)
+    metrics.count('pipeline.chunks', len(data_objects))
+    metrics.count('pipeline.preprocessed', preprocessed_count)
+    logging.info(f"Pipeline finished: {len(data_objects)} new chunks, {preprocessed_count} preprocessed documents.")
+    return data_objects
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline in memory.")
+    parser.add_argument('--spill', action='store_true', help="also write the intermediate files to analysis/processing for debugging")
+    parser.add_argument('--stream', action='store_true', help="parse payloads as they download instead of reading them whole")
+    args = parser.parse_args()
+    configure_logging(os.path.join(LOG_PATH, 'pipeline.log'))
+    with metrics.run('pipeline'):
+        run(spill=args.spill, stream=args.stream)
+
+if __name__ == '__main__':
+    main()
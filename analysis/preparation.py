@@ -1,78 +1,131 @@
+import argparse
 import json
 import os
 import glob
 import re
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from . import metrics
+from .logsetup import configure_logging
 
 LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 PROCESSING_PATH = os.path.join(LOCAL_PATH, 'analysis', 'processing')
 LOG_PATH = os.path.join(LOCAL_PATH, 'analysis', 'logs')
 
-if not os.path.exists(LOG_PATH):
-    os.makedirs(LOG_PATH)
+# The original alternatives folded into one class; '%' already falls in '$-_'.
+URL_RE = re.compile(r"http[s]?://[a-zA-Z0-9$-_@.&+!*'(),]+")
+SCHEME_RE = re.compile(r'http[s]?://')
+NUMBER_RE = re.compile(r'^[\d\.\-\/]+$')
 
-logging.basicConfig(filename=os.path.join(LOG_PATH, 'preparation.log'), level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+MIN_TEXT_LENGTH = 50
+# Splitting on '.' and re-joining with '. ' adds at most one character per sentence, and a
+# sentence is at least two characters, so nothing shorter than this can exceed MIN_TEXT_LENGTH.
+MIN_CANDIDATE_LENGTH = (3 * MIN_TEXT_LENGTH + 2) // 4
 
 def remove_urls(text):
-    return re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\'(),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    return URL_RE.sub('', text) if 'http' in text else text
 
 def is_numerical(text):
-    return bool(re.match(r'^[\d\.\-\/]+$', text))
+    return NUMBER_RE.match(text) is not None
 
 def process_text(text):
-    text = remove_urls(text).strip()
-    sentences = [sentence.strip() + '.' for sentence in text.split('.') if sentence.strip() and len(sentence.strip()) > 1]
+    has_scheme = 'http' in text
+    if has_scheme:
+        text = URL_RE.sub('', text)
+    sentences = [sentence + '.' for sentence in (part.strip() for part in text.strip().split('.')) if len(sentence) > 1]
     if not sentences:
         return ''
-    if len(sentences) > 1 and re.search(r'http[s]?://', sentences[1]):
+    if has_scheme and len(sentences) > 1 and SCHEME_RE.search(sentences[1]):
         return sentences[0]
-    return sentences[0] if len(sentences) == 1 else ' '.join(sentences)
+    return ' '.join(sentences)
 
-def process_json_file(file_path):
-    logging.debug(f"Processing file: {file_path}")
-    with open(file_path, 'r') as file:
-        data = json.load(file)
-        
-    relevant_texts = []
+def relevant_text(text):
+    if len(text) < MIN_CANDIDATE_LENGTH:
+        return None
+    processed_text = process_text(text)
+    return processed_text if len(processed_text) > MIN_TEXT_LENGTH else None
+
+def prepare_items(data):
+    """Sentences longer than 50 characters, plus the numeric strings of any item that has at least three.
+
+    Each text is kept once, at its first position, and an item's numeric strings are only
+    collected the first time one of its values is too short to keep.
+    """
+    relevant_texts = {}
     for item in data:
-        textual_values = [value for value in item.values() if isinstance(value, str)]
+        textual_values = [value for value in item.values() if type(value) is str]
+        numerical_values = None
         for text in textual_values:
-            processed_text = process_text(text)
-            if len(processed_text) > 50:
-                relevant_texts.append(processed_text)
-                continue
-            
-            numerical_values = [text for text in textual_values if is_numerical(text)]
-            if len(numerical_values) >= 3:
-                relevant_texts.extend(numerical_values)
-
-    if not relevant_texts:
-        logging.debug(f"No relevant content for {file_path}. Skipping creation of a prepared file.")
-        return
+            processed_text = relevant_text(text)
+            if processed_text is not None:
+                relevant_texts[processed_text] = None
+            elif numerical_values is None:
+                numerical_values = [value for value in textual_values if NUMBER_RE.match(value)] if len(textual_values) >= 3 else []
+                if len(numerical_values) >= 3:
+                    relevant_texts.update(dict.fromkeys(numerical_values))
+    return list(relevant_texts)
 
-    base_name = os.path.basename(file_path).replace('_Truncated.txt', '_Prepared.txt')
-    output_path = os.path.join(PROCESSING_PATH, base_name)
-    
+def write_prepared(base_name, relevant_texts):
+    os.makedirs(PROCESSING_PATH, exist_ok=True)
+    output_path = os.path.join(PROCESSING_PATH, f"{base_name}_Prepared.txt")
     with open(output_path, 'w') as file:
         for text in relevant_texts:
             file.write(text + '\n')
     logging.debug(f"Saved prepared data to: {output_path}")
 
+def prepare_file(file_path):
+    """Write the _Prepared.txt file for one _Truncated.txt file; returns how many texts it kept."""
+    with open(file_path, 'r') as file:
+        data = json.load(file)
+
+    relevant_texts = prepare_items(data)
+    if relevant_texts:
+        write_prepared(os.path.basename(file_path).replace('_Truncated.txt', ''), relevant_texts)
+    return len(relevant_texts)
+
+def process_json_file(file_path):
+    logging.debug(f"Processing file: {file_path}")
+    with metrics.timer('prepare'):
+        kept = prepare_file(file_path)
+    metrics.count('preparation.files')
+    metrics.count('preparation.texts', kept)
+    if not kept:
+        metrics.count('preparation.skipped')
+        logging.debug(f"No relevant content for {file_path}. Skipping creation of a prepared file.")
+
+def process_json_files(file_paths, workers=None):
+    """Prepare many files, spread over a process pool when workers > 1; returns the kept-text count per file."""
+    file_paths = list(file_paths)
+    with metrics.timer('prepare'):
+        if workers and workers > 1 and len(file_paths) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                counts = list(executor.map(prepare_file, file_paths, chunksize=max(1, len(file_paths) // (workers * 4))))
+        else:
+            counts = [prepare_file(file_path) for file_path in file_paths]
+    metrics.count('preparation.files', len(counts))
+    metrics.count('preparation.texts', sum(counts))
+    metrics.count('preparation.skipped', counts.count(0))
+    return counts
+
 def delete_truncated_files():
     for file_path in glob.glob(os.path.join(PROCESSING_PATH, '*_Truncated.txt')):
         logging.debug(f"Deleting file: {file_path}")
         os.remove(file_path)
 
 def main():
+    parser = argparse.ArgumentParser(description="Extract the relevant text of each _Truncated.txt file.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processes to prepare files on")
+    args = parser.parse_args()
+
+    configure_logging(os.path.join(LOG_PATH, 'preparation.log'))
     logging.info(f"Starting processing of truncated files in {PROCESSING_PATH}.")
     files_found = glob.glob(os.path.join(PROCESSING_PATH, '*_Truncated.txt'))
     if not files_found:
         logging.info(f"No files found in {PROCESSING_PATH} to process.")
         return
-    for file_path in files_found:
-        process_json_file(file_path)
-    
-    delete_truncated_files()
+    with metrics.run('preparation'):
+        process_json_files(files_found, args.workers)
+        delete_truncated_files()
     logging.info("Completed processing of files.")
 
 if __name__ == "__main__":
@@ -1,26 +1,23 @@
 import re
 import os
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 import string
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from . import metrics
+from .logsetup import configure_logging
+from .searchindex import get_search_index
 
-# Download necessary NLTK data packages if not already present
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
+# nltk 3.8.2 and later load word_tokenize's model from punkt_tab; earlier releases read punkt.
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+}
 
 # Setup paths
 PROJECT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 PROCESSING_PATH = os.path.join(PROJECT_PATH, 'analysis', 'processing')
-LOG_PATH = os.path.join(PROJECT_PATH, 'analysis', 'log')
-
-# Ensure directories exist
-if not os.path.exists(PROCESSING_PATH):
-    os.makedirs(PROCESSING_PATH)
-if not os.path.exists(LOG_PATH):
-    os.makedirs(LOG_PATH)
 
 def is_valid_data(text, min_length=100):
     """Check if the text data is considered valid."""
@@ -28,15 +25,62 @@ def is_valid_data(text, min_length=100):
         return False
     return True
 
+def check_nltk_data():
+    """Fail fast if the NLTK data is missing instead of downloading it on every import."""
+    import nltk
+
+    missing = []
+    for package, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(package)
+    if missing:
+        raise LookupError(f"Missing NLTK data: {', '.join(missing)}. Install it once with: python -m nltk.downloader {' '.join(missing)}")
+
+def download_nltk_data():
+    import nltk
+
+    for package in NLTK_RESOURCES:
+        nltk.download(package, quiet=True)
+
+class Preprocessor:
+    def __init__(self, language='english', cache_size=65536):
+        # NLTK takes most of a second to import, so only processes that preprocess text pay for it.
+        from nltk.corpus import stopwords
+        from nltk.stem import WordNetLemmatizer
+        from nltk.tokenize import word_tokenize
+
+        check_nltk_data()
+        self.word_tokenize = word_tokenize
+        self.stop_words = frozenset(stopwords.words(language))
+        self.lemmatize = lru_cache(maxsize=cache_size)(WordNetLemmatizer().lemmatize)
+        self.url_pattern = re.compile(r'http[s]?://\S+')
+        self.punctuation_table = str.maketrans('', '', string.punctuation)
+
+    def preprocess(self, text):
+        text = text.lower()
+        text = self.url_pattern.sub('', text)
+        text = text.translate(self.punctuation_table)
+        stop_words = self.stop_words
+        lemmatize = self.lemmatize
+        return ' '.join([lemmatize(word) for word in self.word_tokenize(text) if word not in stop_words])
+
+_preprocessor = None
+
+def get_preprocessor():
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = Preprocessor()
+    return _preprocessor
+
 def preprocess_text(text):
-    text = text.lower()
-    text = re.sub(r'http[s]?://\S+', '', text)
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    words = word_tokenize(text)
-    filtered_words = [word for word in words if word not in stopwords.words('english')]
-    lemmatizer = WordNetLemmatizer()
-    lemmatized_words = [lemmatizer.lemmatize(word) for word in filtered_words]
-    return ' '.join(lemmatized_words)
+    return get_preprocessor().preprocess(text)
+
+def preprocess_document(text):
+    if not is_valid_data(text):
+        return None
+    return preprocess_text(text)
 
 def process_file(file_path, base_name):
     with open(file_path, 'r', encoding='utf-8') as file:
@@ -44,32 +88,52 @@ def process_file(file_path, base_name):
     
     if not is_valid_data(text):
         print(f"Skipping invalid or incomplete data in file: {file_path}")
-        return False
+        return None
     
     preprocessed_text = preprocess_text(text)
-    
+
     if len(preprocessed_text) > 0:
-        output_path = os.path.join(PROCESSING_PATH, f"{base_name}_Preprocessed.txt")
-        with open(output_path, 'w', encoding='utf-8') as file:
-            file.write(preprocessed_text)
-        print(f"Processed and saved: {output_path}")
-    return True
+        save_preprocessed(base_name, preprocessed_text)
+    return preprocessed_text
+
+def save_preprocessed(base_name, preprocessed_text):
+    os.makedirs(PROCESSING_PATH, exist_ok=True)
+    output_path = os.path.join(PROCESSING_PATH, f"{base_name}_Preprocessed.txt")
+    with open(output_path, 'w', encoding='utf-8') as file:
+        file.write(preprocessed_text)
+
+def _process_job(job):
+    return job[1], process_file(*job)
+
+def process_files(workers=None):
+    check_nltk_data()
+    os.makedirs(PROCESSING_PATH, exist_ok=True)
+    jobs = [
+        (os.path.join(PROCESSING_PATH, filename), filename.replace('_Prepared.txt', ''))
+        for filename in os.listdir(PROCESSING_PATH)
+        if filename.endswith("_Prepared.txt")
+    ]
+    results = []
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor, metrics.timer('preprocess'):
+            results = list(executor.map(_process_job, jobs, chunksize=16))
+    processed = sum(text is not None for _, text in results)
+    metrics.count('preprocessing.documents', processed)
+    metrics.count('preprocessing.skipped', len(results) - processed)
+
+    # Workers only write files; the search index is updated from this process.
+    with metrics.timer('index'):
+        get_search_index().add_many([(base_name, text) for base_name, text in results if text])
 
-def process_files():
-    for filename in os.listdir(PROCESSING_PATH):
-        if filename.endswith("_Prepared.txt"):
-            base_name = filename.replace('_Prepared.txt', '')
-            file_path = os.path.join(PROCESSING_PATH, filename)
-            process_file(file_path, base_name)
-    
     # After processing all files, delete all _Prepared.txt files
-    for filename in os.listdir(PROCESSING_PATH):
-        if filename.endswith("_Prepared.txt"):
-            os.remove(os.path.join(PROCESSING_PATH, filename))
-            print(f"Deleted original file: {filename}")
+    for file_path, _ in jobs:
+        os.remove(file_path)
+    print(f"Preprocessed {processed} of {len(jobs)} files and deleted the originals.")
 
 def main():
-    process_files()
+    configure_logging(os.path.join(PROJECT_PATH, 'analysis', 'logs', 'preprocessing.log'))
+    with metrics.run('preprocessing'):
+        process_files()
 
 if __name__ == '__main__':
     main()
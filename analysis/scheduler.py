@@ -0,0 +1,258 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from zoneinfo import ZoneInfo
+from . import metrics
+from .logsetup import configure_logging
+from .downloader import URLS
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+LOG_PATH = os.path.join(LOCAL_PATH, 'analysis', 'logs')
+STATE_PATH = os.path.join(LOG_PATH, 'scheduler.json')
+
+MINUTE, HOUR, DAY = 60, 60 * 60, 24 * 60 * 60
+
+# Public Inspection posts documents through the day; the New York Fed's operations and rates
+# change at most a few times a day and FRED's release list about daily.
+SOURCE_INTERVALS = {
+    'Public_Inspection': 15 * MINUTE,
+    'FRED': DAY,
+}
+DEFAULT_INTERVAL = HOUR
+# Sources whose payloads are large enough to parse as they download rather than read whole.
+STREAMED_SOURCES = {'Public_Inspection', 'FRED'}
+# The scan job wakes this often but only scans once per new market session.
+SCAN_INTERVAL = HOUR
+MARKET_TIMEZONE = ZoneInfo('America/New_York')
+MARKET_CLOSE = datetime.time(16, 15)
+# Hash-store rows older than this are pruned once a day; each name's latest digest is always kept,
+# so only a chunk that disappeared and came back after this long is processed again.
+HASH_RETENTION_DAYS = 180
+MAINTENANCE_INTERVAL = DAY
+
+WORKERS = 2
+# Jobs submitted but not finished; a due job waits for a free slot instead of queueing.
+MAX_PENDING = 4
+
+SKIPPED = 'skipped'
+
+# Pipeline runs share the downloader's validators file and the stage stores, so they run one at a time.
+_pipeline_lock = threading.Lock()
+
+@dataclass
+class Job:
+    name: str
+    action: object
+    interval: float
+    next_run: float = 0.0
+    last_run: float = None
+    state: dict = field(default_factory=dict)
+    running: bool = False
+
+def source_name(file_name):
+    return file_name.replace('_Data.txt', '')
+
+def pipeline_action(urls, stream=False):
+    def action(job):
+        from . import pipeline
+
+        with _pipeline_lock:
+            data_objects = pipeline.run(urls, stream=stream)
+        # iter_updates already skipped every payload whose validators or hash were unchanged.
+        return len(data_objects) if len(data_objects) else SKIPPED
+    return action
+
+def latest_session(now=None):
+    """Date of the most recent weekday market session that has closed, in New York time."""
+    now = datetime.datetime.fromtimestamp(now if now is not None else time.time(), MARKET_TIMEZONE)
+    day = now.date() if now.time() >= MARKET_CLOSE else now.date() - datetime.timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= datetime.timedelta(days=1)
+    return day.isoformat()
+
+def scan_action(csv_dir=None, **scan_options):
+    def action(job):
+        session = latest_session()
+        if job.state.get('session') == session:
+            return SKIPPED
+        from quickplay import buyalert
+        from quickplay.marketdata import CSVSource, YahooSource
+        from quickplay.universe import get_symbols
+
+        if csv_dir:
+            source = CSVSource(csv_dir)
+            symbols = source.symbols()
+        else:
+            source, symbols = YahooSource(), get_symbols()
+        found = buyalert.scan(symbols, source, **scan_options)
+        job.state['session'] = session
+        return len(found)
+    return action
+
+def maintenance_action(retention_days=HASH_RETENTION_DAYS):
+    def action(job):
+        from .hashstore import DOWNLOADER, TRUNCATION, get_store
+
+        store = get_store()
+        # Pipeline runs write the hash store, and VACUUM rewrites the whole file.
+        with _pipeline_lock:
+            pruned = sum(store.prune(namespace, retention_days) for namespace in (DOWNLOADER, TRUNCATION))
+            if not pruned:
+                return SKIPPED
+            store.compact()
+        return pruned
+    return action
+
+def default_jobs(intervals=None, scan=True, csv_dir=None, retention_days=HASH_RETENTION_DAYS):
+    """One pipeline job per downloader source, each on its own interval, the hash-store maintenance and the buyalert scan."""
+    intervals = {**SOURCE_INTERVALS, **(intervals or {})}
+    jobs = [Job(source_name(file_name), pipeline_action([(api_url, file_name)], source_name(file_name) in STREAMED_SOURCES),
+                intervals.get(source_name(file_name), DEFAULT_INTERVAL))
+            for api_url, file_name in URLS]
+    jobs.append(Job('maintenance', maintenance_action(retention_days), intervals.get('maintenance', MAINTENANCE_INTERVAL)))
+    if scan:
+        jobs.append(Job('buyalert', scan_action(csv_dir), intervals.get('buyalert', SCAN_INTERVAL)))
+    return jobs
+
+class Scheduler:
+    """Runs jobs on a shared thread pool whenever their interval has elapsed.
+
+    Dependencies are imported once by the first run of a job and reused afterwards. Between runs
+    the loop sleeps until the next job is due or a running one finishes, so an idle scheduler
+    uses no CPU. Last-run times persist in STATE_PATH, so a restart does not rerun every job.
+    """
+
+    def __init__(self, jobs, workers=WORKERS, max_pending=MAX_PENDING, state_path=STATE_PATH):
+        self.jobs = {job.name: job for job in jobs}
+        self.state_path = state_path
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, 'r') as f:
+            saved = json.load(f)
+        for name, entry in saved.items():
+            job = self.jobs.get(name)
+            if job is not None:
+                job.last_run = entry.get('last_run')
+                job.state = entry.get('state', {})
+                job.next_run = job.last_run + job.interval if job.last_run is not None else 0.0
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        saved = {name: {'last_run': job.last_run, 'state': job.state} for name, job in self.jobs.items()}
+        with open(f'{self.state_path}.tmp', 'w') as f:
+            json.dump(saved, f, indent=4)
+        os.replace(f'{self.state_path}.tmp', self.state_path)
+
+    def run_pending(self, now=None):
+        """Submit every due job that is not already running; returns False if some had to wait for a slot."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            due = sorted((job for job in self.jobs.values() if not job.running and job.next_run <= now), key=lambda job: job.next_run)
+            for job in due:
+                if not self._slots.acquire(blocking=False):
+                    metrics.count('scheduler.deferred')
+                    return False
+                job.running = True
+                self._executor.submit(self._run, job)
+        return True
+
+    def _run(self, job):
+        started = time.time()
+        try:
+            with metrics.timer(f'job.{job.name}'):
+                result = job.action(job)
+            if result == SKIPPED:
+                metrics.count('scheduler.skipped')
+                logging.debug(f"{job.name}: nothing changed upstream")
+            else:
+                metrics.count('scheduler.runs')
+                logging.info(f"{job.name}: {result} in {time.time() - started:.1f}s")
+        except Exception:
+            metrics.count('scheduler.failed')
+            logging.exception(f"{job.name} failed")
+        finally:
+            with self._lock:
+                job.running = False
+                job.last_run = started
+                job.next_run = started + job.interval
+                self._save_state()
+                metrics.METRICS.write()
+            self._slots.release()
+            self._wake.set()
+
+    def next_wake(self):
+        """Seconds until the next idle job is due, or None when every job is running."""
+        with self._lock:
+            waiting = [job.next_run for job in self.jobs.values() if not job.running]
+        return max(0.0, min(waiting) - time.time()) if waiting else None
+
+    def serve(self):
+        while not self._stopping.is_set():
+            # With every slot taken, only a finishing job (which sets _wake) can make progress.
+            timeout = self.next_wake() if self.run_pending() else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+        self._executor.shutdown(wait=True)
+
+    def run_once(self):
+        """Run every due job once, wait for them, and return; for cron-style use."""
+        self.run_pending()
+        while not self._stopping.is_set() and (any(job.running for job in self.jobs.values()) or not self.run_pending()):
+            self._wake.wait(1)
+            self._wake.clear()
+        self._executor.shutdown(wait=True)
+
+    def stop(self, *_):
+        self._stopping.set()
+        self._wake.set()
+
+def parse_intervals(values):
+    intervals = {}
+    for value in values:
+        name, _, seconds = value.partition('=')
+        intervals[name] = float(seconds)
+    return intervals
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the analysis pipeline and the buyalert scan running on their own schedules.")
+    parser.add_argument('--interval', action='append', default=[], metavar='JOB=SECONDS',
+                        help="override a job's interval, e.g. Rates=3600 or buyalert=1800")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="jobs that may run at the same time")
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING, help="jobs that may be submitted at once")
+    parser.add_argument('--no-scan', action='store_true', help="only run the analysis pipeline")
+    parser.add_argument('--csv-dir', help="scan <dir>/<SYMBOL>.csv instead of Yahoo Finance")
+    parser.add_argument('--once', action='store_true', help="run the due jobs once and exit")
+    parser.add_argument('--hash-retention-days', type=float, default=HASH_RETENTION_DAYS,
+                        help="prune hash-store entries older than this, keeping each name's latest")
+    args = parser.parse_args()
+
+    configure_logging(os.path.join(LOG_PATH, 'scheduler.log'), format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s')
+    jobs = default_jobs(parse_intervals(args.interval), scan=not args.no_scan, csv_dir=args.csv_dir,
+                        retention_days=args.hash_retention_days)
+    scheduler = Scheduler(jobs, args.workers, max(args.max_pending, 1))
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    logging.info(f"Scheduling {', '.join(f'{job.name} every {job.interval:g}s' for job in jobs)}.")
+    with metrics.run('scheduler'):
+        if args.once:
+            scheduler.run_once()
+        else:
+            scheduler.serve()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from .datastore import DATA_DB_PATH, SCHEMA as DATA_SCHEMA
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PROCESSING_PATH = os.path.join(LOCAL_PATH, 'analysis', 'processing')
+
+# Lives in data.db next to data_objects so queries can filter on its source and date columns.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    base_name TEXT NOT NULL UNIQUE,
+    body TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_index USING fts5(body, content='documents', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS documents_insert AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_index (rowid, body) VALUES (new.id, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_delete AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_index (documents_index, rowid, body) VALUES ('delete', old.id, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_update AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_index (documents_index, rowid, body) VALUES ('delete', old.id, old.body);
+    INSERT INTO documents_index (rowid, body) VALUES (new.id, new.body);
+END;
+"""
+
+UPSERT = """
+INSERT INTO documents (base_name, body) VALUES (?, ?)
+ON CONFLICT (base_name) DO UPDATE SET body = excluded.body WHERE body != excluded.body
+"""
+
+TERM_RE = re.compile(r'\w+')
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def match_expression(terms, match_all=False):
+    """FTS5 query for terms, each quoted so words like 'and' or 'near' are not read as operators."""
+    return (' AND ' if match_all else ' OR ').join(f'"{term}"' for term in terms)
+
+def query_terms(text):
+    """Normalize a query the way documents were, falling back to plain lowercase words without NLTK data."""
+    from .preprocessing import preprocess_text
+
+    try:
+        text = preprocess_text(text)
+    except LookupError:
+        text = text.lower()
+    return TERM_RE.findall(text)
+
+class SearchIndex:
+    """BM25-ranked full-text index over _Preprocessed documents, keyed by base_name."""
+
+    def __init__(self, path=DATA_DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(DATA_SCHEMA)
+        self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def add(self, base_name, text):
+        self.add_many([(base_name, text)])
+
+    def add_many(self, documents):
+        """Index (base_name, preprocessed_text) pairs; a base_name seen before is re-indexed only if its text changed."""
+        with self.transaction():
+            self._conn.executemany(UPSERT, documents)
+
+    def remove(self, base_name):
+        with self.transaction():
+            self._conn.execute('DELETE FROM documents WHERE base_name = ?', (base_name,))
+
+    def search(self, query, source=None, date_from=None, date_to=None, limit=20, match_all=False):
+        """Best matches for query as (base_name, score, url, date), lower BM25 score first.
+
+        source and the ISO date range filter on the DataObject metadata that append.py stores.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        clauses, params = ['documents_index MATCH ?'], [match_expression(terms, match_all)]
+        if source is not None:
+            clauses.append('data_objects.source = ?')
+            params.append(source)
+        if date_from is not None:
+            clauses.append('data_objects.date_key >= ?')
+            params.append(date_from)
+        if date_to is not None:
+            clauses.append('data_objects.date_key <= ?')
+            params.append(date_to)
+        sql = f"""
+            SELECT documents.base_name, bm25(documents_index) AS score, data_objects.url, data_objects.date
+            FROM documents_index
+            JOIN documents ON documents.id = documents_index.rowid
+            LEFT JOIN data_objects ON data_objects.base_name = documents.base_name
+            WHERE {' AND '.join(clauses)}
+            ORDER BY score
+            LIMIT ?
+        """
+        with self._lock:
+            return self._conn.execute(sql, (*params, limit)).fetchall()
+
+    def optimize(self):
+        """Merge the FTS segments into one; worth doing after a large backfill."""
+        with self._lock:
+            self._conn.execute("INSERT INTO documents_index (documents_index) VALUES ('optimize')")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def get_search_index(path=DATA_DB_PATH):
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = SearchIndex(path)
+        return _indexes[path]
+
+def index_directory(index=None, directory=PROCESSING_PATH):
+    """Index every <base_name>_Preprocessed.txt file in directory."""
+    index = index if index is not None else get_search_index()
+    documents = []
+    for file_path in glob.glob(os.path.join(directory, '*_Preprocessed.txt')):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            documents.append((os.path.basename(file_path)[:-len('_Preprocessed.txt')], f.read()))
+    index.add_many(documents)
+    return len(documents)
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over preprocessed documents.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('index', help="index the _Preprocessed.txt files in analysis/processing")
+    search = subparsers.add_parser('search', help="ranked query")
+    search.add_argument('query')
+    search.add_argument('--source', help="e.g. FRED or Repo_Results")
+    search.add_argument('--from', dest='date_from', help="YYYY-MM-DD")
+    search.add_argument('--to', dest='date_to', help="YYYY-MM-DD")
+    search.add_argument('--limit', type=int, default=20)
+    search.add_argument('--all', action='store_true', help="require every term instead of ranking any match")
+    args = parser.parse_args()
+
+    index = get_search_index()
+    if args.command == 'index':
+        count = index_directory(index)
+        index.optimize()
+        print(f"Indexed {count} documents; {len(index)} in total")
+    else:
+        for base_name, score, url, date in index.search(args.query, args.source, args.date_from, args.date_to, args.limit, args.all):
+            print(f"{score:8.3f}  {base_name:40} {date or '':20} {url or ''}")
+
+if __name__ == '__main__':
+    main()
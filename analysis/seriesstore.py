@@ -0,0 +1,375 @@
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+import numpy as np
+from .hashstore import DOWNLOADER, get_store
+
+LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PROCESSING_PATH = os.path.join(LOCAL_PATH, 'analysis', 'processing')
+SERIES_PATH = os.path.join(LOCAL_PATH, 'analysis', 'data', 'series')
+
+# The first of these a record (or its nearest ancestor record) has is the observation date.
+DATE_FIELDS = ('effectiveDate', 'operationDate', 'tradeDate', 'releaseDate', 'asOfDate', 'date', 'publication_date', 'realtime_start')
+# String fields that split a series, e.g. refRates/EFFR/percentRate vs refRates/SOFR/percentRate.
+LABEL_FIELDS = ('type', 'operationType', 'operationDirection', 'securityType', 'currency', 'counterparty')
+IGNORED_FIELDS = {'id', 'count', 'offset', 'limit', 'footnoteId'}
+NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+# Composite (series, day) ids put the series code in the high bits; days are offset to stay positive.
+DAY_OFFSET = 1 << 31
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def source_name(file_name):
+    return file_name.replace('_Data.txt', '')
+
+@lru_cache(maxsize=65536)
+def _parse_iso_date(value):
+    if len(value) >= 10 and value[4] == '-' and value[7] == '-':
+        text = value[:10]
+    elif len(value) >= 10 and value[2] == '/' and value[5] == '/':
+        text = f'{value[6:10]}-{value[:2]}-{value[3:5]}'
+    else:
+        return None
+    try:
+        np.datetime64(text, 'D')
+    except ValueError:
+        return None
+    return text
+
+def _iso_date(value):
+    """YYYY-MM-DD for an ISO date/timestamp or an MM/DD/YYYY string, otherwise None."""
+    return _parse_iso_date(value) if type(value) is str else None
+
+def _record_date(node):
+    for field in DATE_FIELDS:
+        record_date = _iso_date(node.get(field))
+        if record_date:
+            return record_date
+    return None
+
+def _record_labels(node):
+    return tuple(node[field] for field in LABEL_FIELDS if type(node.get(field)) is str and node[field])
+
+def _numeric(field, value):
+    """value as a float if field is an observation, otherwise None."""
+    if field in IGNORED_FIELDS or field.endswith('Id'):
+        return None
+    kind = type(value)
+    if kind is int or kind is float or (kind is str and NUMBER_RE.fullmatch(value)):
+        return float(value)
+    return None
+
+def iter_observations(json_data):
+    """Yield (series_key, iso_date, value) for every numeric field of a dated record in a payload.
+
+    This walks the parsed payload flatten_json takes rather than its flattened keys, since those
+    cannot tell a record path from a field name with underscores in it (FRED's realtime_start).
+    """
+    stack = [(json_data, (), None)]
+    while stack:
+        node, path, date = stack.pop()
+        if type(node) is list:
+            stack.extend((child, path, date) for child in reversed(node))
+            continue
+        if type(node) is not dict:
+            continue
+        date = _record_date(node) or date
+        prefix = path + _record_labels(node)
+        for field, value in node.items():
+            kind = type(value)
+            if kind is dict or kind is list:
+                stack.append((value, prefix + (field,), date))
+            elif date is not None:
+                number = _numeric(field, value)
+                if number is not None:
+                    yield '/'.join(prefix + (field,)), date, number
+
+def _leaf_record_observations(record_path, fields, ancestors):
+    date = _record_date(fields)
+    for _, ancestor_fields in reversed(ancestors):
+        if date:
+            break
+        date = _record_date(ancestor_fields)
+    if not date:
+        return
+    labels = {path: _record_labels(ancestor_fields) for path, ancestor_fields in ancestors}
+    prefix = ()
+    for i, part in enumerate(record_path):
+        if type(part) is str:
+            prefix += labels.get(record_path[:i], ()) + (part,)
+    prefix += _record_labels(fields)
+    for field, value in fields.items():
+        number = _numeric(field, value)
+        if number is not None:
+            yield '/'.join(prefix + (field,)), date, number
+
+def iter_leaf_observations(leaves):
+    """iter_observations over (path, value) leaves in document order, as jsonrepair.iter_leaves yields them.
+
+    Only the records on the current path are held. A record is finished once the leaves move
+    past it, so it only inherits the date and label fields its ancestors had before it started.
+    """
+    open_records = []
+    for path, value in leaves:
+        if not path or type(path[-1]) is not str:
+            continue
+        record_path = path[:-1]
+        while open_records and record_path[:len(open_records[-1][0])] != open_records[-1][0]:
+            record = open_records.pop()
+            yield from _leaf_record_observations(*record, open_records)
+        if not open_records or open_records[-1][0] != record_path:
+            open_records.append((record_path, {}))
+        open_records[-1][1][path[-1]] = value
+    while open_records:
+        record = open_records.pop()
+        yield from _leaf_record_observations(*record, open_records)
+
+def _arrays(observations):
+    keys, dates, values = [], [], []
+    for key, date, value in observations:
+        keys.append(key)
+        dates.append(date)
+        values.append(value)
+    return np.array(keys, dtype=str), np.array(dates, dtype='datetime64[D]'), np.array(values, dtype=np.float64)
+
+def observation_arrays(json_data):
+    """(keys, dates, values) arrays for a payload; a repeated (key, date) keeps its last value."""
+    return _arrays(iter_observations(json_data))
+
+def _composite(codes, dates):
+    return (codes.astype(np.int64) << 32) | (dates.astype(np.int64) + DAY_OFFSET)
+
+def _last_per_id(ids):
+    """Indices that sort ids, keeping only the last occurrence of each id."""
+    order = np.argsort(ids, kind='stable')
+    ordered = ids[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[:-1] = ordered[1:] != ordered[:-1]
+    return order[keep]
+
+class SeriesStore:
+    """Append-only columnar store of (series key, date, value) observations, one directory per source.
+
+    Each append writes a segment <seq>-<digest>.npz holding only the observations that are new or
+    whose value changed; reads concatenate a source's segments, later segments winning, and keep the
+    result in memory sorted by key then date so range queries are slices.
+    """
+
+    def __init__(self, path=SERIES_PATH):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._partitions = {}
+
+    def sources(self):
+        return sorted(name for name in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, name)))
+
+    def _segments(self, source):
+        directory = os.path.join(self.path, source)
+        if not os.path.isdir(directory):
+            return ()
+        return tuple(sorted(name for name in os.listdir(directory) if name.endswith('.npz')))
+
+    def has_digest(self, source, digest):
+        return any(name[:-len('.npz')].split('-', 1)[1] == digest[:16] for name in self._segments(source))
+
+    def _partition(self, source):
+        """(names, codes, dates, values) for source, resolved and sorted by (code, date)."""
+        with self._lock:
+            segments = self._segments(source)
+            cached = self._partitions.get(source)
+            if cached and cached[0] == segments:
+                return cached[1]
+            parts = []
+            for segment in segments:
+                with np.load(os.path.join(self.path, source, segment)) as data:
+                    parts.append((data['names'], data['codes'], data['dates'], data['values']))
+            if parts:
+                names, inverse = np.unique(np.concatenate([part[0] for part in parts]), return_inverse=True)
+                offsets = np.cumsum([0] + [len(part[0]) for part in parts])
+                codes = np.concatenate([inverse[offset:offset + len(part[0])][part[1]] for offset, part in zip(offsets, parts)])
+                dates = np.concatenate([part[2] for part in parts])
+                values = np.concatenate([part[3] for part in parts])
+                keep = _last_per_id(_composite(codes, dates))
+                partition = (names, codes[keep], dates[keep], values[keep])
+            else:
+                partition = (np.array([], dtype=str), np.array([], dtype=np.int64),
+                             np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64))
+            self._partitions[source] = (segments, partition)
+            return partition
+
+    def _write_segment(self, source, label, names, codes, dates, values):
+        directory = os.path.join(self.path, source)
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segments(source)
+        sequence = int(segments[-1].split('-', 1)[0]) + 1 if segments else 1
+        path = os.path.join(directory, f'{sequence:06d}-{label}.npz')
+        with open(f'{path}.tmp', 'wb') as f:
+            np.savez(f, names=names, codes=codes.astype(np.int32), dates=dates, values=values)
+        os.replace(f'{path}.tmp', path)
+        return path
+
+    def append(self, source, keys, dates, values, digest=None):
+        """Store the observations that differ from what source already holds; returns how many.
+
+        With the downloader digest of the payload they came from, a payload that was already
+        appended is skipped without diffing.
+        """
+        with self._lock:
+            if digest is not None and self.has_digest(source, digest):
+                return 0
+            names, codes = np.unique(keys, return_inverse=True)
+            keep = _last_per_id(_composite(codes, dates))
+            codes, dates, values = codes[keep], dates[keep], values[keep]
+
+            known_names, known_codes, known_dates, known_values = self._partition(source)
+            if len(known_codes):
+                # Look each new observation up in the stored ones through a shared key vocabulary.
+                shared = np.union1d(known_names, names)
+                known_ids = _composite(np.searchsorted(shared, known_names)[known_codes], known_dates)
+                ids = _composite(np.searchsorted(shared, names)[codes], dates)
+                order = np.argsort(known_ids)
+                position = np.minimum(np.searchsorted(known_ids, ids, sorter=order), len(order) - 1)
+                match = order[position]
+                changed = (known_ids[match] != ids) | (known_values[match] != values)
+                codes, dates, values = codes[changed], dates[changed], values[changed]
+            if not len(codes):
+                return 0
+            used, codes = np.unique(codes, return_inverse=True)
+            self._write_segment(source, (digest or 'manual')[:16], names[used], codes, dates, values)
+            return len(codes)
+
+    def append_payload(self, file_name, json_data, digest=None):
+        return self.append(source_name(file_name), *observation_arrays(json_data), digest=digest)
+
+    def append_observations(self, file_name, observations, digest=None):
+        """append_payload for (series_key, iso_date, value) already extracted, e.g. LeafSpill.observations."""
+        return self.append(source_name(file_name), *_arrays(observations), digest=digest)
+
+    def keys(self, source):
+        return self._partition(source)[0].tolist()
+
+    def read(self, source, keys=None, start=None, end=None):
+        """(keys, dates, values) for source, optionally limited to some series and a date range."""
+        names, codes, dates, values = self._partition(source)
+        mask = np.ones(len(codes), dtype=bool)
+        if keys is not None:
+            wanted = np.flatnonzero(np.isin(names, list(keys)))
+            mask &= np.isin(codes, wanted)
+        if start is not None:
+            mask &= dates >= np.datetime64(start, 'D')
+        if end is not None:
+            mask &= dates <= np.datetime64(end, 'D')
+        return names[codes[mask]], dates[mask], values[mask]
+
+    def series(self, source, key, start=None, end=None):
+        """(dates, values) of one series, sliced out of the sorted partition."""
+        names, codes, dates, values = self._partition(source)
+        code = np.searchsorted(names, key)
+        if code == len(names) or names[code] != key:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64)
+        first, last = np.searchsorted(codes, [code, code + 1])
+        dates, values = dates[first:last], values[first:last]
+        first = np.searchsorted(dates, np.datetime64(start, 'D')) if start is not None else 0
+        last = np.searchsorted(dates, np.datetime64(end, 'D'), side='right') if end is not None else len(dates)
+        return dates[first:last], values[first:last]
+
+    def compact(self, source):
+        """Rewrite a source's segments as one, dropping the values later appends replaced."""
+        with self._lock:
+            segments = self._segments(source)
+            if len(segments) < 2:
+                return
+            names, codes, dates, values = self._partition(source)
+            self._write_segment(source, 'compacted', names, codes, dates, values)
+            for segment in segments:
+                os.remove(os.path.join(self.path, source, segment))
+
+    def close(self):
+        with self._lock:
+            self._partitions.clear()
+
+def get_series_store(path=SERIES_PATH):
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SeriesStore(path)
+        return _stores[path]
+
+RESAMPLE_UNITS = {'D': 'D', 'W': 'W', 'M': 'M', 'Q': 'M', 'Y': 'Y'}
+REDUCERS = {'sum': np.add, 'min': np.minimum, 'max': np.maximum}
+
+def resample(dates, values, freq='M', how='last'):
+    """Aggregate a date-sorted series to D/W/M/Q/Y periods with last, first, mean, sum, min or max."""
+    periods = dates.astype(f'datetime64[{RESAMPLE_UNITS[freq]}]')
+    if freq == 'Q':
+        periods = (periods.astype(np.int64) // 3 * 3).astype('datetime64[M]')
+    if not len(periods):
+        return periods, values[:0]
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    if how == 'last':
+        result = values[np.r_[starts[1:] - 1, len(values) - 1]]
+    elif how == 'first':
+        result = values[starts]
+    elif how == 'mean':
+        result = np.add.reduceat(values, starts) / np.diff(np.r_[starts, len(values)])
+    else:
+        result = REDUCERS[how].reduceat(values, starts)
+    return periods[starts], result
+
+def ingest_directory(series_store=None, directory=PROCESSING_PATH, hash_store=None):
+    """Append the observations of every <source>_Data.txt in directory, keyed by its downloader digest.
+
+    Run it before the truncate command, which deletes the _Data.txt files.
+    """
+    series_store = series_store if series_store is not None else get_series_store()
+    hash_store = hash_store if hash_store is not None else get_store()
+    appended = {}
+    for file_path in sorted(glob.glob(os.path.join(directory, '*_Data.txt'))):
+        file_name = os.path.basename(file_path)
+        with open(file_path, 'r') as f:
+            json_data = json.load(f)
+        appended[file_name] = series_store.append_payload(file_name, json_data, hash_store.latest(DOWNLOADER, file_name))
+    return appended
+
+def main():
+    parser = argparse.ArgumentParser(description="Numeric time series pulled out of the downloaded payloads.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('ingest', help="append the _Data.txt files in analysis/processing")
+    subparsers.add_parser('keys', help="list the series of every source")
+    query = subparsers.add_parser('query', help="print one series")
+    query.add_argument('source', help="e.g. Rates")
+    query.add_argument('key', help="e.g. refRates/EFFR/percentRate")
+    query.add_argument('--from', dest='start', help="YYYY-MM-DD")
+    query.add_argument('--to', dest='end', help="YYYY-MM-DD")
+    query.add_argument('--resample', choices=sorted(RESAMPLE_UNITS), help="aggregate to this period")
+    query.add_argument('--how', default='last', choices=['last', 'first', 'mean', *REDUCERS])
+    compact = subparsers.add_parser('compact', help="merge each source's segments")
+    compact.add_argument('sources', nargs='*')
+    args = parser.parse_args()
+
+    store = get_series_store()
+    if args.command == 'ingest':
+        for file_name, count in ingest_directory(store).items():
+            print(f"{file_name}: {count} new observations")
+    elif args.command == 'keys':
+        for source in store.sources():
+            for key in store.keys(source):
+                print(f"{source}\t{key}")
+    elif args.command == 'query':
+        dates, values = store.series(args.source, args.key, args.start, args.end)
+        if args.resample:
+            dates, values = resample(dates, values, args.resample, args.how)
+        for date, value in zip(dates, values):
+            print(f"{date}\t{value:g}")
+    else:
+        for source in args.sources or store.sources():
+            store.compact(source)
+
+if __name__ == '__main__':
+    main()
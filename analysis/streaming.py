@@ -0,0 +1,84 @@
+import hashlib
+import json
+import sqlite3
+from .jsonrepair import iter_leaves, strip_control_characters
+
+# Memory SQLite may use for the spill's pages and sorts before it moves them to its temporary file, in KiB.
+SPILL_CACHE_KIB = 8192
+BATCH_SIZE = 1000
+
+class LeafSpill:
+    """The flattened leaves of one streamed payload, kept in a temporary SQLite file instead of memory.
+
+    items() yields (key, value) sorted by key with a repeated key keeping its last value, which is
+    the order chunk_json gives flatten_json's output; SQLite's default collation compares UTF-8
+    bytes, which sorts like Python compares str. observations holds the payload's series
+    observations, collected while it was parsed.
+    """
+
+    def __init__(self):
+        # '' opens a private database in a temporary file that is deleted on close; the downloader
+        # fills the spill on a worker thread and the consumer reads it on another.
+        self._conn = sqlite3.connect('', check_same_thread=False)
+        self._conn.execute(f'PRAGMA cache_size = -{SPILL_CACHE_KIB}')
+        # Strings are stored as they are, every other scalar as its JSON literal.
+        self._conn.execute('CREATE TABLE leaves (seq INTEGER PRIMARY KEY, key TEXT NOT NULL, text TEXT, literal TEXT)')
+        self.count = 0
+        self.observations = []
+
+    def add_many(self, leaves):
+        rows = [('_'.join(map(str, path)), value, None) if type(value) is str else ('_'.join(map(str, path)), None, json.dumps(value))
+                for path, value in leaves]
+        with self._conn:
+            self._conn.executemany('INSERT INTO leaves (key, text, literal) VALUES (?, ?, ?)', rows)
+        self.count += len(rows)
+
+    def items(self):
+        previous = None
+        for row in self._conn.execute('SELECT key, text, literal FROM leaves ORDER BY key, seq'):
+            if previous is not None and previous[0] != row[0]:
+                yield previous[0], previous[1] if previous[2] is None else json.loads(previous[2])
+            previous = row
+        if previous is not None:
+            yield previous[0], previous[1] if previous[2] is None else json.loads(previous[2])
+
+    def close(self):
+        self._conn.close()
+
+def spill_leaves(text_chunks):
+    """Parse JSON text arriving in chunks into a LeafSpill; returns (spill, digest, has_content).
+
+    digest is create_hash of the whole text after strip_control_characters, computed as the chunks
+    pass, and has_content is False exactly when is_empty would be True for the parsed payload.
+    """
+    # NumPy is only needed once a payload arrives, not to import the downloader.
+    from .seriesstore import iter_leaf_observations
+
+    hasher = hashlib.sha256()
+    spill = LeafSpill()
+    has_content = False
+
+    def stripped():
+        for chunk in text_chunks:
+            chunk = strip_control_characters(chunk)
+            hasher.update(chunk.encode())
+            yield chunk
+
+    def spilled(leaves):
+        nonlocal has_content
+        batch = []
+        for leaf in leaves:
+            has_content = has_content or bool(leaf[1])
+            batch.append(leaf)
+            if len(batch) == BATCH_SIZE:
+                spill.add_many(batch)
+                batch = []
+            yield leaf
+        spill.add_many(batch)
+
+    try:
+        spill.observations = list(iter_leaf_observations(spilled(iter_leaves(stripped()))))
+    except BaseException:
+        spill.close()
+        raise
+    return spill, hasher.hexdigest(), has_content
@@ -1,108 +1,187 @@
+import argparse
 import json
 import os
 import logging
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from .hashstore import TRUNCATION, get_store
+from . import metrics
+from .logsetup import configure_logging
 
 LOCAL_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 PROCESSING_PATH = os.path.join(LOCAL_PATH, 'analysis', 'processing')
 HASHES_PATH = os.path.join(LOCAL_PATH, 'analysis', 'hashes')
 LOGS_PATH = os.path.join(LOCAL_PATH, 'logs')
 
-if not os.path.exists(PROCESSING_PATH):
-    os.makedirs(PROCESSING_PATH)
-if not os.path.exists(HASHES_PATH):
-    os.makedirs(HASHES_PATH)
-if not os.path.exists(LOGS_PATH):
-    os.makedirs(LOGS_PATH)
-
-logging.basicConfig(filename=os.path.join(LOGS_PATH, 'truncation.log'), level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-processed_hashes = set()
-
-def load_processed_hashes():
-    hashes_file_path = os.path.join(HASHES_PATH, 'truncation.txt')
-    if os.path.exists(hashes_file_path):
-        with open(hashes_file_path, 'r') as file:
-            global processed_hashes
-            processed_hashes = set(file.read().splitlines())
-    else:
-        logging.info("No existing hashes file found. Starting fresh.")
-        
-load_processed_hashes()
-
 def file_hash(data):
     return hashlib.sha256(data.encode()).hexdigest()
 
-def update_hashes_file(hash_entry):
-    with open(os.path.join(HASHES_PATH, 'truncation.txt'), 'a') as hashes_file:
-        hashes_file.write(hash_entry + "\n")
-
 def read_json(file_path):
     with open(file_path, 'r') as file:
         return json.load(file)
 
-def write_truncated(base_filename, truncated_number, truncated_data):
-    file_content = json.dumps(truncated_data, indent=4)
-    data_hash = file_hash(file_content)
-    hash_entry = f"{base_filename}_{truncated_number}_Truncated = {data_hash}"
-
-    if data_hash not in processed_hashes:
-        new_file_path = os.path.join(PROCESSING_PATH, f"{base_filename}_{truncated_number}_Truncated.txt")
-        with open(new_file_path, 'w') as file:
-            file.write(file_content)
-        update_hashes_file(data_hash)
-        processed_hashes.add(data_hash)
-        logging.info(f"Processed and created: {new_file_path}")
-    else:
-        logging.info(f"Duplicate data found for {base_filename}, skipping.")
+def write_chunk(hash_entry, file_content):
+    os.makedirs(PROCESSING_PATH, exist_ok=True)
+    new_file_path = os.path.join(PROCESSING_PATH, f"{hash_entry}.txt")
+    temp_path = f"{new_file_path}.tmp"
+    with open(temp_path, 'w') as file:
+        file.write(file_content)
+    os.replace(temp_path, new_file_path)
+    metrics.count('truncation.chunks_written')
+    metrics.count('truncation.bytes_written', len(file_content))
+    logging.debug(f"Processed and created: {new_file_path}")
+
+CHUNK_LIMIT = 511
+
+def _children(x):
+    if type(x) is dict:
+        return iter(x.items())
+    return ((str(i), a) for i, a in enumerate(x))
+
+def iter_flatten(y):
+    if type(y) is not dict and type(y) is not list:
+        yield '', y
+        return
+    stack = [(_children(y), '')]
+    while stack:
+        children, name = stack[-1]
+        for a, x in children:
+            if type(x) is dict or type(x) is list:
+                stack.append((_children(x), name + a + '_'))
+                break
+            yield name + a, x
+        else:
+            stack.pop()
 
 def flatten_json(y):
-    out = {}
-
-    def flatten(x, name=''):
-        if type(x) is dict:
-            for a in x:
-                flatten(x[a], name + a + '_')
-        elif type(x) is list:
-            i = 0
-            for a in x:
-                flatten(a, name + str(i) + '_')
-                i += 1
+    return dict(iter_flatten(y))
+
+def serialize_entry(key, value):
+    # Matches how json.dumps(..., indent=4) renders a one-key dict inside the chunk list.
+    return '    {\n        ' + json.dumps(key) + ': ' + json.dumps(value) + '\n    }'
+
+def join_entries(entries):
+    if not entries:
+        return '[]'
+    return '[\n' + ',\n'.join(entries) + '\n]'
+
+def iter_chunk_items(items, limit=CHUNK_LIMIT):
+    """Yield (file_content, chunk_items) so in-memory consumers don't have to parse file_content again."""
+    entries = []
+    chunk_items = []
+    size = 2
+    for key, value in items:
+        entry = serialize_entry(key, value)
+        size += len(entry) + 2
+        if size > limit:
+            yield join_entries(entries), chunk_items
+            entries = [entry]
+            chunk_items = [(key, value)]
+            size = len(entry) + 4
         else:
-            out[name[:-1]] = x
+            entries.append(entry)
+            chunk_items.append((key, value))
 
-    flatten(y)
-    return out
+    if entries:
+        yield join_entries(entries), chunk_items
 
-def process_file(file_path, filename):
-    base_filename = filename.replace('_Data.txt', '')
-    json_data = read_json(file_path)
+def iter_chunks(items, limit=CHUNK_LIMIT):
+    for file_content, _ in iter_chunk_items(items, limit):
+        yield file_content
 
+def chunk_json(json_data, limit=CHUNK_LIMIT):
     flattened_data = flatten_json(json_data)
-    keys = sorted(flattened_data.keys())
+    return iter_chunk_items(((key, flattened_data[key]) for key in sorted(flattened_data)), limit)
 
-    current_truncated = []
-    truncated_number = 1
+def new_chunks(base_filename, json_data, store=None):
+    """Yield (hash_entry, file_content, chunk_items) for chunks whose digest hasn't been seen.
 
-    for key in keys:
-        current_truncated.append({key: flattened_data[key]})
-
-        if len(json.dumps(current_truncated, indent=4)) > 511:
-            write_truncated(base_filename, truncated_number, current_truncated[:-1])
-            current_truncated = [{key: flattened_data[key]}]
-            truncated_number += 1
-
-    if current_truncated:
-        write_truncated(base_filename, truncated_number, current_truncated)
+    A digest is recorded once the consumer asks for the next chunk, so a chunk that fails
+    downstream is offered again on the next run.
+    """
+    flattened_data = flatten_json(json_data)
+    return new_item_chunks(base_filename, ((key, flattened_data[key]) for key in sorted(flattened_data)), store)
+
+def new_item_chunks(base_filename, items, store=None):
+    """new_chunks for (key, value) items already flattened and sorted by key, e.g. LeafSpill.items()."""
+    store = store or get_store()
+    for truncated_number, (file_content, chunk_items) in enumerate(iter_chunk_items(items), 1):
+        data_hash = file_hash(file_content)
+        hash_entry = f"{base_filename}_{truncated_number}_Truncated"
+        if store.contains(TRUNCATION, data_hash):
+            metrics.count('truncation.dedup_hits')
+            logging.debug(f"Duplicate data found for {base_filename}, skipping.")
+            continue
+        yield hash_entry, file_content, chunk_items
+        store.add(TRUNCATION, hash_entry, data_hash)
+
+def process_items(base_filename, items, store=None):
+    """Write the new chunks of sorted (key, value) items, as process_file does for a _Data.txt file."""
+    store = store or get_store()
+    with store.transaction(), metrics.timer('chunk'):
+        for hash_entry, file_content, _ in new_item_chunks(base_filename, items, store):
+            write_chunk(hash_entry, file_content)
+
+def process_file(file_path, filename, store=None):
+    base_filename = filename.replace('_Data.txt', '')
+    flattened_data = flatten_json(read_json(file_path))
+    process_items(base_filename, ((key, flattened_data[key]) for key in sorted(flattened_data)), store)
 
     os.remove(file_path)
     logging.info(f"Deleted original file: {filename}")
 
-def process_files():
+def chunk_file(file_path, filename):
+    """Worker side of process_files: [(hash_entry, digest, file_content)] for every chunk of one _Data.txt file."""
+    base_filename = filename.replace('_Data.txt', '')
+    return [
+        (f"{base_filename}_{truncated_number}_Truncated", file_hash(file_content), file_content)
+        for truncated_number, (file_content, _) in enumerate(chunk_json(read_json(file_path)), 1)
+    ]
+
+def merge_chunks(chunks, store, seen):
+    """Parent side: write the chunks whose digest is new to the store and to this run, then record them."""
+    written = []
+    for hash_entry, data_hash, file_content in chunks:
+        if data_hash in seen or store.contains(TRUNCATION, data_hash):
+            metrics.count('truncation.dedup_hits')
+            continue
+        seen.add(data_hash)
+        write_chunk(hash_entry, file_content)
+        written.append((hash_entry, data_hash))
+    store.add_many(TRUNCATION, written)
+    return written
+
+def process_files(workers=None):
+    """Chunk every _Data.txt file, spreading the files over a process pool when workers != 1.
+
+    Workers only read, chunk and hash; deduplication, writes and hash records happen here in
+    listing order, so the output is the same as processing the files one by one.
+    """
     logging.info("Beginning processing of files.")
-    for filename in os.listdir(PROCESSING_PATH):
-        if filename.endswith('_Data.txt'):
-            file_path = os.path.join(PROCESSING_PATH, filename)
-            process_file(file_path, filename)
-
-process_files()
+    filenames = sorted(filename for filename in os.listdir(PROCESSING_PATH) if filename.endswith('_Data.txt'))
+    file_paths = [os.path.join(PROCESSING_PATH, filename) for filename in filenames]
+    store = get_store()
+    seen = set()
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 and len(filenames) > 1 else None
+    try:
+        results = executor.map(chunk_file, file_paths, filenames) if executor else map(chunk_file, file_paths, filenames)
+        for file_path, filename, chunks in zip(file_paths, filenames, results):
+            with store.transaction(), metrics.timer('merge'):
+                merge_chunks(chunks, store, seen)
+            os.remove(file_path)
+            logging.debug(f"Deleted original file: {filename}")
+    finally:
+        if executor:
+            executor.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Split _Data.txt files into _Truncated chunks.")
+    parser.add_argument('--workers', type=int, help="processes to chunk files on (default: all cores, 1 for serial)")
+    args = parser.parse_args()
+    configure_logging(os.path.join(LOGS_PATH, 'truncation.log'))
+    with metrics.run('truncation'):
+        process_files(args.workers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""NASDAQ buy-signal screening: symbol universe, price cache, screener, journal and backtest.
+
+Run commands with ``python -m quickplay <command>``.
+"""
@@ -0,0 +1,9 @@
+import sys
+from analysis.cli import dispatch
+
+COMMANDS = {
+    'buyalert': ('quickplay.buyalert', "scan NASDAQ symbols for buy plays"),
+    'backtest': ('quickplay.backtest', "replay the buy criteria over cached or fixture prices"),
+}
+
+sys.exit(dispatch('quickplay', COMMANDS))
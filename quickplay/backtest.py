@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .marketdata import CSVSource
+from .pricecache import PRICE_DB_PATH, PriceCache
+from .screener import Criteria, rolling_indicators, signal_rule
+from .universe import shard
+
+SCRIPT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+BACKTEST_PATH = os.path.join(SCRIPT_PATH, 'quickplay', 'backtest')
+
+HORIZONS = (1, 5, 10, 20, 60)
+INDICATORS = ('price', '52wk_low', 'rsi', 'average_volume', 'last_day_volume')
+
+def forward_returns(close, horizon):
+    """Close-to-close return from each bar to the bar `horizon` sessions later."""
+    return close.shift(-horizon) / close - 1
+
+def seasoned(close, days):
+    """True where a symbol already has `days` calendar days of history, so its 52-week low is a real one."""
+    first = close.notna().idxmax()
+    ready = (first + pd.Timedelta(days=days)).to_numpy(dtype='datetime64[ns]')
+    return pd.DataFrame(close.index.to_numpy()[:, None] >= ready[None, :], index=close.index, columns=close.columns)
+
+def replay(panel, criteria=None, horizons=HORIZONS, start=None, end=None):
+    """Evaluate the buy rules on every bar of a (field, symbol) panel.
+
+    Returns (trades, totals). trades has one row per signal with the indicator values and the
+    forward return at each horizon; totals holds the sum and count of every symbol-day's forward
+    return, the unconditional baseline the signal returns are compared with.
+    """
+    criteria = criteria or Criteria()
+    values = rolling_indicators(panel, criteria)
+    signals = signal_rule(values, criteria) & seasoned(values['price'], criteria.low_days)
+    window = np.ones(len(signals.index), dtype=bool)
+    if start is not None:
+        window &= signals.index >= pd.Timestamp(start)
+    if end is not None:
+        window &= signals.index <= pd.Timestamp(end)
+    signals = signals.mul(window, axis=0).astype(bool)
+
+    dates, columns = np.nonzero(signals.to_numpy())
+    trades = pd.DataFrame({
+        'date': signals.index[dates],
+        'ticker': signals.columns[columns],
+        **{name: values[name].to_numpy()[dates, columns] for name in INDICATORS},
+    })
+    totals = {}
+    for horizon in horizons:
+        returns = forward_returns(values['price'], horizon).to_numpy()
+        trades[f'return_{horizon}'] = returns[dates, columns]
+        baseline = returns[window]
+        totals[horizon] = (float(np.nansum(baseline)), int(np.count_nonzero(~np.isnan(baseline))))
+    return trades, totals
+
+def summarize(trades, totals, horizons=HORIZONS):
+    """Signal count, mean/median return, hit rate and edge over the unconditional mean per horizon."""
+    rows = []
+    for horizon in horizons:
+        returns = trades[f'return_{horizon}'].dropna()
+        total, count = totals.get(horizon, (0.0, 0))
+        baseline = total / count if count else float('nan')
+        mean = returns.mean() if len(returns) else float('nan')
+        rows.append({
+            'horizon': horizon,
+            'signals': len(returns),
+            'mean': mean,
+            'median': returns.median() if len(returns) else float('nan'),
+            'hit_rate': (returns > 0).mean() if len(returns) else float('nan'),
+            'std': returns.std() if len(returns) > 1 else float('nan'),
+            'baseline_mean': baseline,
+            'edge': mean - baseline,
+        })
+    return pd.DataFrame(rows).set_index('horizon')
+
+def load_shard(symbols, csv_dir=None, cache_path=PRICE_DB_PATH):
+    if csv_dir:
+        return CSVSource(csv_dir).fetch(symbols, period='max')
+    cache = PriceCache(cache_path)
+    try:
+        return cache.load(symbols)
+    finally:
+        cache.close()
+
+def _replay_shard(job):
+    symbols, csv_dir, cache_path, criteria, horizons, start, end = job
+    panel = load_shard(symbols, csv_dir, cache_path)
+    if panel.empty:
+        return pd.DataFrame(), {}
+    return replay(panel, criteria, horizons, start, end)
+
+def run_backtest(symbols, csv_dir=None, cache_path=PRICE_DB_PATH, criteria=None, horizons=HORIZONS, start=None, end=None,
+                 workers=None, shards=None):
+    """Replay the criteria over symbols, sharded across a process pool; returns (trades, summary).
+
+    Each worker loads only its shard's bars, from the CSV directory or the local price cache,
+    so no prices are downloaded.
+    """
+    criteria = criteria or Criteria()
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * 4
+    jobs = [(part, csv_dir, cache_path, criteria, horizons, start, end)
+            for part in (shard(symbols, index, shards) for index in range(shards)) if part]
+
+    trades, totals = [], {horizon: (0.0, 0) for horizon in horizons}
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_replay_shard, jobs))
+    else:
+        results = [_replay_shard(job) for job in jobs]
+    for shard_trades, shard_totals in results:
+        trades.append(shard_trades)
+        for horizon, (total, count) in shard_totals.items():
+            totals[horizon] = (totals[horizon][0] + total, totals[horizon][1] + count)
+
+    trades = [frame for frame in trades if not frame.empty]
+    trades = pd.concat(trades, ignore_index=True).sort_values(['date', 'ticker'], ignore_index=True) if trades else \
+        pd.DataFrame(columns=['date', 'ticker', *INDICATORS, *(f'return_{horizon}' for horizon in horizons)])
+    return trades, summarize(trades, totals, horizons)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the buyalert criteria over cached or fixture OHLCV.")
+    parser.add_argument('--csv-dir', help="read OHLCV from <dir>/<SYMBOL>.csv instead of the local price cache")
+    parser.add_argument('--cache', default=PRICE_DB_PATH, help="price cache to replay")
+    parser.add_argument('--start', help="first signal date, YYYY-MM-DD")
+    parser.add_argument('--end', help="last signal date, YYYY-MM-DD")
+    parser.add_argument('--horizons', default=','.join(map(str, HORIZONS)), help="forward return horizons in sessions")
+    parser.add_argument('--workers', type=int, help="processes to shard symbols over (default: all cores)")
+    parser.add_argument('--rsi-below', type=float, default=Criteria.rsi_below)
+    parser.add_argument('--volume-multiple', type=float, default=Criteria.volume_multiple)
+    parser.add_argument('--near-low', type=float, default=Criteria.near_low)
+    parser.add_argument('--min-average-volume', type=float, default=Criteria.min_average_volume)
+    args = parser.parse_args()
+    criteria = Criteria(rsi_below=args.rsi_below, volume_multiple=args.volume_multiple, near_low=args.near_low,
+                        min_average_volume=args.min_average_volume)
+    horizons = tuple(int(value) for value in args.horizons.split(','))
+
+    if args.csv_dir:
+        symbols = CSVSource(args.csv_dir).symbols()
+    else:
+        cache = PriceCache(args.cache)
+        symbols = sorted(cache.last_dates())
+        cache.close()
+
+    started = time.perf_counter()
+    trades, summary = run_backtest(symbols, args.csv_dir, args.cache, criteria, horizons, args.start, args.end, args.workers)
+    elapsed = time.perf_counter() - started
+
+    os.makedirs(BACKTEST_PATH, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    trades.to_csv(os.path.join(BACKTEST_PATH, f'trades_{stamp}.csv'), index=False)
+    with open(os.path.join(BACKTEST_PATH, f'summary_{stamp}.json'), 'w') as f:
+        json.dump({'criteria': vars(criteria), 'symbols': len(symbols), 'seconds': elapsed,
+                   'summary': json.loads(summary.to_json(orient='index'))}, f, indent=4)
+    print(f"{len(symbols)} symbols, {len(trades)} signals in {elapsed:.1f}s")
+    print(summary.to_string(float_format=lambda value: f'{value:.4f}'))
+
+if __name__ == '__main__':
+    main()
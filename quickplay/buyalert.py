@@ -1,97 +1,111 @@
+import argparse
 import os
 import json
 import logging
-import time
-import pandas as pd
-import pandas_ta as ta
-import yfinance as yf
-from multiprocessing import Pool
+from analysis import metrics
+from analysis.logsetup import configure_logging
+from .screener import Criteria, plays, screen
+from .journal import get_journal, new_run_id
+from .universe import RemoteDataError, get_symbols, load_listing, shard
 
 SCRIPT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 BASE_PATH = os.path.join(SCRIPT_PATH, 'quickplay')
 PLAY_PATH = os.path.join(BASE_PATH, 'play')
 LOGS_PATH = os.path.join(BASE_PATH, 'logs')
 
-if not os.path.exists(PLAY_PATH):
-    os.makedirs(PLAY_PATH, exist_ok=True)
-if not os.path.exists(LOGS_PATH):
-    os.makedirs(LOGS_PATH, exist_ok=True)
+def get_nasdaq_symbols(retry_count=3, timeout=30, pause=None, **options):
+    """The NASDAQ listing, read from the daily disk copy kept by universe.load_listing."""
+    return load_listing(retry_count=retry_count, timeout=timeout, pause=pause, **options)
+
+def record_plays(plays, run_id=None, journal=None, export_json=False):
+    """Append plays to the journal from this (the parent) process; optionally also write <TICKER>_<N>.json files."""
+    journal = journal or get_journal()
+    with metrics.timer('record'):
+        ids = journal.record(plays, run_id or new_run_id())
+        if export_json:
+            journal.export_json([{'id': play_id, 'play': play_data} for play_id, play_data in zip(ids, plays)], PLAY_PATH)
+    metrics.count('buyalert.plays', len(plays))
+    for play_data in plays:
+        logging.info(f"Ticker {play_data['ticker']} meets criteria with RSI {play_data['rsi']}, average volume {play_data['average_volume']}, and last day volume {play_data['last_day_volume']}")
+    return ids
+
+def process_ticker(symbol, source=None, criteria=None):
+    from .marketdata import fetch_history
 
-logging.basicConfig(filename=os.path.join(LOGS_PATH, 'buyalert.log'), level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filemode='w')
-
-class RemoteDataError(Exception):
-    pass
-
-def _download_nasdaq_symbols(timeout=30):
-    nasdaq_url = 'ftp://ftp.nasdaqtrader.com/SymbolDirectory/nasdaqlisted.txt'
     try:
-        return pd.read_csv(nasdaq_url, sep='|', skipfooter=1, engine='python')
-    except Exception as e:
-        raise RemoteDataError(f"Failed to download NASDAQ symbols: {e}")
-
-_ticker_cache = None
-
-def get_nasdaq_symbols(retry_count=3, timeout=30, pause=None):
-    global _ticker_cache
-    if _ticker_cache is None:
-        while retry_count > 0:
-            try:
-                _ticker_cache = _download_nasdaq_symbols(timeout=timeout)
-                break
-            except RemoteDataError:
-                retry_count -= 1
-                if retry_count <= 0:
-                    raise
-                time.sleep(pause or timeout / 3)
-    return _ticker_cache
-
-def save_play_to_json(play, symbol):
-    base_filename = f"{symbol}_"
-    existing_files = [f for f in os.listdir(PLAY_PATH) if f.startswith(base_filename) and f.endswith('.json')]
-    next_file_number = 1 if len(existing_files) == 0 else max([int(f.split('_')[-1].split('.')[0]) for f in existing_files]) + 1
-    filename = os.path.join(PLAY_PATH, f"{base_filename}{next_file_number}.json")
-
-    with open(filename, 'w') as json_file:
-        json.dump(play, json_file, indent=4)
-
-def process_ticker(symbol):
-    try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="60d") 
-
-        if hist.empty:
+        panel = fetch_history([symbol], source, period="1y", workers=1)
+        if panel.empty:
             logging.info(f"No data returned for {symbol}")
-            return
-
-        rsi = ta.rsi(hist['Close'], length=14).iloc[-1]
-
-        average_volume = hist['Volume'].mean()
-        last_day_volume = hist.iloc[-1]['Volume'] if 'Volume' in hist.columns else 0
-        low_52week = hist['Low'].min()
-        last_price = hist['Close'].iloc[-1]
-
-        if average_volume > 1_000_000 and last_day_volume > 1.5 * average_volume:
-            if rsi < 30 and last_price <= low_52week * 1.10:
-                play_data = {
-                    'ticker': symbol,
-                    'price': float(last_price),
-                    '52wk_low': float(low_52week),
-                    'rsi': float(rsi),
-                    'average_volume': int(average_volume),
-                    'last_day_volume': int(last_day_volume)
-                }
-                save_play_to_json(play_data, symbol)
-                logging.info(f"Ticker {symbol} meets criteria with RSI {rsi}, average volume {average_volume}, and last day volume {last_day_volume}")
-
+            return None
+        found = plays(screen(panel, criteria))
+        record_plays(found)
+        return found[0] if found else None
     except Exception as e:
         logging.error(f"Error processing {symbol}: {e}")
 
+def scan(symbols, source=None, criteria=None, batch_size=200, workers=4, rate=2.0, use_cache=True, lookback_days=None,
+         run_id=None, export_json=False):
+    # pandas and yfinance load here rather than at import, so --help and the scheduler start instantly.
+    from .marketdata import fetch_history
+    from .pricecache import LOOKBACK_DAYS, update_history
+
+    symbols = list(symbols)
+    lookback_days = lookback_days or LOOKBACK_DAYS
+    with metrics.timer('fetch'):
+        if use_cache:
+            panel = update_history(symbols, source, lookback_days, batch_size=batch_size, workers=workers, rate=rate)
+        else:
+            panel = fetch_history(symbols, source, period="1y", batch_size=batch_size, workers=workers, rate=rate)
+    returned = len(panel.columns.get_level_values(1).unique())
+    metrics.count('buyalert.tickers_requested', len(symbols))
+    metrics.count('buyalert.tickers_failed', len(symbols) - returned)
+    if panel.empty:
+        logging.info("No data returned for any symbol.")
+        return []
+    with metrics.timer('screen'):
+        found = plays(screen(panel, criteria))
+    record_plays(found, run_id, export_json=export_json)
+    return found
+
 def main():
-    logging.info("Processing NASDAQ symbols for buy plays.")
-    nasdaq_symbols = get_nasdaq_symbols()
-    symbol_list = nasdaq_symbols['Symbol'].tolist()
-    with Pool(4) as pool:
-        pool.map(process_ticker, symbol_list)
+    parser = argparse.ArgumentParser(description="Scan NASDAQ symbols for buy plays.")
+    parser.add_argument('--csv-dir', help="read OHLCV from <dir>/<SYMBOL>.csv instead of Yahoo Finance")
+    parser.add_argument('--batch-size', type=int, default=200, help="symbols per download request")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent download requests")
+    parser.add_argument('--rate', type=float, default=2.0, help="maximum download requests started per second")
+    parser.add_argument('--no-cache', action='store_true', help="download the full history instead of updating the local price cache")
+    parser.add_argument('--lookback-days', type=int, help="calendar days of cached history to screen (default: pricecache.LOOKBACK_DAYS)")
+    parser.add_argument('--shard', type=int, default=0, help="which shard of the symbol universe to scan")
+    parser.add_argument('--shards', type=int, default=1, help="number of shards the universe is split into")
+    parser.add_argument('--include-etfs', action='store_true')
+    parser.add_argument('--include-derivatives', action='store_true', help="keep warrants, units and rights")
+    parser.add_argument('--refresh-symbols', action='store_true', help="download nasdaqlisted.txt even if the cached copy is fresh")
+    parser.add_argument('--offline', action='store_true', help="use the cached nasdaqlisted.txt without any network access")
+    parser.add_argument('--export-json', action='store_true', help="also write each play to play/<TICKER>_<N>.json")
+    parser.add_argument('--rsi-below', type=float, default=Criteria.rsi_below)
+    parser.add_argument('--volume-multiple', type=float, default=Criteria.volume_multiple)
+    parser.add_argument('--near-low', type=float, default=Criteria.near_low, help="maximum distance above the 52-week low, as a fraction")
+    parser.add_argument('--min-average-volume', type=float, default=Criteria.min_average_volume)
+    args = parser.parse_args()
+    criteria = Criteria(rsi_below=args.rsi_below, volume_multiple=args.volume_multiple, near_low=args.near_low,
+                        min_average_volume=args.min_average_volume)
+    from .marketdata import CSVSource, YahooSource
+
+    configure_logging(os.path.join(LOGS_PATH, 'buyalert.log'), filemode='w')
+    run_id = new_run_id()
+    logging.info(f"Processing NASDAQ symbols for buy plays, run {run_id}.")
+    with metrics.run('buyalert', os.path.join(LOGS_PATH, 'metrics')):
+        if args.csv_dir:
+            source = CSVSource(args.csv_dir)
+            symbol_list = shard(source.symbols(), args.shard, args.shards)
+        else:
+            source = YahooSource()
+            with metrics.timer('symbols'):
+                symbol_list = get_symbols(args.shard, args.shards, exclude_etfs=not args.include_etfs,
+                                          exclude_derivatives=not args.include_derivatives,
+                                          refresh=args.refresh_symbols, offline=args.offline)
+        scan(symbol_list, source, criteria, batch_size=args.batch_size, workers=args.workers, rate=args.rate,
+             use_cache=not args.no_cache, lookback_days=args.lookback_days, run_id=run_id, export_json=args.export_json)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,146 @@
+import datetime
+import glob
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+SCRIPT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+BASE_PATH = os.path.join(SCRIPT_PATH, 'quickplay')
+PLAY_PATH = os.path.join(BASE_PATH, 'play')
+JOURNAL_DB_PATH = os.path.join(PLAY_PATH, 'plays.db')
+
+PLAY_FIELDS = ('price', '52wk_low', 'rsi', 'average_volume', 'last_day_volume')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    price REAL,
+    low_52wk REAL,
+    rsi REAL,
+    average_volume INTEGER,
+    last_day_volume INTEGER
+);
+CREATE INDEX IF NOT EXISTS plays_ticker ON plays (ticker, timestamp);
+CREATE INDEX IF NOT EXISTS plays_timestamp ON plays (timestamp);
+CREATE INDEX IF NOT EXISTS plays_run ON plays (run_id);
+"""
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+def new_run_id():
+    return f"{datetime.datetime.now(datetime.timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+
+def _row_to_play(row):
+    play_id, run_id, ticker, timestamp, *values = row
+    play = {'ticker': ticker, **dict(zip(PLAY_FIELDS, values))}
+    return {'id': play_id, 'run_id': run_id, 'timestamp': timestamp, 'play': play}
+
+class PlayJournal:
+    """Append-only record of every play, one row per play, indexed by ticker and time."""
+
+    def __init__(self, path=JOURNAL_DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        is_new = not os.path.exists(path)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        if is_new:
+            import_legacy_plays(self, os.path.dirname(path))
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def record(self, plays, run_id, timestamp=None):
+        """Append plays in one transaction; returns their row ids."""
+        timestamp = timestamp or _now()
+        ids = []
+        with self.transaction():
+            for play in plays:
+                cursor = self._conn.execute(
+                    'INSERT INTO plays (run_id, ticker, timestamp, price, low_52wk, rsi, average_volume, last_day_volume) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (run_id, play['ticker'], timestamp, *(play.get(field) for field in PLAY_FIELDS)))
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def query(self, ticker=None, since=None, until=None, run_id=None):
+        """Journal entries filtered by ticker, ISO timestamp range (e.g. since='2024-03-01') and/or run."""
+        clauses, params = [], []
+        if ticker is not None:
+            clauses.append('ticker = ?')
+            params.append(ticker)
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('timestamp < ?')
+            params.append(until)
+        if run_id is not None:
+            clauses.append('run_id = ?')
+            params.append(run_id)
+        sql = 'SELECT id, run_id, ticker, timestamp, price, low_52wk, rsi, average_volume, last_day_volume FROM plays'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY id', params).fetchall()
+        return [_row_to_play(row) for row in rows]
+
+    def count(self, ticker):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM plays WHERE ticker = ?', (ticker,)).fetchone()[0]
+
+    def export_json(self, entries, play_path=PLAY_PATH):
+        """Write entries as <TICKER>_<N>.json, N being the play's position in that ticker's history."""
+        os.makedirs(play_path, exist_ok=True)
+        for entry in entries:
+            ticker = entry['play']['ticker']
+            with self._lock:
+                number = self._conn.execute('SELECT COUNT(*) FROM plays WHERE ticker = ? AND id <= ?', (ticker, entry['id'])).fetchone()[0]
+            filename = os.path.join(play_path, f"{ticker}_{number}.json")
+            temp_path = f"{filename}.tmp"
+            with open(temp_path, 'w') as json_file:
+                json.dump(entry['play'], json_file, indent=4)
+            os.replace(temp_path, filename)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def get_journal(path=JOURNAL_DB_PATH):
+    with _journals_lock:
+        if path not in _journals:
+            _journals[path] = PlayJournal(path)
+        return _journals[path]
+
+def import_legacy_plays(journal, play_path):
+    """Load the <TICKER>_<N>.json files written before the journal existed, in N order, dated by mtime."""
+    files = []
+    for file_path in glob.glob(os.path.join(play_path, '*_*.json')):
+        ticker, _, number = os.path.splitext(os.path.basename(file_path))[0].rpartition('_')
+        if ticker and number.isdigit():
+            files.append((ticker, int(number), file_path))
+    for ticker, _, file_path in sorted(files):
+        with open(file_path, 'r') as f:
+            play = json.load(f)
+        timestamp = datetime.datetime.fromtimestamp(os.path.getmtime(file_path), datetime.timezone.utc).isoformat(timespec='seconds')
+        journal.record([{**play, 'ticker': play.get('ticker', ticker)}], 'legacy', timestamp)
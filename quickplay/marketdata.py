@@ -0,0 +1,131 @@
+import glob
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class RateLimiter:
+    """Spaces out calls so at most `rate` start per second across all threads."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def period_offset(period):
+    """Calendar offset for a yfinance-style period such as '60d', '6mo' or '1y'."""
+    for suffix, unit in (('mo', 'months'), ('d', 'days'), ('wk', 'weeks'), ('y', 'years')):
+        if period.endswith(suffix):
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+def to_panel(frame, symbols=None):
+    """Normalize a price frame to columns (field, symbol), dates as index, fields in FIELDS order."""
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=pd.MultiIndex.from_product([FIELDS, []]))
+    if not isinstance(frame.columns, pd.MultiIndex):
+        frame = pd.concat({symbols[0]: frame}, axis=1).swaplevel(axis=1)
+    elif frame.columns.get_level_values(0).isin(FIELDS).sum() == 0:
+        frame = frame.swaplevel(axis=1)
+    frame = frame.loc[:, frame.columns.get_level_values(0).isin(FIELDS)]
+    frame.index = pd.DatetimeIndex(frame.index).tz_localize(None).normalize()
+    frame.index.name = 'Date'
+    return frame.sort_index(axis=1)
+
+class YahooSource:
+    """Batched daily bars from Yahoo Finance through yf.download."""
+
+    def __init__(self, threads=True):
+        self.threads = threads
+
+    def fetch(self, symbols, period='60d', start=None):
+        import yfinance as yf
+
+        kwargs = {'start': start} if start is not None else {'period': period}
+        frame = yf.download(list(symbols), interval='1d', group_by='column', auto_adjust=True, actions=False,
+                            threads=self.threads, progress=False, **kwargs)
+        return to_panel(frame, list(symbols))
+
+class CSVSource:
+    """Reads <directory>/<SYMBOL>.csv files with Date,Open,High,Low,Close,Volume columns; for tests and offline runs."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def symbols(self):
+        return sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(self.directory, '*.csv')))
+
+    def fetch(self, symbols, period='60d', start=None):
+        frames = {}
+        for symbol in symbols:
+            path = os.path.join(self.directory, f"{symbol}.csv")
+            if os.path.exists(path):
+                frames[symbol] = pd.read_csv(path, index_col='Date', parse_dates=True)[FIELDS]
+        if not frames:
+            return to_panel(None)
+        frame = pd.concat(frames, axis=1).swaplevel(axis=1)
+        frame.index = pd.DatetimeIndex(frame.index)
+        if start is not None:
+            frame = frame.loc[frame.index >= pd.Timestamp(start)]
+        elif period and period != 'max':
+            frame = frame.loc[frame.index > frame.index.max() - period_offset(period)]
+        return to_panel(frame, list(symbols))
+
+def batches(symbols, batch_size):
+    for i in range(0, len(symbols), batch_size):
+        yield symbols[i:i + batch_size]
+
+def fetch_history(symbols, source=None, period='60d', start=None, batch_size=200, workers=4, rate=2.0, failed=None):
+    """Fetch OHLCV for many symbols as one (field, symbol) panel.
+
+    Symbols go to the source batch_size at a time on `workers` threads, with batch requests
+    started at most `rate` times per second. Symbols with no data are left out of the panel;
+    a batch whose request raises is logged and dropped, and its symbols are added to the
+    `failed` set when one is given.
+    """
+    source = source or YahooSource()
+    symbols = list(symbols)
+    limiter = RateLimiter(rate)
+
+    def fetch_batch(batch):
+        limiter.wait()
+        return source.fetch(batch, period=period, start=start)
+
+    frames = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_batch, batch): batch for batch in batches(symbols, batch_size)}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                frames.append(future.result())
+            except Exception as e:
+                logging.error(f"Error fetching batch of {len(batch)} symbols starting at {batch[0]}: {e}")
+                if failed is not None:
+                    failed.update(batch)
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return to_panel(None)
+    panel = pd.concat(frames, axis=1).dropna(axis=1, how='all')
+    missing = sorted(set(symbols) - set(panel.columns.get_level_values(1)))
+    if missing:
+        logging.info(f"No data returned for {len(missing)} of {len(symbols)} symbols, e.g. {', '.join(missing[:10])}")
+    return panel.sort_index(axis=1)
+
+def symbol_history(panel, symbol):
+    """One symbol's bars from a panel, as the single-ticker frame ticker.history() used to return."""
+    return panel.xs(symbol, axis=1, level=1).dropna(how='all')
@@ -0,0 +1,273 @@
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+from .marketdata import FIELDS, fetch_history, to_panel
+
+SCRIPT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CACHE_PATH = os.path.join(SCRIPT_PATH, 'quickplay', 'cache')
+PRICE_DB_PATH = os.path.join(CACHE_PATH, 'prices.db')
+
+# Enough calendar days for a 52-week low plus the RSI warm-up.
+LOOKBACK_DAYS = 400
+# A symbol that returns nothing is retried after 1, 2, 4, ... days, up to MAX_BACKOFF_DAYS.
+MAX_BACKOFF_DAYS = 30
+# A cached symbol that returns no new bars only counts as failing once its data is this old.
+STALE_DAYS = 7
+# Relative close difference on the overlapping bar that means Yahoo re-adjusted the history.
+ADJUSTMENT_TOLERANCE = 1e-4
+# A bar fetched before its session's close may be partial and is fetched again.
+MARKET_TIMEZONE = ZoneInfo('America/New_York')
+MARKET_CLOSE = datetime.time(16, 15)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    symbol TEXT PRIMARY KEY,
+    last_date TEXT NOT NULL,
+    dates BLOB NOT NULL,
+    bars BLOB NOT NULL,
+    fetched_at REAL
+);
+CREATE TABLE IF NOT EXISTS symbol_status (
+    symbol TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+"""
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def _decode(dates, bars):
+    dates = np.frombuffer(dates, dtype='datetime64[D]')
+    return dates, np.frombuffer(bars, dtype=np.float64).reshape(len(dates), len(FIELDS))
+
+class PriceCache:
+    """Daily bars per symbol, stored column-wise as numpy blobs, plus a failure/backoff record per symbol.
+
+    Each symbol is one row holding its sorted dates and a dates x FIELDS float array, so a
+    whole-universe load is a few thousand blob reads rather than a million bar rows.
+    """
+
+    def __init__(self, path=PRICE_DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(prices)')]
+        if 'fetched_at' not in columns:
+            self._conn.execute('ALTER TABLE prices ADD COLUMN fetched_at REAL')
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def last_dates(self):
+        with self._lock:
+            return dict(self._conn.execute('SELECT symbol, last_date FROM prices').fetchall())
+
+    def partial(self):
+        """Symbols whose last cached bar was fetched before its session closed, so it may be incomplete."""
+        with self._lock:
+            rows = self._conn.execute('SELECT symbol, last_date, fetched_at FROM prices').fetchall()
+        # Rows cached before fetch times were recorded have none and are taken as complete.
+        return {symbol for symbol, last_date, fetched_at in rows if fetched_at is not None and fetched_at < session_close(last_date)}
+
+    def _read(self, symbols=None):
+        with self._lock:
+            if symbols is None:
+                rows = self._conn.execute('SELECT symbol, dates, bars FROM prices').fetchall()
+            else:
+                rows = []
+                for symbol in symbols:
+                    row = self._conn.execute('SELECT symbol, dates, bars FROM prices WHERE symbol = ?', (symbol,)).fetchone()
+                    if row:
+                        rows.append(row)
+        return {symbol: _decode(dates, bars) for symbol, dates, bars in rows}
+
+    def closes_on(self, date, symbols):
+        date = np.datetime64(date, 'D')
+        closes = {}
+        for symbol, (dates, bars) in self._read(symbols).items():
+            position = np.searchsorted(dates, date)
+            if position < len(dates) and dates[position] == date:
+                closes[symbol] = bars[position, FIELDS.index('Close')]
+        return closes
+
+    def store(self, panel, fetched_at=None):
+        """Merge a (field, symbol) panel into the cache; fetched bars replace cached ones on the same date."""
+        if panel.empty:
+            return 0
+        fetched_at = fetched_at or time.time()
+        symbols = panel.columns.get_level_values(1).unique()
+        dates = panel.index.values.astype('datetime64[D]')
+        values = np.stack([panel[field].reindex(columns=symbols).to_numpy(dtype=np.float64) for field in FIELDS], axis=-1)
+        existing = self._read(symbols)
+        stored = 0
+        with self.transaction():
+            for column, symbol in enumerate(symbols):
+                bars = values[:, column]
+                present = ~np.isnan(bars).all(axis=1)
+                new_dates, new_bars = dates[present], bars[present]
+                if not len(new_dates):
+                    continue
+                if symbol in existing:
+                    old_dates, old_bars = existing[symbol]
+                    keep = ~np.isin(old_dates, new_dates)
+                    new_dates = np.concatenate([old_dates[keep], new_dates])
+                    new_bars = np.concatenate([old_bars[keep], new_bars])
+                    order = np.argsort(new_dates, kind='stable')
+                    new_dates, new_bars = new_dates[order], new_bars[order]
+                self._conn.execute('INSERT OR REPLACE INTO prices (symbol, last_date, dates, bars, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                                   (symbol, str(new_dates[-1]), new_dates.tobytes(), np.ascontiguousarray(new_bars).tobytes(), fetched_at))
+                stored += int(present.sum())
+        return stored
+
+    def load(self, symbols=None, start=None):
+        """Cached bars as a (field, symbol) panel, optionally limited to symbols and dates >= start."""
+        histories = self._read(symbols)
+        if start is not None:
+            start = np.datetime64(start, 'D')
+            histories = {symbol: (dates[dates >= start], bars[dates >= start]) for symbol, (dates, bars) in histories.items()}
+        histories = {symbol: history for symbol, history in sorted(histories.items()) if len(history[0])}
+        if not histories:
+            return to_panel(None)
+        all_dates = np.unique(np.concatenate([dates for dates, _ in histories.values()]))
+        values = np.full((len(FIELDS), len(all_dates), len(histories)), np.nan)
+        for column, (dates, bars) in enumerate(histories.values()):
+            values[:, np.searchsorted(all_dates, dates), column] = bars.T
+        columns = pd.MultiIndex.from_product([FIELDS, list(histories)])
+        panel = pd.DataFrame(values.transpose(1, 0, 2).reshape(len(all_dates), -1), index=pd.DatetimeIndex(all_dates), columns=columns)
+        return to_panel(panel)
+
+    def drop(self, symbols):
+        with self.transaction():
+            self._conn.executemany('DELETE FROM prices WHERE symbol = ?', ((symbol,) for symbol in symbols))
+
+    def due(self, symbols, now=None):
+        """The symbols that are not currently backed off."""
+        now = now or time.time()
+        with self._lock:
+            waiting = dict(self._conn.execute('SELECT symbol, next_attempt FROM symbol_status WHERE next_attempt > ?', (now,)).fetchall())
+        return [symbol for symbol in symbols if symbol not in waiting]
+
+    def record_failures(self, symbols, error, now=None):
+        now = now or time.time()
+        with self.transaction():
+            for symbol in symbols:
+                row = self._conn.execute('SELECT failures FROM symbol_status WHERE symbol = ?', (symbol,)).fetchone()
+                failures = (row[0] if row else 0) + 1
+                delay = min(2 ** (failures - 1), MAX_BACKOFF_DAYS) * 86400
+                self._conn.execute('INSERT OR REPLACE INTO symbol_status (symbol, failures, next_attempt, last_error) VALUES (?, ?, ?, ?)',
+                                   (symbol, failures, now + delay, error))
+
+    def record_successes(self, symbols):
+        with self.transaction():
+            self._conn.executemany('DELETE FROM symbol_status WHERE symbol = ?', ((symbol,) for symbol in symbols))
+
+    def failing(self):
+        with self._lock:
+            return self._conn.execute('SELECT symbol, failures, next_attempt, last_error FROM symbol_status ORDER BY failures DESC').fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def get_price_cache(path=PRICE_DB_PATH):
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = PriceCache(path)
+        return _caches[path]
+
+def session_close(date):
+    """Timestamp of the market close on an ISO date."""
+    return datetime.datetime.combine(datetime.date.fromisoformat(date), MARKET_CLOSE, MARKET_TIMEZONE).timestamp()
+
+def _adjusted(cache, panel, date, symbols):
+    # Yahoo back-adjusts the whole history after splits and dividends, so the bar we already
+    # hold is fetched again and compared; a mismatch means the cached history is stale.
+    if panel.empty or pd.Timestamp(date) not in panel.index:
+        return []
+    cached = cache.closes_on(date, symbols)
+    fresh = panel['Close'].loc[pd.Timestamp(date)]
+    adjusted = []
+    for symbol in symbols:
+        old, new = cached.get(symbol), fresh.get(symbol)
+        if old and pd.notna(new) and abs(new - old) > ADJUSTMENT_TOLERANCE * abs(old):
+            adjusted.append(symbol)
+    return adjusted
+
+def update_history(symbols, source=None, lookback_days=LOOKBACK_DAYS, cache=None, today=None, now=None, **fetch_options):
+    """Bring the cache up to date for symbols and return their last lookback_days as a panel.
+
+    Cached symbols only fetch bars from their last cached date on, and again on that date when
+    its bar was fetched before the close (e.g. today's bar during market hours); symbols seen for
+    the first time (or whose history was re-adjusted) fetch the whole lookback. Symbols whose request
+    succeeded but returned no data are backed off and left out until their next attempt is due;
+    symbols in a batch that errored are simply tried again on the next update.
+    """
+    cache = cache or get_price_cache()
+    today = today or datetime.date.today()
+    now = now or time.time()
+    start = (today - datetime.timedelta(days=lookback_days)).isoformat()
+    symbols = list(dict.fromkeys(symbols))
+    due = cache.due(symbols)
+    last_dates = cache.last_dates()
+    partial = cache.partial()
+
+    by_last_date = {}
+    for symbol in due:
+        last_date = last_dates.get(symbol)
+        if last_date is None or last_date < start:
+            by_last_date.setdefault(None, []).append(symbol)
+        elif last_date < today.isoformat() or symbol in partial:
+            by_last_date.setdefault(last_date, []).append(symbol)
+
+    refetch = by_last_date.pop(None, [])
+    for last_date, group in sorted(by_last_date.items()):
+        failed = set()
+        panel = fetch_history(group, source, start=last_date, failed=failed, **fetch_options)
+        # A partial bar is expected to differ from the final one, so only complete bars reveal an adjustment.
+        adjusted = _adjusted(cache, panel, last_date, [symbol for symbol in group if symbol not in partial])
+        if adjusted:
+            logging.info(f"History re-adjusted for {len(adjusted)} symbols since {last_date}, refetching them")
+            cache.drop(adjusted)
+            refetch.extend(adjusted)
+            panel = panel.drop(columns=adjusted, level=1)
+        cache.store(panel, now)
+        returned = set(panel.columns.get_level_values(1))
+        stale_before = (today - datetime.timedelta(days=STALE_DAYS)).isoformat()
+        cache.record_successes(returned)
+        cache.record_failures([symbol for symbol in group
+                               if symbol not in returned and symbol not in adjusted and symbol not in failed and last_date < stale_before],
+                              f"no bars since {last_date}")
+
+    if refetch:
+        failed = set()
+        panel = fetch_history(refetch, source, start=start, failed=failed, **fetch_options)
+        cache.store(panel, now)
+        returned = set(panel.columns.get_level_values(1))
+        cache.record_successes(returned)
+        cache.record_failures([symbol for symbol in refetch if symbol not in returned and symbol not in failed], "no data returned")
+
+    skipped = len(symbols) - len(due)
+    if skipped:
+        logging.info(f"Skipped {skipped} symbols that are backed off after failed lookups")
+    return cache.load(due, start=start)
@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+
+@dataclass
+class Criteria:
+    rsi_length: int = 14
+    rsi_below: float = 30
+    volume_multiple: float = 1.5
+    near_low: float = 0.10
+    min_average_volume: float = 1_000_000
+    # Calendar-day windows, like the period="60d" history the screen used to be run on.
+    volume_days: int = 60
+    low_days: int = 365
+    # A symbol whose last bar is older than this, relative to the panel's last date, is not screened.
+    max_stale_days: int = 5
+
+def wilder_rsi(close, length=14):
+    """RSI for every column of a dates x symbols frame, using Wilder's smoothing (alpha = 1/length)."""
+    import numpy as np
+
+    delta = close.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+    average_gain = gain.ewm(alpha=1.0 / length, adjust=False, min_periods=length).mean()
+    average_loss = loss.ewm(alpha=1.0 / length, adjust=False, min_periods=length).mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + average_gain / average_loss)
+    # No losses over the window means RSI 100; no movement at all stays NaN.
+    return rsi.mask((average_loss == 0) & (average_gain > 0), 100.0)
+
+def indicators(panel, criteria=None):
+    """Indicators on each symbol's own last bar, one row per symbol.
+
+    A symbol missing the panel's latest bars is measured on its last close and the windows ending
+    there; one whose last close is more than criteria.max_stale_days old gets NaN indicators.
+    """
+    import numpy as np
+    import pandas as pd
+
+    criteria = criteria or Criteria()
+    close = panel['Close']
+    volume = panel['Volume'].reindex(columns=close.columns)
+    low = panel['Low'].reindex(columns=close.columns)
+
+    # Row of each symbol's last close, and a dates x symbols mask per window ending on it.
+    valid = close.notna().to_numpy()
+    last = len(close.index) - 1 - valid[::-1].argmax(axis=0)
+    columns = np.arange(len(close.columns))
+    dates = close.index.to_numpy()[:, None]
+    last_dates = dates[last, 0][None, :]
+    volume_rows = (dates <= last_dates) & (dates > last_dates - np.timedelta64(criteria.volume_days, 'D'))
+    low_rows = (dates <= last_dates) & (dates > last_dates - np.timedelta64(criteria.low_days, 'D'))
+    fresh = valid.any(axis=0) & (last_dates[0] >= dates[-1, 0] - np.timedelta64(criteria.max_stale_days, 'D'))
+
+    rsi = wilder_rsi(close, criteria.rsi_length)
+    result = pd.DataFrame({
+        'price': close.to_numpy()[last, columns],
+        '52wk_low': low.where(low_rows).min(),
+        'rsi': rsi.to_numpy()[last, columns],
+        'average_volume': volume.where(volume_rows).mean(),
+        'last_day_volume': volume.to_numpy()[last, columns],
+    }, index=close.columns)
+    return result.where(pd.Series(fresh, index=close.columns), axis=0)
+
+def rolling_indicators(panel, criteria=None):
+    """The same indicators on every bar instead of only the last one, as dates x symbols frames."""
+    criteria = criteria or Criteria()
+    close = panel['Close']
+    volume = panel['Volume']
+    return {
+        'price': close,
+        '52wk_low': panel['Low'].rolling(f'{criteria.low_days}D').min(),
+        'rsi': wilder_rsi(close, criteria.rsi_length),
+        'average_volume': volume.rolling(f'{criteria.volume_days}D').mean(),
+        'last_day_volume': volume,
+    }
+
+def signal_rule(values, criteria):
+    """The buy rules over indicator values; works on indicator columns and on rolling indicator frames alike."""
+    return (
+        (values['average_volume'] > criteria.min_average_volume)
+        & (values['last_day_volume'] > criteria.volume_multiple * values['average_volume'])
+        & (values['rsi'] < criteria.rsi_below)
+        & (values['price'] <= values['52wk_low'] * (1 + criteria.near_low))
+    )
+
+def screen(panel, criteria=None):
+    """Apply the buy rules to every symbol at once; returns the indicator frame with a boolean 'signal' column."""
+    criteria = criteria or Criteria()
+    result = indicators(panel, criteria)
+    result['signal'] = signal_rule(result, criteria)
+    return result
+
+def plays(result):
+    """Play dicts in the layout buyalert saves, for the symbols that signalled."""
+    hits = result[result['signal']]
+    return [
+        {
+            'ticker': symbol,
+            'price': float(row['price']),
+            '52wk_low': float(row['52wk_low']),
+            'rsi': float(row['rsi']),
+            'average_volume': int(row['average_volume']),
+            'last_day_volume': int(row['last_day_volume']),
+        }
+        for symbol, row in hits.iterrows()
+    ]
@@ -0,0 +1,109 @@
+import io
+import logging
+import os
+import re
+import time
+import zlib
+
+SCRIPT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CACHE_PATH = os.path.join(SCRIPT_PATH, 'quickplay', 'cache')
+LISTING_PATH = os.path.join(CACHE_PATH, 'nasdaqlisted.txt')
+
+NASDAQ_URL = 'ftp://ftp.nasdaqtrader.com/SymbolDirectory/nasdaqlisted.txt'
+MAX_AGE = 24 * 60 * 60
+
+# NASDAQ fifth-letter codes for warrants, units and rights.
+DERIVATIVE_SUFFIXES = ('W', 'U', 'R')
+# Security Name reads "<issuer> - <security type>"; only the type may say warrant, unit or right,
+# so an issuer such as "United Rights Holdings Inc. - Common Stock" is kept.
+DERIVATIVE_NAME_RE = re.compile(r' - .*?\b(?:Warrants?|Units?|Rights?)\b', re.IGNORECASE)
+# 'N' is normal; D, E, Q, G, H, J and K mark deficient, delinquent or bankrupt issuers.
+NORMAL_STATUS = ('N',)
+
+class RemoteDataError(Exception):
+    pass
+
+def download_listing(url=NASDAQ_URL, timeout=30):
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            text = response.read().decode('utf-8', errors='replace')
+    except Exception as e:
+        raise RemoteDataError(f"Failed to download NASDAQ symbols: {e}")
+    if not text.startswith('Symbol|') or 'File Creation Time' not in text:
+        raise RemoteDataError("Downloaded NASDAQ symbol file is incomplete")
+    return text
+
+def parse_listing(text):
+    import pandas as pd
+
+    listing = pd.read_csv(io.StringIO(text), sep='|', dtype=str, keep_default_na=False)
+    return listing[~listing['Symbol'].str.startswith('File Creation Time')].reset_index(drop=True)
+
+def _save_listing(text, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+def load_listing(path=LISTING_PATH, max_age=MAX_AGE, refresh=False, offline=False, retry_count=3, timeout=30, pause=None):
+    """nasdaqlisted.txt as a DataFrame, from the disk copy while it is younger than max_age seconds.
+
+    A stale or missing copy is downloaded again; if that fails the last good copy is used.
+    offline=True never touches the network.
+    """
+    exists = os.path.exists(path)
+    fresh = exists and time.time() - os.path.getmtime(path) < max_age
+    if offline or (fresh and not refresh):
+        if not exists:
+            raise RemoteDataError(f"No cached NASDAQ symbol file at {path}")
+        with open(path, 'r') as f:
+            return parse_listing(f.read())
+
+    while True:
+        try:
+            text = download_listing(timeout=timeout)
+            break
+        except RemoteDataError as e:
+            retry_count -= 1
+            if retry_count <= 0:
+                if not exists:
+                    raise
+                logging.warning(f"{e}; using the cached copy from {time.ctime(os.path.getmtime(path))}")
+                with open(path, 'r') as f:
+                    return parse_listing(f.read())
+            time.sleep(pause or timeout / 3)
+    _save_listing(text, path)
+    return parse_listing(text)
+
+def filter_listing(listing, exclude_test=True, exclude_etfs=True, exclude_derivatives=True, financial_status=NORMAL_STATUS):
+    """Drop rows that can never produce a play: test issues, ETFs, warrants/units/rights, troubled issuers."""
+    import pandas as pd
+
+    keep = pd.Series(True, index=listing.index)
+    if exclude_test:
+        keep &= listing['Test Issue'] != 'Y'
+    if exclude_etfs:
+        keep &= listing['ETF'] != 'Y'
+    if exclude_derivatives:
+        symbols = listing['Symbol']
+        suffixed = (symbols.str.len() == 5) & symbols.str[-1].isin(DERIVATIVE_SUFFIXES)
+        keep &= ~suffixed & ~listing['Security Name'].str.contains(DERIVATIVE_NAME_RE)
+    if financial_status:
+        keep &= listing['Financial Status'].isin(financial_status)
+    return listing[keep]
+
+def shard(symbols, index=0, count=1):
+    """The symbols belonging to shard index of count, assigned by a hash that is stable across machines."""
+    if count <= 1:
+        return list(symbols)
+    return [symbol for symbol in symbols if zlib.crc32(symbol.encode()) % count == index]
+
+def get_symbols(shard_index=0, shard_count=1, listing=None, **options):
+    """Filtered, sorted symbol list for one shard. Remaining keyword options go to load_listing and filter_listing."""
+    filter_options = {key: options.pop(key) for key in ('exclude_test', 'exclude_etfs', 'exclude_derivatives', 'financial_status') if key in options}
+    listing = listing if listing is not None else load_listing(**options)
+    symbols = sorted(filter_listing(listing, **filter_options)['Symbol'])
+    return shard(symbols, shard_index, shard_count)
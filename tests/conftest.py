@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import pytest
+
+class StubServer:
+    """A local HTTP server whose routes map a path to a function(handler) -> (status, headers, body).
+
+    A plain dict or list route is served as JSON. Every request is recorded, and active/peak
+    count how many were being handled at once.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append((self.path, dict(self.headers)))
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    route = stub.routes[self.path]
+                    status, headers, body = route(self) if callable(route) else (200, {}, json.dumps(route))
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+                body = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.base = f'http://127.0.0.1:{self._server.server_port}'
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return self.base + path
+
+    def hits(self, path):
+        return [headers for requested, headers in self.requests if requested == path]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+@pytest.fixture
+def slow():
+    """slow(seconds, body) is a route that serves body as JSON after sleeping for seconds."""
+    def slow_route(seconds, body):
+        def route(handler):
+            time.sleep(seconds)
+            return 200, {}, json.dumps(body)
+        return route
+    return slow_route
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    yield stub
+    stub.close()
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    """Point every store and output directory the downloader and pipeline use at tmp_path."""
+    from analysis import append, downloader, hashstore, pipeline, preprocessing, seriesstore, truncation
+    from analysis.datastore import DataStore
+    from analysis.hashstore import HashStore
+    from analysis.searchindex import SearchIndex
+
+    (tmp_path / 'hashes').mkdir()
+    hash_store = HashStore(str(tmp_path / 'hashes' / 'hashes.db'))
+    data_store = DataStore(str(tmp_path / 'data.db'))
+    search_index = SearchIndex(str(tmp_path / 'data.db'))
+    series_store = seriesstore.SeriesStore(str(tmp_path / 'series'))
+    for module in (hashstore, downloader, truncation, pipeline):
+        monkeypatch.setattr(module, 'get_store', lambda: hash_store)
+    monkeypatch.setattr(append, 'get_data_store', lambda: data_store)
+    monkeypatch.setattr(pipeline, 'get_search_index', lambda: search_index)
+    monkeypatch.setattr(seriesstore, 'get_series_store', lambda: series_store)
+    monkeypatch.setattr(downloader, 'HASH_PATH', str(tmp_path / 'hashes'))
+    for module in (downloader, truncation, preprocessing):
+        monkeypatch.setattr(module, 'PROCESSING_PATH', str(tmp_path / 'processing'))
+    monkeypatch.setattr(downloader, '_host_limits', {})
+    yield {'hashes': hash_store, 'data': data_store, 'index': search_index, 'series': series_store, 'path': tmp_path}
+    for store in (hash_store, data_store, search_index, series_store):
+        store.close()
+
+@pytest.fixture
+def make_panel():
+    """make_panel(days, symbols, seed) is a random-walk (field, symbol) panel of Close, Low and Volume."""
+    def random_panel(days=120, symbols=('AAA', 'BBB', 'CCC'), seed=0):
+        rng = np.random.default_rng(seed)
+        dates = pd.bdate_range('2023-01-02', periods=days)
+        frames = {}
+        for symbol in symbols:
+            close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+            frames[symbol] = pd.DataFrame({
+                'Close': close,
+                'Low': close * 0.99,
+                'Volume': rng.integers(1_000_000, 3_000_000, days).astype(float),
+            }, index=dates)
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    return random_panel
+
+@pytest.fixture
+def loose():
+    """Screener criteria loose enough that almost every seasoned bar signals."""
+    from quickplay.screener import Criteria
+
+    return Criteria(rsi_below=101, volume_multiple=0, near_low=10, min_average_volume=0, low_days=10)
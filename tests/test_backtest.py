@@ -0,0 +1,23 @@
+from quickplay.backtest import replay
+
+def test_replay_limits_signals_and_baseline_to_date_range(make_panel, loose):
+    panel = make_panel()
+    start, end = panel.index[40], panel.index[80]
+
+    trades, totals = replay(panel, loose, horizons=(1,), start=start, end=end)
+
+    assert len(trades)
+    assert trades['date'].min() >= start
+    assert trades['date'].max() <= end
+    all_trades, _ = replay(panel, loose, horizons=(1,))
+    inside = all_trades[(all_trades['date'] >= start) & (all_trades['date'] <= end)]
+    assert len(trades) == len(inside)
+    window = panel.index[(panel.index >= start) & (panel.index <= end)]
+    assert totals[1][1] == len(window) * panel['Close'].shape[1]
+
+def test_replay_accepts_start_or_end_alone(make_panel, loose):
+    panel = make_panel()
+    trades, _ = replay(panel, loose, horizons=(1,), start=str(panel.index[100].date()))
+    assert trades['date'].min() >= panel.index[100]
+    trades, _ = replay(panel, loose, horizons=(1,), end=str(panel.index[30].date()))
+    assert trades['date'].max() <= panel.index[30]
@@ -0,0 +1,27 @@
+import sys
+import pytest
+from analysis import benchmark
+
+@pytest.mark.parametrize('argv', [['nosuch'], ['clean_json', '--bogus'], ['suite', '--bogus']])
+def test_bad_arguments_exit_with_usage(monkeypatch, capsys, argv):
+    monkeypatch.setattr(sys, 'argv', ['benchmark', *argv])
+    with pytest.raises(SystemExit) as exit_info:
+        benchmark.main()
+    assert exit_info.value.code == 2
+    assert 'usage:' in capsys.readouterr().err
+
+def test_help_exits_cleanly(monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['benchmark', '--help'])
+    with pytest.raises(SystemExit) as exit_info:
+        benchmark.main()
+    assert exit_info.value.code == 0
+    assert 'clean_json' in capsys.readouterr().out
+
+def test_clean_json_reports_malformed_payloads_apart(tmp_path, capsys):
+    path = tmp_path / 'Rates_Data.txt'
+    path.write_text(benchmark.synthetic_payload(releases=20))
+    assert benchmark.bench_clean_json([str(path)], repeat=1)
+
+    out = capsys.readouterr().out
+    assert 'valid payloads (json.loads fast path):' in out
+    assert 'malformed payloads (repair_json tokenizer):' in out
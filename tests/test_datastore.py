@@ -0,0 +1,46 @@
+import json
+from analysis.datastore import date_key, migrate_json_files
+from analysis.module import DataObject
+
+def test_upsert_keeps_stored_columns_the_update_leaves_empty(stores):
+    store = stores['data']
+    store.upsert_many([DataObject('FRED_3', url='https://fred.example/3', headline='Releases', date='February 27, 2024')])
+    store.upsert_many([DataObject('FRED_3', date='March 5, 2024', copyright='FRED')])
+
+    assert store.get('FRED_3') == DataObject('FRED_3', url='https://fred.example/3', headline='Releases',
+                                             date='March 5, 2024', copyright='FRED')
+    assert len(store) == 1
+    row = store._conn.execute('SELECT source, chunk, date_key FROM data_objects').fetchone()
+    assert row == ('FRED', 3, '2024-03-05')
+
+def test_query_filters_by_source_and_date(stores):
+    store = stores['data']
+    store.upsert_many([
+        DataObject('FRED_2', date='February 27, 2024'),
+        DataObject('FRED_10', date='March 5, 2024'),
+        DataObject('Repo_Results_1', date='February 28, 2024'),
+        DataObject('Rates', date='not a date'),
+    ])
+    assert [obj.base_name for obj in store.query(source='FRED')] == ['FRED_2', 'FRED_10']
+    assert [obj.base_name for obj in store.query(date_from='2024-02-28')] == ['FRED_10', 'Repo_Results_1']
+    assert [obj.base_name for obj in store.query(source='Repo_Results', date_to='2024-02-28')] == ['Repo_Results_1']
+    assert store.get('Rates').date == 'not a date' and store.query(base_name='Rates')[0].base_name == 'Rates'
+    assert store.get('missing') is None
+    assert len(store.load_batch(source='FRED')) == 2
+
+def test_date_key():
+    assert date_key('February 27, 2024') == '2024-02-27'
+    assert date_key('February 30, 2024') is None
+    assert date_key(None) is None
+
+def test_migrate_legacy_json_files(stores):
+    directory = stores['path'] / 'legacy'
+    directory.mkdir()
+    legacy = {'base_name': 'FRED_1', 'url': 'https://fred.example/1', 'headline': None, 'summary': None,
+              'date': 'February 27, 2024', 'copyright': None}
+    (directory / 'FRED_1.json').write_text(json.dumps(legacy, indent=4))
+    stores['data'].upsert_many([DataObject('FRED_1', copyright='FRED')])
+
+    assert migrate_json_files(stores['data'], str(directory), remove=True) == 1
+    assert stores['data'].get('FRED_1') == DataObject('FRED_1', url='https://fred.example/1', date='February 27, 2024', copyright='FRED')
+    assert list(directory.iterdir()) == []
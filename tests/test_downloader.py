@@ -0,0 +1,113 @@
+import json
+import os
+import time
+import pytest
+from analysis import downloader
+
+PAYLOAD = {'refRates': [{'effectiveDate': '2024-02-27', 'type': 'EFFR', 'percentRate': 5.33}]}
+ETAG = '"rates-1"'
+LAST_MODIFIED = 'Tue, 27 Feb 2024 08:00:00 GMT'
+
+def conditional(handler):
+    if handler.headers.get('If-None-Match') == ETAG or handler.headers.get('If-Modified-Since') == LAST_MODIFIED:
+        return 304, {'ETag': ETAG, 'Last-Modified': LAST_MODIFIED}, b''
+    return 200, {'ETag': ETAG, 'Last-Modified': LAST_MODIFIED}, json.dumps(PAYLOAD)
+
+def failing(times, status=503):
+    calls = []
+    def route(handler):
+        calls.append(time.monotonic())
+        if len(calls) <= times:
+            return status, {}, b''
+        return 200, {}, json.dumps(PAYLOAD)
+    route.calls = calls
+    return route
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(downloader, 'BACKOFF_FACTOR', 0.05)
+
+def test_not_modified_is_skipped_and_validators_are_persisted(server, stores):
+    server.routes['/rates.json'] = conditional
+    urls = [(server.url('/rates.json'), 'Rates_Data.txt')]
+
+    assert [file_name for file_name, _ in downloader.iter_updates(urls)] == ['Rates_Data.txt']
+    first = server.hits('/rates.json')[0]
+    assert 'If-None-Match' not in first and 'If-Modified-Since' not in first
+    with open(os.path.join(stores['path'], 'hashes', 'validators.json')) as f:
+        assert json.load(f) == {'Rates_Data.txt': {'url': urls[0][0], 'etag': ETAG, 'last_modified': LAST_MODIFIED}}
+
+    assert list(downloader.iter_updates(urls)) == []
+    second = server.hits('/rates.json')[1]
+    assert second['If-None-Match'] == ETAG
+    assert second['If-Modified-Since'] == LAST_MODIFIED
+
+def test_validators_are_only_reused_for_the_same_url(server, stores):
+    server.routes['/rates.json'] = conditional
+    server.routes['/rates-v2.json'] = conditional
+    list(downloader.iter_updates([(server.url('/rates.json'), 'Rates_Data.txt')]))
+
+    list(downloader.iter_updates([(server.url('/rates-v2.json'), 'Rates_Data.txt')]))
+    moved = server.hits('/rates-v2.json')[0]
+    assert 'If-None-Match' not in moved and 'If-Modified-Since' not in moved
+    assert downloader.load_validators()['Rates_Data.txt']['url'] == server.url('/rates-v2.json')
+
+def test_server_errors_are_retried_with_backoff(server, stores):
+    server.routes['/rates.json'] = route = failing(2)
+    updates = list(downloader.iter_updates([(server.url('/rates.json'), 'Rates_Data.txt')]))
+
+    assert [file_name for file_name, _ in updates] == ['Rates_Data.txt']
+    assert len(route.calls) == 3
+    # urllib3 sleeps backoff_factor * 2 ** (retry - 1) before the second retry.
+    assert route.calls[2] - route.calls[1] >= downloader.BACKOFF_FACTOR * 2 * 0.9
+
+def test_persistent_server_errors_fail_only_that_endpoint(server, stores):
+    server.routes['/rates.json'] = route = failing(100, 500)
+    server.routes['/other.json'] = PAYLOAD
+    urls = [(server.url('/rates.json'), 'Rates_Data.txt'), (server.url('/other.json'), 'Other_Data.txt')]
+
+    assert [file_name for file_name, _ in downloader.iter_updates(urls)] == ['Other_Data.txt']
+    assert len(route.calls) == downloader.RETRIES + 1
+    assert 'Rates_Data.txt' not in downloader.load_hashes()
+
+def test_timeouts_fail_only_that_endpoint(server, stores, monkeypatch, slow):
+    monkeypatch.setattr(downloader, 'TIMEOUT', (1, 0.2))
+    server.routes['/slow.json'] = slow(1.0, PAYLOAD)
+    server.routes['/other.json'] = PAYLOAD
+    urls = [(server.url('/slow.json'), 'Slow_Data.txt'), (server.url('/other.json'), 'Other_Data.txt')]
+
+    started = time.monotonic()
+    assert [file_name for file_name, _ in downloader.iter_updates(urls)] == ['Other_Data.txt']
+    assert time.monotonic() - started < 5
+    assert 'Slow_Data.txt' not in downloader.load_validators()
+
+def test_requests_per_host_are_limited(server, stores, monkeypatch, slow):
+    monkeypatch.setattr(downloader, 'MAX_PER_HOST', 2)
+    urls = []
+    for i in range(6):
+        server.routes[f'/{i}.json'] = slow(0.2, {'id': i, 'value': i + 1})
+        urls.append((server.url(f'/{i}.json'), f'Source{i}_Data.txt'))
+
+    assert len(list(downloader.iter_updates(urls))) == 6
+    assert server.peak == 2
+
+def test_validators_of_handled_payloads_survive_a_failing_consumer(server, stores):
+    paths = {'Rates_Data.txt': '/rates.json', 'Other_Data.txt': '/other.json'}
+    urls = [(server.url(path), file_name) for file_name, path in paths.items()]
+    for path in paths.values():
+        server.routes[path] = conditional
+
+    handled = []
+    with pytest.raises(RuntimeError):
+        for file_name, _ in downloader.iter_updates(urls):
+            if handled:
+                raise RuntimeError('preprocessing failed')
+            handled.append(file_name)
+    failed, = set(paths) - set(handled)
+    assert list(downloader.load_validators()) == handled
+    assert list(downloader.load_hashes()) == handled
+
+    # The handled payload is revalidated instead of fetched in full; the failed one is offered again.
+    assert [file_name for file_name, _ in downloader.iter_updates(urls)] == [failed]
+    assert server.hits(paths[handled[0]])[1]['If-None-Match'] == ETAG
+    assert 'If-None-Match' not in server.hits(paths[failed])[1]
@@ -0,0 +1,41 @@
+import pytest
+from analysis.extractors import extract, extract_date, extract_files, extract_url
+
+@pytest.mark.parametrize('content, date', [
+    ('"2024-02-27" then "03/05/2024"', 'March 05, 2024'),  # m-d-Y beats an earlier Y-m-d
+    ('"February 27, 2024" then "2024-03-05"', 'March 05, 2024'),  # Y-m-d beats an earlier "B d, Y"
+    ('"5 March, 2024" then "February 27, 2024"', 'February 27, 2024'),  # "B d, Y" beats "d B, Y"
+    ('"5 March, 2024"', 'March 05, 2024'),
+    ('"03/05/2024" and "04/06/2024"', 'March 05, 2024'),  # the first of equal priority wins
+    ('"2024/2/7"', 'February 07, 2024'),
+    ('"february 27, 2024"', 'February 27, 2024'),
+])
+def test_date_priority(content, date):
+    assert extract_date(content) == date
+
+@pytest.mark.parametrize('content, date', [
+    ('"02/30/2024" then "2024-03-05"', 'March 05, 2024'),  # an impossible date falls through to the next pattern
+    ('"13/01/2024"', None),
+    ('"Smarch 5, 2024"', None),
+    ('"1234-12-12345"', None),
+    ('"12-12-12"', None),
+    ('no dates here', None),
+])
+def test_invalid_dates_are_skipped(content, date):
+    assert extract_date(content) == date
+
+def test_url_is_the_first_match_and_dates_inside_it_count():
+    content = '"see https://www.federalregister.gov/documents/2024/02/28/x and http://example.org"'
+    assert extract(content) == ('https://www.federalregister.gov/documents/2024/02/28/x', 'February 28, 2024')
+    assert extract_url(content) == 'https://www.federalregister.gov/documents/2024/02/28/x'
+    assert extract('nothing') == (None, None)
+
+def test_extract_files_keeps_order_on_a_pool(tmp_path):
+    paths = []
+    for i in range(1, 7):
+        path = tmp_path / f'{i}.txt'
+        path.write_text(f'"https://example.org/{i}" "2024-02-{i:02d}"')
+        paths.append(str(path))
+    expected = [(f'https://example.org/{i}', f'February {i:02d}, 2024') for i in range(1, 7)]
+    assert extract_files(paths) == expected
+    assert extract_files(paths, workers=2) == expected
@@ -0,0 +1,67 @@
+from analysis import hashstore
+from analysis.hashstore import DOWNLOADER, TRUNCATION, HashStore
+
+def test_same_digest_is_stored_once_per_namespace_and_name(stores):
+    store = stores['hashes']
+    store.add(DOWNLOADER, 'Rates_Data.txt', 'aaa')
+    store.add(DOWNLOADER, 'Rates_Data.txt', 'aaa')
+    store.add(TRUNCATION, 'Rates_0_Truncated', 'aaa')
+
+    count, = store._conn.execute('SELECT COUNT(*) FROM hashes').fetchone()
+    assert count == 2
+    assert store.contains(DOWNLOADER, 'aaa') and store.contains(TRUNCATION, 'aaa')
+    assert not store.contains(DOWNLOADER, 'bbb')
+
+def test_latest_is_the_most_recently_added_digest(stores):
+    store = stores['hashes']
+    store.add_many(DOWNLOADER, [('Rates_Data.txt', 'aaa'), ('FRED_Data.txt', 'fff')])
+    store.add(DOWNLOADER, 'Rates_Data.txt', 'bbb')
+    assert store.latest(DOWNLOADER, 'Rates_Data.txt') == 'bbb'
+
+    # A payload that flips back to an earlier version is the latest again.
+    store.add(DOWNLOADER, 'Rates_Data.txt', 'aaa')
+    assert store.latest(DOWNLOADER, 'Rates_Data.txt') == 'aaa'
+    assert store.latest_all(DOWNLOADER) == {'Rates_Data.txt': 'aaa', 'FRED_Data.txt': 'fff'}
+    assert store.latest(DOWNLOADER, 'missing') is None
+    assert store.latest_all(TRUNCATION) == {}
+
+def test_transaction_rolls_back_every_add(stores):
+    store = stores['hashes']
+    try:
+        with store.transaction():
+            store.add(DOWNLOADER, 'Rates_Data.txt', 'aaa')
+            with store.transaction():
+                store.add(TRUNCATION, 'Rates_0_Truncated', 'ccc')
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert store.latest_all(DOWNLOADER) == {} and not store.contains(TRUNCATION, 'ccc')
+
+def test_prune_keeps_recent_and_latest_digests(stores, monkeypatch):
+    store = stores['hashes']
+    monkeypatch.setattr(hashstore.time, 'time', lambda: 0.0)
+    store.add_many(DOWNLOADER, [('Rates_Data.txt', 'old'), ('FRED_Data.txt', 'only')])
+    monkeypatch.setattr(hashstore.time, 'time', lambda: 40 * 86400.0)
+    store.add(DOWNLOADER, 'Rates_Data.txt', 'new')
+
+    assert store.prune(DOWNLOADER, 30) == 1
+    assert not store.contains(DOWNLOADER, 'old')
+    assert store.latest_all(DOWNLOADER) == {'Rates_Data.txt': 'new', 'FRED_Data.txt': 'only'}
+
+def test_legacy_hash_files_are_imported_once(stores):
+    directory = stores['path'] / 'legacy'
+    directory.mkdir()
+    (directory / 'downloader.txt').write_text("Rates_Data.txt = 'aaa'\nFRED_Data.txt='fff'\n\n")
+    (directory / 'truncation.txt').write_text("ccc\n\nddd\n")
+
+    store = HashStore(str(directory / 'hashes.db'))
+    assert store.latest_all(DOWNLOADER) == {'Rates_Data.txt': 'aaa', 'FRED_Data.txt': 'fff'}
+    assert store.contains(TRUNCATION, 'ccc') and store.contains(TRUNCATION, 'ddd')
+    store.add(DOWNLOADER, 'Rates_Data.txt', 'bbb')
+    store.close()
+
+    (directory / 'downloader.txt').write_text("Rates_Data.txt = 'zzz'\n")
+    store = HashStore(str(directory / 'hashes.db'))
+    assert store.latest(DOWNLOADER, 'Rates_Data.txt') == 'bbb'
+    assert not store.contains(DOWNLOADER, 'zzz')
+    store.close()
@@ -0,0 +1,61 @@
+import json
+import os
+import pytest
+from quickplay.journal import PlayJournal
+
+def play(ticker, price):
+    return {'ticker': ticker, 'price': price, '52wk_low': price * 0.9, 'rsi': 25.0, 'average_volume': 2_000_000, 'last_day_volume': 4_000_000}
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = PlayJournal(str(tmp_path / 'play' / 'plays.db'))
+    yield journal
+    journal.close()
+
+def test_record_and_query(journal):
+    first = journal.record([play('AAPL', 170.0), play('MSFT', 400.0)], 'run-1', '2024-03-01T21:00:00+00:00')
+    second = journal.record([play('AAPL', 165.0)], 'run-2', '2024-03-04T21:00:00+00:00')
+    assert len(first) == 2 and second[0] > first[-1]
+
+    entries = journal.query(ticker='AAPL')
+    assert [entry['play']['price'] for entry in entries] == [170.0, 165.0]
+    assert entries[0]['play'] == play('AAPL', 170.0)
+    assert entries[0]['run_id'] == 'run-1' and entries[0]['timestamp'] == '2024-03-01T21:00:00+00:00'
+    assert [entry['play']['ticker'] for entry in journal.query(since='2024-03-01', until='2024-03-02')] == ['AAPL', 'MSFT']
+    assert [entry['id'] for entry in journal.query(run_id='run-2')] == second
+    assert journal.count('AAPL') == 2 and journal.count('TSLA') == 0
+
+def test_export_numbers_each_ticker_from_one(journal, tmp_path):
+    journal.record([play('AAPL', 170.0), play('MSFT', 400.0)], 'run-1')
+    journal.record([play('AAPL', 165.0)], 'run-2')
+
+    journal.export_json(journal.query(run_id='run-2'), str(tmp_path / 'export'))
+    assert os.listdir(tmp_path / 'export') == ['AAPL_2.json']
+    assert json.loads((tmp_path / 'export' / 'AAPL_2.json').read_text()) == play('AAPL', 165.0)
+
+def test_legacy_play_files_are_imported_in_number_order(tmp_path):
+    directory = tmp_path / 'play'
+    directory.mkdir()
+    for number, price in ((1, 170.0), (2, 168.0), (10, 150.0)):
+        path = directory / f'AAPL_{number}.json'
+        path.write_text(json.dumps({key: value for key, value in play('AAPL', price).items() if key != 'ticker'}))
+        os.utime(path, (1_709_326_800 + number, 1_709_326_800 + number))
+    (directory / 'BRK_B_1.json').write_text(json.dumps(play('BRK_B', 400.0)))
+    (directory / 'notes.json').write_text('{}')
+
+    journal = PlayJournal(str(directory / 'plays.db'))
+    entries = journal.query(ticker='AAPL')
+    assert [entry['play']['price'] for entry in entries] == [170.0, 168.0, 150.0]
+    assert {entry['run_id'] for entry in entries} == {'legacy'}
+    assert entries[0]['timestamp'] == '2024-03-01T21:00:01+00:00'
+    assert journal.count('BRK_B') == 1 and len(journal.query()) == 4
+
+    journal.export_json(entries[-1:], str(tmp_path / 'export'))
+    assert os.listdir(tmp_path / 'export') == ['AAPL_3.json']
+    journal.close()
+
+    # The import only runs when the database is created.
+    (directory / 'AAPL_11.json').write_text(json.dumps(play('AAPL', 140.0)))
+    journal = PlayJournal(str(directory / 'plays.db'))
+    assert journal.count('AAPL') == 3
+    journal.close()
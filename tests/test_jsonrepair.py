@@ -0,0 +1,57 @@
+import json
+import random
+import pytest
+from analysis.jsonrepair import iter_leaves, repair_json
+from analysis.truncation import flatten_json
+
+def leaves(text, chunk_sizes=None):
+    if chunk_sizes is None:
+        chunks = [text]
+    else:
+        rng = random.Random(chunk_sizes)
+        chunks, pos = [], 0
+        while pos < len(text):
+            size = rng.randint(1, 7)
+            chunks.append(text[pos:pos + size])
+            pos += size
+    return {'_'.join(map(str, path)): value for path, value in iter_leaves(chunks)}
+
+@pytest.mark.parametrize('text', [
+    '{"a": }',
+    '{"a" "b"}',
+    '{"a": 1 2}',
+    '{"a": "x" "y": 2}',
+    '{"a": {"b": 1} "c": 2}',
+    '[1: 2]',
+    '{"a": [1: 2]}',
+    ': 1',
+])
+def test_malformed_input_raises_instead_of_dropping_data(text):
+    with pytest.raises(json.JSONDecodeError):
+        repair_json(text)
+    with pytest.raises(json.JSONDecodeError):
+        leaves(text)
+
+@pytest.mark.parametrize('text, expected', [
+    ('{a: 1, b: [1, 2,], c: {d: nul,},}', {'a': 1, 'b': [1, 2], 'c': {'d': None}}),
+    ("{'a': 'b', 'c': truee}", {'a': 'b', 'c': True}),
+    ('{"a": "he said "hi" there", "b": 2}', {'a': 'he said "hi" there', 'b': 2}),
+    ('[{"a": 1} {"b": 2}]', [{'a': 1}, {'b': 2}]),
+    ('[1 2 3]', [1, 2, 3]),
+    ('{"a": *}', {'a': None}),
+])
+def test_repairs(text, expected):
+    assert repair_json(text) == expected
+
+@pytest.mark.parametrize('text', [
+    '{"a": 1, "b": [1, 2.5, {"c": "x\\"y"}], "d": null, "e": true}',
+    '{"a": "he said "hi" there", "b": 2}',
+    "{'a': 'b', c: nul, d: *}",
+    '{"a": [[], {}], "b": "\\u00e9t\\u00e9", "c": -1e5}',
+    '{"k": "v" , "q": "x y z"   }',
+    '"top"',
+])
+def test_streamed_leaves_match_repair_json_at_any_chunk_boundary(text):
+    expected = flatten_json(repair_json(text))
+    for seed in range(20):
+        assert leaves(text, seed) == expected
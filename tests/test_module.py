@@ -0,0 +1,40 @@
+import json
+from analysis.module import DataObject, DataObjectBatch, split_base_name
+
+# What the original DataObject.to_json wrote: json.dumps(self.__dict__, indent=4).
+LEGACY_JSON = """{
+    "base_name": "FRED_1",
+    "url": "https://fred.example/1",
+    "headline": null,
+    "summary": null,
+    "date": "February 27, 2024",
+    "copyright": "FRED"
+}"""
+
+def test_from_json_reads_the_legacy_format():
+    assert DataObject.from_json(LEGACY_JSON) == DataObject('FRED_1', url='https://fred.example/1', date='February 27, 2024', copyright='FRED')
+    assert DataObject.from_json('{"base_name": "Rates", "date": "March 5, 2024"}') == DataObject('Rates', date='March 5, 2024')
+
+def test_to_json_round_trips():
+    data_obj = DataObject('FRED_1', url='https://fred.example/1', date='February 27, 2024')
+    assert DataObject.from_json(data_obj.to_json()) == data_obj
+    assert DataObject.from_json(data_obj.to_json(indent=4)) == data_obj
+    assert json.loads(data_obj.to_json(indent=4)) == json.loads(LEGACY_JSON) | {'copyright': None}
+
+def test_batch_reads_columnar_and_legacy_layouts():
+    objects = [DataObject('FRED_1', url='u1'), DataObject('Rates_2', date='March 5, 2024')]
+    batch = DataObjectBatch(objects)
+    assert list(DataObjectBatch.from_json(batch.to_json())) == objects
+    assert list(DataObjectBatch.from_json(LEGACY_JSON)) == [DataObject.from_json(LEGACY_JSON)]
+    assert list(DataObjectBatch.from_json(json.dumps([obj.to_dict() for obj in objects]))) == objects
+    assert batch[1] == objects[1] and len(batch) == 2
+
+def test_assign_by_source_matches_exact_then_contained_prefix():
+    batch = DataObjectBatch([DataObject('FRED_1'), DataObject('FRED_2'), DataObject('Repo_Results_1'), DataObject('Other_1')])
+    batch.assign_by_source('copyright', {'FRED': 'St. Louis Fed', 'Repo': 'New York Fed'})
+    assert batch.copyright == ['St. Louis Fed', 'St. Louis Fed', 'New York Fed', None]
+    assert batch.sources() == ['FRED', 'FRED', 'Repo_Results', 'Other']
+
+def test_split_base_name():
+    assert split_base_name('Repo_Results_12') == ('Repo_Results', 12)
+    assert split_base_name('Rates') == ('Rates', None)
@@ -0,0 +1,36 @@
+import pytest
+from analysis import pipeline
+
+RATES = {'refRates': [{'effectiveDate': '2024-02-27', 'type': 'EFFR', 'percentRate': 5.33, 'volumeInBillions': 100}]}
+FEDERAL_REGISTER = {'results': [
+    {'title': f'Notice of a public meeting of the advisory committee on item {i}, with enough text to prepare.',
+     'html_url': f'https://www.federalregister.gov/documents/2024/02/28/{i}', 'filed_at': 'February 27, 2024'}
+    for i in range(5)
+]}
+
+def lowercase(text):
+    return text.lower()
+
+def urls(server):
+    server.routes.update({'/rates.json': RATES, '/fr.json': FEDERAL_REGISTER})
+    return [(server.url('/rates.json'), 'Rates_Data.txt'), (server.url('/fr.json'), 'Public_Inspection_Data.txt')]
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_failed_run_is_processed_again(server, stores, monkeypatch, stream):
+    def missing_tokenizer(text):
+        raise LookupError("Resource punkt_tab not found.")
+
+    monkeypatch.setattr(pipeline, 'preprocess_document', missing_tokenizer)
+    with pytest.raises(LookupError):
+        pipeline.run(urls(server), stream=stream)
+    # Rates_Data has nothing to preprocess, so it may finish and be recorded before the other fails.
+    assert 'Public_Inspection_Data.txt' not in stores['hashes'].latest_all('downloader')
+    saved = len(stores['data'])
+
+    monkeypatch.setattr(pipeline, 'preprocess_document', lowercase)
+    data_objects = pipeline.run(urls(server), stream=stream)
+    assert len(data_objects) == len(stores['data']) - saved > 0
+    assert len(stores['index']) > 0
+    assert set(stores['hashes'].latest_all('downloader')) == {'Rates_Data.txt', 'Public_Inspection_Data.txt'}
+
+    assert len(pipeline.run(urls(server), stream=stream)) == 0
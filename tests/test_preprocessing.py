@@ -0,0 +1,13 @@
+import nltk
+import pytest
+from analysis.preprocessing import check_nltk_data
+
+def test_missing_punkt_tab_is_reported(monkeypatch):
+    def find(resource):
+        if resource == 'tokenizers/punkt_tab':
+            raise LookupError(resource)
+        return resource
+
+    monkeypatch.setattr(nltk.data, 'find', find)
+    with pytest.raises(LookupError, match=r'python -m nltk\.downloader punkt_tab$'):
+        check_nltk_data()
@@ -0,0 +1,78 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from quickplay.marketdata import to_panel
+from quickplay.pricecache import MARKET_TIMEZONE, PriceCache, update_history
+
+TODAY = datetime.date(2024, 6, 28)
+
+class FakeSource:
+    """Daily bars for `listed` symbols; any batch containing a symbol in `broken` raises."""
+
+    def __init__(self, listed, broken=()):
+        self.listed = set(listed)
+        self.broken = set(broken)
+        self.last_close = 10.0
+        self.calls = []
+
+    def fetch(self, symbols, period='60d', start=None):
+        self.calls.append(list(symbols))
+        if self.broken & set(symbols):
+            raise ConnectionError('rate limited')
+        dates = pd.bdate_range(end=pd.Timestamp(TODAY), periods=30)
+        bars = np.full((len(dates), 5), 10.0)
+        bars[-1, 3] = self.last_close
+        frames = {symbol: pd.DataFrame(bars, index=dates, columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+                  for symbol in symbols if symbol in self.listed}
+        if not frames:
+            return to_panel(None)
+        return to_panel(pd.concat(frames, axis=1).swaplevel(axis=1), list(symbols))
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PriceCache(str(tmp_path / 'prices.db'))
+    yield cache
+    cache.close()
+
+def update(cache, source, symbols, now=None):
+    return update_history(symbols, source, cache=cache, today=TODAY, now=now, batch_size=2, workers=1, rate=None)
+
+def at(hour):
+    return datetime.datetime.combine(TODAY, datetime.time(hour), MARKET_TIMEZONE).timestamp()
+
+def test_errored_batch_is_not_backed_off(cache):
+    source = FakeSource(listed=['AAA', 'BBB', 'CCC'], broken=['CCC'])
+    panel = update(cache, source, ['AAA', 'BBB', 'CCC', 'DDD'])
+
+    assert set(panel.columns.get_level_values(1)) == {'AAA', 'BBB'}
+    # CCC and DDD shared the batch that raised, so neither has told us it has no data.
+    assert cache.failing() == []
+    assert cache.due(['CCC', 'DDD']) == ['CCC', 'DDD']
+
+def test_only_symbols_without_rows_in_a_successful_batch_are_backed_off(cache):
+    source = FakeSource(listed=['AAA', 'CCC'])
+    update(cache, source, ['AAA', 'BBB', 'CCC'])
+
+    assert [row[0] for row in cache.failing()] == ['BBB']
+    assert cache.due(['AAA', 'BBB', 'CCC']) == ['AAA', 'CCC']
+
+def test_successful_fetch_resets_backoff(cache):
+    cache.record_failures(['AAA'], 'no data returned', now=1.0)
+    update(cache, FakeSource(listed=['AAA']), ['AAA'])
+
+    assert cache.failing() == []
+
+def test_bar_fetched_before_the_close_is_refreshed_after_it(cache):
+    source = FakeSource(listed=['AAA'])
+    update(cache, source, ['AAA'], now=at(11))
+    source.last_close = 12.0
+
+    panel = update(cache, source, ['AAA'], now=at(17))
+    # Only the incremental fetch: the intraday close differing from the final one is not a re-adjustment.
+    assert len(source.calls) == 2
+    assert panel['Close', 'AAA'].iloc[-1] == 12.0
+    assert cache.closes_on(TODAY, ['AAA']) == {'AAA': 12.0}
+
+    update(cache, source, ['AAA'], now=at(18))
+    assert len(source.calls) == 2
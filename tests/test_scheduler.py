@@ -0,0 +1,149 @@
+import datetime
+import json
+import threading
+import pytest
+from analysis import hashstore, scheduler
+from analysis.hashstore import DOWNLOADER, TRUNCATION
+
+def test_maintenance_job_prunes_and_compacts_the_hash_store(stores, monkeypatch):
+    store = stores['hashes']
+    monkeypatch.setattr(hashstore.time, 'time', lambda: 0.0)
+    store.add_many(DOWNLOADER, [('Rates_Data.txt', 'old')])
+    store.add_many(TRUNCATION, [('Rates_0_Truncated', 'chunk-old')])
+    monkeypatch.setattr(hashstore.time, 'time', lambda: 200 * 86400.0)
+    store.add_many(DOWNLOADER, [('Rates_Data.txt', 'new')])
+    store.add_many(TRUNCATION, [('Rates_0_Truncated', 'chunk-new')])
+    compacted = []
+    monkeypatch.setattr(store, 'compact', lambda: compacted.append(True))
+
+    job = next(job for job in scheduler.default_jobs(scan=False) if job.name == 'maintenance')
+    assert job.interval == scheduler.MAINTENANCE_INTERVAL
+    assert job.action(job) == 2
+    assert compacted
+    assert store.latest_all(DOWNLOADER) == {'Rates_Data.txt': 'new'}
+    assert not store.contains(TRUNCATION, 'chunk-old') and store.contains(TRUNCATION, 'chunk-new')
+
+    compacted.clear()
+    assert job.action(job) == scheduler.SKIPPED
+    assert not compacted
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler, 'time', clock)
+    monkeypatch.setattr(scheduler.metrics.METRICS, 'write', lambda *args: None)
+    return clock
+
+def make_scheduler(jobs, tmp_path, **options):
+    return scheduler.Scheduler(jobs, state_path=str(tmp_path / 'scheduler.json'), **options)
+
+def wait_idle(runner):
+    while any(job.running for job in runner.jobs.values()):
+        runner._wake.wait(5)
+        runner._wake.clear()
+
+def blocking_job(name, interval, release, started):
+    def action(job):
+        started.append(job.name)
+        release.wait(5)
+        return 1
+    return scheduler.Job(name, action, interval)
+
+def test_intervals_come_from_source_intervals_and_overrides():
+    jobs = {job.name: job.interval for job in scheduler.default_jobs({'Rates': 60.0}, scan=False)}
+    assert jobs['Public_Inspection'] == scheduler.SOURCE_INTERVALS['Public_Inspection']
+    assert jobs['FRED'] == scheduler.DAY
+    assert jobs['Rates'] == 60.0
+    assert jobs['Repo_Results'] == scheduler.DEFAULT_INTERVAL
+    assert 'buyalert' not in jobs
+    assert scheduler.default_jobs()[-1].name == 'buyalert'
+
+def test_due_jobs_wait_for_a_free_slot(clock, tmp_path):
+    release, started = threading.Event(), []
+    jobs = [blocking_job(name, 60, release, started) for name in ('a', 'b', 'c')]
+    runner = make_scheduler(jobs, tmp_path, workers=3, max_pending=2)
+
+    assert runner.run_pending() is False
+    assert sum(job.running for job in jobs) == 2
+    release.set()
+    wait_idle(runner)
+    assert runner.run_pending() is True
+    wait_idle(runner)
+    assert sorted(started) == ['a', 'b', 'c']
+    runner.stop()
+
+def test_next_run_is_an_interval_after_the_last_start(clock, tmp_path):
+    calls = []
+    job = scheduler.Job('Rates', lambda job: calls.append(clock.now) or 1, 3600)
+    runner = make_scheduler([job], tmp_path)
+
+    runner.run_pending()
+    wait_idle(runner)
+    assert job.last_run == clock.now and job.next_run == clock.now + 3600
+    clock.now += 3599
+    runner.run_pending()
+    wait_idle(runner)
+    assert len(calls) == 1
+    assert runner.next_wake() == 1
+    clock.now += 1
+    runner.run_pending()
+    wait_idle(runner)
+    assert len(calls) == 2
+
+def test_failed_job_is_still_rescheduled(clock, tmp_path):
+    def fail(job):
+        raise RuntimeError('upstream down')
+
+    job = scheduler.Job('Rates', fail, 60)
+    runner = make_scheduler([job], tmp_path)
+    runner.run_pending()
+    wait_idle(runner)
+    assert not job.running and job.next_run == clock.now + 60
+
+def test_state_is_reloaded_after_a_restart(clock, tmp_path):
+    def action(job):
+        job.state['session'] = '2024-02-27'
+        return 1
+
+    runner = make_scheduler([scheduler.Job('buyalert', action, 3600)], tmp_path)
+    runner.run_pending()
+    wait_idle(runner)
+
+    clock.now += 600
+    job = scheduler.Job('buyalert', action, 3600)
+    restarted = make_scheduler([job, scheduler.Job('new', action, 60)], tmp_path)
+    assert job.last_run == clock.now - 600 and job.next_run == clock.now + 3000
+    assert job.state == {'session': '2024-02-27'}
+    assert restarted.jobs['new'].next_run == 0.0
+    assert json.loads((tmp_path / 'scheduler.json').read_text())['buyalert']['state'] == {'session': '2024-02-27'}
+
+def test_pipeline_runs_one_at_a_time(monkeypatch):
+    from analysis import pipeline
+
+    called = threading.Event()
+    monkeypatch.setattr(pipeline, 'run', lambda urls, stream=False: called.set() or [])
+    action = scheduler.pipeline_action([('http://example.invalid', 'Rates_Data.txt')])
+    results = []
+    with scheduler._pipeline_lock:
+        thread = threading.Thread(target=lambda: results.append(action(None)))
+        thread.start()
+        assert not called.wait(0.2)
+    thread.join(5)
+    assert called.is_set() and results == [scheduler.SKIPPED]
+
+@pytest.mark.parametrize('local, session', [
+    ('2024-03-01 17:00', '2024-03-01'),  # Friday after the close
+    ('2024-03-01 15:00', '2024-02-29'),  # Friday before the close
+    ('2024-03-02 12:00', '2024-03-01'),  # Saturday
+    ('2024-03-04 09:30', '2024-03-01'),  # Monday morning
+])
+def test_latest_session(local, session):
+    moment = datetime.datetime.strptime(local, '%Y-%m-%d %H:%M').replace(tzinfo=scheduler.MARKET_TIMEZONE)
+    assert scheduler.latest_session(moment.timestamp()) == session
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from quickplay.screener import Criteria, indicators, rolling_indicators, screen
+
+def test_indicators_match_rolling_indicators_on_last_bar(make_panel):
+    panel = make_panel()
+    values = rolling_indicators(panel, Criteria())
+    expected = pd.DataFrame({name: frame.iloc[-1] for name, frame in values.items()})
+    pd.testing.assert_frame_equal(indicators(panel), expected, check_names=False)
+
+def test_symbol_missing_latest_bar_uses_its_own_last_row(make_panel, loose):
+    panel = make_panel()
+    lagging = panel.copy()
+    lagging.loc[lagging.index[-1], (slice(None), 'BBB')] = np.nan
+
+    result = indicators(lagging)
+    pd.testing.assert_series_equal(result.loc['BBB'], indicators(panel.iloc[:-1]).loc['BBB'])
+    pd.testing.assert_series_equal(result.loc['AAA'], indicators(panel).loc['AAA'])
+    assert screen(lagging, loose).loc['BBB', 'signal']
+
+def test_stale_symbol_is_not_screened(make_panel, loose):
+    panel = make_panel()
+    panel.loc[panel.index[-10:], (slice(None), 'BBB')] = np.nan
+
+    result = screen(panel, loose)
+    assert result.loc['BBB', ['price', 'rsi', 'average_volume']].isna().all()
+    assert not result.loc['BBB', 'signal']
+    assert result.loc['AAA', 'price'] == panel['Close']['AAA'].iloc[-1]
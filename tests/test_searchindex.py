@@ -0,0 +1,66 @@
+import pytest
+from analysis import preprocessing
+from analysis.module import DataObject
+from analysis.searchindex import match_expression, query_terms
+
+@pytest.fixture
+def without_nltk(monkeypatch):
+    def missing(text):
+        raise LookupError("Resource stopwords not found.")
+    monkeypatch.setattr(preprocessing, 'preprocess_text', missing)
+
+@pytest.fixture
+def index(stores, without_nltk):
+    stores['data'].upsert_many([
+        DataObject('FRED_1', url='https://fred.example/1', date='February 27, 2024'),
+        DataObject('FRED_2', url='https://fred.example/2', date='March 5, 2024'),
+        DataObject('Rates_1', url='https://rates.example/1', date='February 28, 2024'),
+    ])
+    stores['index'].add_many([
+        ('FRED_1', 'treasury auction treasury yield treasury'),
+        ('FRED_2', 'quarterly survey of economic conditions with one treasury mention among many other words here'),
+        ('Rates_1', 'overnight rate treasury repo'),
+    ])
+    return stores['index']
+
+def names(results):
+    return [base_name for base_name, _, _, _ in results]
+
+def test_query_terms_fall_back_to_lowercase_words_without_nltk(without_nltk):
+    assert query_terms('Treasury AUCTION, results!') == ['treasury', 'auction', 'results']
+
+def test_query_terms_use_the_document_normalization(monkeypatch):
+    monkeypatch.setattr(preprocessing, 'preprocess_text', lambda text: 'auction result')
+    assert query_terms('Auctions & results') == ['auction', 'result']
+
+def test_match_expression_quotes_operators():
+    assert match_expression(['and', 'near']) == '"and" OR "near"'
+    assert match_expression(['a', 'b'], match_all=True) == '"a" AND "b"'
+
+def test_bm25_ranks_denser_matches_first(index):
+    results = index.search('treasury')
+    assert names(results)[0] == 'FRED_1'
+    assert set(names(results)) == {'FRED_1', 'FRED_2', 'Rates_1'}
+    scores = [score for _, score, _, _ in results]
+    assert scores == sorted(scores)
+    assert results[0][2:] == ('https://fred.example/1', 'February 27, 2024')
+
+def test_source_and_date_filters(index):
+    assert set(names(index.search('treasury', source='FRED'))) == {'FRED_1', 'FRED_2'}
+    assert names(index.search('treasury', date_from='2024-02-28', date_to='2024-02-29')) == ['Rates_1']
+    assert names(index.search('treasury', source='FRED', date_from='2024-03-01')) == ['FRED_2']
+    assert names(index.search('treasury', limit=1)) == ['FRED_1']
+
+def test_match_all_requires_every_term(index):
+    assert set(names(index.search('treasury repo'))) == {'FRED_1', 'FRED_2', 'Rates_1'}
+    assert names(index.search('treasury repo', match_all=True)) == ['Rates_1']
+    assert index.search('!!!') == []
+
+def test_add_many_replaces_a_changed_document(index):
+    index.add_many([('Rates_1', 'overnight rate repo'), ('Rates_2', 'reverse repo')])
+    assert len(index) == 4
+    assert 'Rates_1' not in names(index.search('treasury'))
+    assert set(names(index.search('repo'))) == {'Rates_1', 'Rates_2'}
+
+    index.remove('Rates_2')
+    assert names(index.search('repo')) == ['Rates_1']
@@ -0,0 +1,79 @@
+import os
+import numpy as np
+from analysis.seriesstore import SeriesStore, iter_observations, resample
+
+def rates(*rows):
+    return {'refRates': [{'effectiveDate': date, 'type': kind, 'percentRate': rate, 'volumeInBillions': volume}
+                         for date, kind, rate, volume in rows]}
+
+FIRST = rates(('2024-02-26', 'EFFR', 5.33, 100), ('2024-02-26', 'SOFR', 5.31, 1800), ('2024-02-27', 'EFFR', 5.33, 110))
+
+def segments(store, source):
+    return sorted(os.listdir(os.path.join(store.path, source)))
+
+def test_observations_are_keyed_by_record_labels():
+    assert sorted(iter_observations(FIRST)) == [
+        ('refRates/EFFR/percentRate', '2024-02-26', 5.33), ('refRates/EFFR/percentRate', '2024-02-27', 5.33),
+        ('refRates/EFFR/volumeInBillions', '2024-02-26', 100.0), ('refRates/EFFR/volumeInBillions', '2024-02-27', 110.0),
+        ('refRates/SOFR/percentRate', '2024-02-26', 5.31), ('refRates/SOFR/volumeInBillions', '2024-02-26', 1800.0),
+    ]
+
+def test_append_stores_only_new_or_changed_observations(stores):
+    store = stores['series']
+    assert store.append_payload('Rates_Data.txt', FIRST, 'a' * 64) == 6
+
+    # The 02-27 EFFR rate was revised and 02-28 is new; everything else is unchanged.
+    second = rates(('2024-02-26', 'EFFR', 5.33, 100), ('2024-02-27', 'EFFR', 5.32, 110), ('2024-02-28', 'EFFR', 5.33, 120))
+    assert store.append_payload('Rates_Data.txt', second, 'b' * 64) == 3
+    assert len(segments(store, 'Rates')) == 2
+
+    dates, values = store.series('Rates', 'refRates/EFFR/percentRate')
+    assert dates.astype(str).tolist() == ['2024-02-26', '2024-02-27', '2024-02-28']
+    assert values.tolist() == [5.33, 5.32, 5.33]
+    assert store.append_payload('Rates_Data.txt', second, 'c' * 64) == 0
+
+def test_payload_with_a_stored_digest_is_skipped(stores):
+    store = stores['series']
+    store.append_payload('Rates_Data.txt', FIRST, 'a' * 64)
+    changed = rates(('2024-02-26', 'EFFR', 9.99, 100))
+    assert store.append_payload('Rates_Data.txt', changed, 'a' * 64) == 0
+    assert store.series('Rates', 'refRates/EFFR/percentRate')[1].tolist() == [5.33, 5.33]
+
+def test_compact_merges_segments_and_reads_stay_the_same(stores):
+    store = stores['series']
+    store.append_payload('Rates_Data.txt', FIRST, 'a' * 64)
+    store.append_payload('Rates_Data.txt', rates(('2024-02-27', 'EFFR', 5.32, 110)), 'b' * 64)
+    before = store.read('Rates')
+
+    store.compact('Rates')
+    assert len(segments(store, 'Rates')) == 1
+    after = store.read('Rates')
+    for old, new in zip(before, after):
+        assert old.tolist() == new.tolist()
+
+    # The cached partition is rebuilt from the new segment list, here and in a second store on the same files.
+    store.append_payload('Rates_Data.txt', rates(('2024-02-28', 'SOFR', 5.30, 1900)), 'c' * 64)
+    for reader in (store, SeriesStore(store.path)):
+        dates, values = reader.series('Rates', 'refRates/SOFR/percentRate')
+        assert dates.astype(str).tolist() == ['2024-02-26', '2024-02-28'] and values.tolist() == [5.31, 5.30]
+
+def test_read_filters_by_key_and_date_range(stores):
+    store = stores['series']
+    store.append_payload('Rates_Data.txt', FIRST, 'a' * 64)
+    keys, dates, values = store.read('Rates', keys=['refRates/EFFR/volumeInBillions'], start='2024-02-27')
+    assert keys.tolist() == ['refRates/EFFR/volumeInBillions'] and dates.astype(str).tolist() == ['2024-02-27'] and values.tolist() == [110.0]
+    assert store.series('Rates', 'refRates/EFFR/percentRate', end='2024-02-26')[1].tolist() == [5.33]
+    assert len(store.series('Rates', 'missing')[0]) == 0
+
+def test_resample():
+    dates = np.array(['2024-01-02', '2024-01-31', '2024-02-15', '2024-04-01', '2024-04-30'], dtype='datetime64[D]')
+    values = np.array([1.0, 2.0, 3.0, 4.0, 6.0])
+
+    periods, monthly = resample(dates, values, 'M', 'last')
+    assert periods.astype(str).tolist() == ['2024-01', '2024-02', '2024-04'] and monthly.tolist() == [2.0, 3.0, 6.0]
+    assert resample(dates, values, 'M', 'first')[1].tolist() == [1.0, 3.0, 4.0]
+    assert resample(dates, values, 'M', 'mean')[1].tolist() == [1.5, 3.0, 5.0]
+    periods, quarterly = resample(dates, values, 'Q', 'sum')
+    assert periods.astype(str).tolist() == ['2024-01', '2024-04'] and quarterly.tolist() == [6.0, 10.0]
+    assert resample(dates, values, 'Y', 'max')[1].tolist() == [6.0]
+    assert len(resample(dates[:0], values[:0], 'W')[0]) == 0
@@ -0,0 +1,47 @@
+import json
+from types import SimpleNamespace
+import pytest
+from analysis.downloader import clean_json, create_hash, is_empty, iter_text
+from analysis.fixtures import endpoint_payloads
+from analysis.jsonrepair import strip_control_characters
+from analysis.seriesstore import iter_observations
+from analysis.streaming import spill_leaves
+from analysis.truncation import chunk_json, flatten_json, iter_chunk_items
+
+EXTRA = [
+    ('Accents_Data.txt', json.dumps({'results': [{'title': 'Société Générale — “repo” ✓', 'filed_at': 'March 1, 2024\t8:45 AM',
+                                                  'note': 'line\nbreak', 'amount': 1.5e3, 'flag': False, 'missing': None}]}, indent=4)),
+    ('Empty_Data.txt', '{"results": [], "count": 0, "note": ""}'),
+    ('Control_Data.txt', '{"refRates": [{"effectiveDate": "2024-02-27",\r\n "type": "EF\tFR", "percentRate": 5.33}]}'),
+    ('Malformed_Data.txt', '{refRates: [{effectiveDate: "2024-02-27", type: "EFFR", percentRate: 5.33,},],}'),
+]
+PAYLOADS = endpoint_payloads() + EXTRA
+
+def response(body):
+    return SimpleNamespace(encoding='utf-8', iter_content=lambda size: (body[i:i + size] for i in range(0, len(body), size)))
+
+def buffered(text):
+    cleaned_json = strip_control_characters(text)
+    json_data = clean_json(cleaned_json)
+    flattened = flatten_json(json_data)
+    items = [(key, flattened[key]) for key in sorted(flattened)]
+    chunks = [file_content for file_content, _ in chunk_json(json_data)]
+    return create_hash(cleaned_json), not is_empty(json_data), items, chunks, sorted(iter_observations(json_data))
+
+def streamed(text, chunk_size):
+    spill, digest, has_content = spill_leaves(iter_text(response(text.encode()), chunk_size))
+    try:
+        items = list(spill.items())
+        chunks = [file_content for file_content, _ in iter_chunk_items(items)]
+        return digest, has_content, items, chunks, sorted(spill.observations)
+    finally:
+        spill.close()
+
+@pytest.mark.parametrize('file_name, text', PAYLOADS, ids=[file_name for file_name, _ in PAYLOADS])
+@pytest.mark.parametrize('chunk_size', [7, 4096])
+def test_streamed_payload_matches_the_buffered_path(file_name, text, chunk_size):
+    # Small chunks split UTF-8 sequences, escapes and tokens across reads.
+    expected = buffered(text)
+    actual = streamed(text, chunk_size)
+    for label, old, new in zip(('digest', 'has_content', 'items', 'chunks', 'observations'), expected, actual):
+        assert old == new, f"{label} differ"
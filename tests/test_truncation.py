@@ -0,0 +1,93 @@
+import json
+import os
+import random
+import pytest
+from analysis import truncation
+from analysis.fixtures import endpoint_payloads
+from analysis.hashstore import TRUNCATION
+
+def legacy_flatten_json(y):
+    out = {}
+
+    def flatten(x, name=''):
+        if type(x) is dict:
+            for a in x:
+                flatten(x[a], name + a + '_')
+        elif type(x) is list:
+            for i, a in enumerate(x):
+                flatten(a, name + str(i) + '_')
+        else:
+            out[name[:-1]] = x
+
+    flatten(y)
+    return out
+
+def legacy_chunks(json_data):
+    """The chunker truncation.py shipped with: re-serialize the growing chunk after every key."""
+    flattened_data = legacy_flatten_json(json_data)
+    chunks, current = [], []
+    for key in sorted(flattened_data):
+        current.append({key: flattened_data[key]})
+        if len(json.dumps(current, indent=4)) > 511:
+            chunks.append(json.dumps(current[:-1], indent=4))
+            current = [{key: flattened_data[key]}]
+    if current:
+        chunks.append(json.dumps(current, indent=4))
+    return chunks
+
+def random_value(rng, depth=0):
+    kind = rng.random()
+    if depth < 3 and kind < 0.25:
+        return {rng.choice(('a', 'b_c', 'name', 'Ünï', 'x' * rng.randint(1, 40))) + str(i): random_value(rng, depth + 1)
+                for i in range(rng.randint(0, 6))}
+    if depth < 3 and kind < 0.4:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 15))]
+    return rng.choice((
+        None, True, False, rng.randint(-10**12, 10**12), rng.uniform(-1e6, 1e6), '',
+        ''.join(rng.choice('abc xyz"\\/\n\té—✓') for _ in range(rng.randint(0, 600))),
+    ))
+
+@pytest.mark.parametrize('seed', range(300))
+def test_chunks_are_byte_identical_to_the_legacy_chunker(seed):
+    rng = random.Random(seed)
+    json_data = {f'key{i}': random_value(rng) for i in range(rng.randint(1, 12))}
+    assert truncation.flatten_json(json_data) == legacy_flatten_json(json_data)
+    assert [file_content for file_content, _ in truncation.chunk_json(json_data)] == legacy_chunks(json_data)
+
+def test_fixture_chunks_are_byte_identical_to_the_legacy_chunker():
+    for _, text in endpoint_payloads():
+        json_data = json.loads(text)
+        assert [file_content for file_content, _ in truncation.chunk_json(json_data)] == legacy_chunks(json_data)
+
+def write_data_files(directory, payloads):
+    os.makedirs(directory, exist_ok=True)
+    for file_name, text in payloads:
+        with open(os.path.join(directory, file_name), 'w') as f:
+            f.write(text)
+
+def run_process_files(stores, payloads, workers):
+    directory = truncation.PROCESSING_PATH
+    write_data_files(directory, payloads)
+    truncation.process_files(workers)
+    outputs = {}
+    for file_name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, file_name)) as f:
+            outputs[file_name] = f.read()
+        os.remove(os.path.join(directory, file_name))
+    store = stores['hashes']
+    rows = store._conn.execute('SELECT name, digest FROM hashes WHERE namespace = ? ORDER BY id', (TRUNCATION,)).fetchall()
+    store._conn.execute('DELETE FROM hashes')
+    return outputs, rows
+
+def test_pooled_process_files_writes_what_a_serial_run_does(stores):
+    payloads = endpoint_payloads()
+    # A copy of another source's payload repeats its chunks, which only the first file in listing order may write.
+    payloads.append(('Zz_Copy_Data.txt', dict(payloads)['Rates_Data.txt']))
+
+    serial = run_process_files(stores, payloads, workers=1)
+    pooled = run_process_files(stores, payloads, workers=2)
+    assert serial == pooled
+    outputs, rows = serial
+    assert outputs and not any(name.endswith('_Data.txt') for name in outputs)
+    assert not any(name.startswith('Zz_Copy') for name in outputs)
+    assert len(rows) == len(outputs) == len({digest for _, digest in rows})
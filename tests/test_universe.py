@@ -0,0 +1,58 @@
+import pandas as pd
+from quickplay.universe import filter_listing, get_symbols, shard
+
+COLUMNS = ['Symbol', 'Security Name', 'Market Category', 'Test Issue', 'Financial Status', 'Round Lot Size', 'ETF', 'NextShares']
+
+def listing(*rows):
+    return pd.DataFrame([[symbol, name, 'Q', test, status, '100', etf, 'N'] for symbol, name, test, status, etf in rows], columns=COLUMNS)
+
+def kept(frame, **options):
+    return filter_listing(frame, **options)['Symbol'].tolist()
+
+def test_derivatives_are_recognized_by_security_type_only():
+    frame = listing(
+        ('URHI', 'United Rights Holdings Inc. - Common Stock', 'N', 'N', 'N'),
+        ('UNIT', 'Uniti Group Inc. - Common Stock', 'N', 'N', 'N'),
+        ('ACAH', 'Atlantic Coastal Acquisition Corp. - Units', 'N', 'N', 'N'),
+        ('ACAQ', 'Athena Consumer Acquisition Corp. - Unit, each consisting of one-half of one redeemable warrant', 'N', 'N', 'N'),
+        ('BRLI', 'Brilliant Acquisition Corp - Right', 'N', 'N', 'N'),
+        ('CCIX', 'Churchill Capital Corp IX - Warrants (each exercisable for one share)', 'N', 'N', 'N'),
+    )
+    assert kept(frame) == ['URHI', 'UNIT']
+    assert kept(frame, exclude_derivatives=False) == ['URHI', 'UNIT', 'ACAH', 'ACAQ', 'BRLI', 'CCIX']
+
+def test_filters_drop_test_issues_etfs_suffixed_symbols_and_troubled_issuers():
+    frame = listing(
+        ('AAPL', 'Apple Inc. - Common Stock', 'N', 'N', 'N'),
+        ('ZXZZT', 'NASDAQ TEST STOCK - Nasdaq Symbology Test Common Stock', 'Y', 'N', 'N'),
+        ('QQQ', 'Invesco QQQ Trust, Series 1 - ETF', 'N', 'N', 'Y'),
+        ('ABCDW', 'ABCD Corp - Common Stock', 'N', 'N', 'N'),
+        ('ABCDE', 'ABCD Corp - Class E Common Stock', 'N', 'N', 'N'),
+        ('BNKR', 'Bankrupt Co - Common Stock', 'N', 'Q', 'N'),
+        ('LATE', 'Late Filer Inc. - Common Stock', 'N', 'E', 'N'),
+    )
+    assert kept(frame) == ['AAPL', 'ABCDE']
+    assert kept(frame, exclude_test=False, exclude_etfs=False) == ['AAPL', 'ZXZZT', 'QQQ', 'ABCDE']
+    assert kept(frame, financial_status=('N', 'E')) == ['AAPL', 'ABCDE', 'LATE']
+    assert kept(frame, financial_status=None) == ['AAPL', 'ABCDE', 'BNKR', 'LATE']
+
+def test_shards_partition_the_symbols_stably_and_evenly():
+    symbols = [f'S{i:04d}' for i in range(4000)]
+    shards = [shard(symbols, index, 4) for index in range(4)]
+
+    assert sorted(sum(shards, [])) == symbols
+    assert all(900 < len(part) < 1100 for part in shards)
+    # Assignment depends only on the symbol, so it survives reordering and other symbols coming and going.
+    assert shard(list(reversed(symbols[:100])), 2, 4) == [symbol for symbol in reversed(symbols[:100]) if symbol in shards[2]]
+    assert shard(['AAPL'], 0, 4) + shard(['AAPL'], 1, 4) + shard(['AAPL'], 2, 4) + shard(['AAPL'], 3, 4) == ['AAPL']
+    assert shard(symbols, 0, 1) == symbols
+
+def test_get_symbols_filters_sorts_and_shards():
+    frame = listing(
+        ('MSFT', 'Microsoft Corporation - Common Stock', 'N', 'N', 'N'),
+        ('AAPL', 'Apple Inc. - Common Stock', 'N', 'N', 'N'),
+        ('QQQ', 'Invesco QQQ Trust, Series 1 - ETF', 'N', 'N', 'Y'),
+    )
+    assert get_symbols(listing=frame) == ['AAPL', 'MSFT']
+    assert get_symbols(listing=frame, exclude_etfs=False) == ['AAPL', 'MSFT', 'QQQ']
+    assert sorted(get_symbols(0, 2, listing=frame) + get_symbols(1, 2, listing=frame)) == ['AAPL', 'MSFT']